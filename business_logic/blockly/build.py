@@ -2,13 +2,13 @@
 
 import inspect
 import logging
-import re
 
 from lxml import etree
 
 from django.db.models import Model
 
 from ..models import *
+from ..utils import camel_case_to_snake_case
 
 from .data import OPERATOR_TABLE
 from .exceptions import BlocklyXmlBuilderException
@@ -16,11 +16,6 @@ from .exceptions import BlocklyXmlBuilderException
 logger = logging.getLogger(__name__)
 
 
-def camel_case_to_snake_case(name):
-    s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
-    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
-
-
 class BlocklyXmlBuilder(NodeCacheHolder):
 
     def build(self, tree_root):
@@ -192,6 +187,33 @@ class BlocklyXmlBuilder(NodeCacheHolder):
 
     visit_if_statement.process_children = True
 
+    def visit_foreach_statement(self, node, parent_xml):
+        children = self.get_children(node)
+
+        if len(children) not in (2, 3):
+            raise BlocklyXmlBuilderException('Incorrect number of ForeachStatement node children: {}'.format(
+                len(children)))
+
+        block = etree.SubElement(parent_xml, 'block', type='controls_forEach')
+        self._visit_variable(children[0], block)
+
+        value = etree.SubElement(block, 'value', name='LIST')
+        self.visit(children[1], value)
+
+        if len(children) == 3:
+            statement = etree.SubElement(block, 'statement', name='DO')
+            self.visit(children[2], statement)
+
+        return block
+
+    visit_foreach_statement.process_children = True
+
+    def visit_break_loop(self, node, parent_xml):
+        block = etree.SubElement(parent_xml, 'block', type='controls_flow_statements')
+        field_element = etree.SubElement(block, 'field', name='FLOW')
+        field_element.text = 'BREAK'
+        return block
+
     def visit_function(self, node, parent_xml):
         function = node.content_object
         function_definition = function.definition
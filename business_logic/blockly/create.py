@@ -1,50 +1,361 @@
 # -*- coding: utf-8 -*-
+import itertools
+
+from collections import OrderedDict
+
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+from django.db import connections
+from django.db.models import Q, QuerySet
 
-from ..models import Node, ProgramVersion, Variable, VariableDefinition
+from ..models import Node, NodeCache, Operator, ProgramVersion, Variable, VariableDefinition
 from ..utils import get_content_type_id
 
 from .exceptions import NodeTreeCreatorException
 
 
+def can_bulk_create(model):
+    # primary keys of created objects are needed for linking them to nodes
+    return not model._meta.parents and connections[model._default_manager.db].features.can_return_rows_from_bulk_insert
+
+
 class NodeTreeCreator(object):
+    """
+    Creates node tree from structure returned by :func:`business_logic.blockly.parse.BlocklyXmlParser.parse`.
+
+    Content objects and variable definitions are created by one ``bulk_create()`` query per model,
+    nodes of the tree are created by single ``bulk_create()`` query with precalculated nested set values.
+    """
 
     def create(self, data, program_version=None):
+        external_variable_definitions = self.get_external_variable_definitions(program_version)
+        variable_definitions = self.create_variable_definitions(data, external_variable_definitions)
+        data = self.wrap(data)
 
-        def is_block(__data):
-            return 'content_type' not in __data['data']
+        data['children'] = variable_definitions + data['children']
 
-        if program_version is not None:
-            if not isinstance(program_version, ProgramVersion):
-                raise NodeTreeCreatorException('Invalid program_version argument type')
+        self.create_content_objects(data)
 
-            program_interface = program_version.program.program_interface
-            external_variable_definitions = VariableDefinition.objects.filter(
-                Q(program_argument__program_interface=program_interface) |
-                Q(program_argument_field__program_argument__program_interface=program_interface)).order_by(
-                    'name').distinct()
-        else:
-            external_variable_definitions = None
+        return self.create_nodes(data)
 
-        variable_definitions = self.create_variable_definitions(data, external_variable_definitions)
-        if not is_block(data):
-            data = {'data': {}, 'children': [data]}
+    def update(self, entry_point, data, program_version=None):
+        """
+        Applies changes of program tree to existing tree instead of its recreation.
 
-        data['children'] = variable_definitions + data['children']
+        Items of data are matched with nodes of existing tree by ``id`` key holding Blockly block id
+        (id of node for blocks built by :class:`business_logic.blockly.build.BlocklyXmlBuilder`),
+        items without block id are matched with nodes of the same content type at the same position
+        in matched parent. Content objects of matched nodes are updated only if their fields are changed,
+        nodes are updated only if their nested set values are changed, unmatched nodes are created or deleted.
+
+        :param entry_point: root node of existing tree
+        :type entry_point: Node
+        :param data: dictionary returned from BlocklyXmlParser.parse()
+        :type data: dict
+        :param program_version: program version used for variable definitions lookup
+        :type program_version: ProgramVersion
+        :return: root node
+        :rtype: Node
+        """
+        if entry_point.content_type_id is not None:
+            # tree without code block root can't be matched with parsed data
+            entry_point.delete()
+            return self.create(data, program_version)
+
+        node_cache = NodeCache()
+        node_cache.initialize(entry_point)
+        nodes = list(self.iterate_tree(entry_point, node_cache))
+
+        external_variable_definitions = list(self.get_external_variable_definitions(program_version) or [])
+        variable_definition_nodes = [
+            child for child in node_cache.get_children(entry_point)
+            if isinstance(child.content_object, VariableDefinition)
+        ]
+        variable_definitions = self.create_variable_definitions(
+            data, external_variable_definitions + [node.content_object for node in variable_definition_nodes])
+        data = self.wrap(data)
+
+        used_variable_definition_ids = set(
+            variable['data']['definition_id']
+            for variable in self.collect_objects(data, get_content_type_id(Variable)))
+        data['children'] = [
+            dict(id=str(node.id), data=dict(content_type=node.content_type_id, object_id=node.object_id))
+            for node in variable_definition_nodes if node.object_id in used_variable_definition_ids
+        ] + variable_definitions + data['children']
+        data['id'] = str(entry_point.id)
+
+        matched = self.match_nodes(data, nodes, node_cache)
+        self.update_content_objects(data, matched)
+        self.create_content_objects(data)
+
+        removed = [node for node in nodes if str(node.id) not in matched]
+        self.delete_nodes(removed)
+
+        changed_nodes = []
+        new_nodes = []
+
+        for item, depth, lft, rgt in self.get_nested_set(data):
+            node = matched.get(item.get('id'))
+
+            if node is None:
+                new_nodes.append(self.build_node(item['data'], tree_id=entry_point.tree_id, depth=depth, lft=lft,
+                                                 rgt=rgt))
+                continue
+
+            object_id = item['data'].get('object_id')
+            values = dict(depth=depth, lft=lft, rgt=rgt, object_id=None if object_id is None else int(object_id))
+            if any(getattr(node, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(node, name, value)
+                changed_nodes.append(node)
+
+        Node.objects.bulk_update(changed_nodes, ['depth', 'lft', 'rgt', 'object_id'])
+        Node.objects.bulk_create(new_nodes)
+
+        return Node.objects.get(id=entry_point.id)
+
+    def get_external_variable_definitions(self, program_version):
+        if program_version is None:
+            return None
+
+        if not isinstance(program_version, ProgramVersion):
+            raise NodeTreeCreatorException('Invalid program_version argument type')
+
+        program_interface = program_version.program.program_interface
+        arguments = Q(program_argument__program_interface=program_interface)
+        argument_fields = Q(program_argument_field__program_argument__program_interface=program_interface)
+        return VariableDefinition.objects.filter(arguments | argument_fields).order_by('name').distinct()
+
+    @staticmethod
+    def wrap(data):
+        # single statement or expression is wrapped by code block
+        if 'content_type' in data['data']:
+            return {'data': {}, 'children': [data]}
+
+        return data
+
+    @staticmethod
+    def iterate_tree(node, node_cache):
+        yield node
+
+        for child in node_cache.get_children(node):
+            for descendant in NodeTreeCreator.iterate_tree(child, node_cache):
+                yield descendant
+
+    def match_nodes(self, data, nodes, node_cache):
+        """
+        Sets ``id`` key of data items matched with existing nodes, removes it from unmatched ones.
+
+        :return: matched nodes by block id
+        :rtype: dict
+        """
+        node_by_block_id = dict((str(node.id), node) for node in nodes)
+        matched = {}
+
+        def is_matching(item, node):
+            if node is None or str(node.id) in matched:
+                return False
+            return node.content_type_id == item['data'].get('content_type')
+
+        # nodes referenced by block ids can't be matched by position
+        referenced = set()
+
+        def collect(item):
+            if item.get('id') in node_by_block_id:
+                referenced.add(item['id'])
+            for child in item.get('children', []):
+                collect(child)
+
+        collect(data)
+
+        def match(item, node):
+            if is_matching(item, node):
+                item['id'] = str(node.id)
+                matched[item['id']] = node
+                children = [child for child in node_cache.get_children(node) if str(child.id) not in referenced]
+            else:
+                item.pop('id', None)
+                children = []
+
+            position = 0
+            for child in item.get('children', []):
+                if 'id' in child:
+                    candidate = node_by_block_id.get(child['id'])
+                else:
+                    candidate = children[position] if position < len(children) else None
+                    position += 1
+
+                match(child, candidate)
+
+        match(data, node_by_block_id[data['id']])
+
+        return matched
+
+    def update_content_objects(self, data, matched):
+        """
+        Saves changed fields of content objects of matched nodes grouped by model.
+        """
+        node_kwargs = [x.name for x in Node._meta.get_fields()]
+        changed_by_model = OrderedDict()
+
+        def update(item):
+            node = matched.get(item.get('id'))
+
+            if node is not None and node.content_type_id is not None:
+                kwargs = dict(((k, v) for k, v in item['data'].items() if k not in node_kwargs))
+
+                if kwargs:
+                    content_object = node.content_object
+                    model_class = content_object.__class__
+                    changed_fields = [
+                        k for k, v in kwargs.items()
+                        if getattr(content_object, k) != model_class._meta.get_field(k).to_python(v)
+                    ]
 
-        def create_content_object(_data):
-            if not is_block(_data):
-                self.create_content_object(_data['data'])
+                    for field_name in changed_fields:
+                        setattr(content_object, field_name, kwargs[field_name])
 
-            for child in _data.get('children', []):
-                create_content_object(child)
+                    if changed_fields:
+                        objects, fields = changed_by_model.setdefault(model_class, ([], set()))
+                        objects.append(content_object)
+                        fields.update(changed_fields)
 
-        create_content_object(data)
+                    for kwarg in kwargs:
+                        del item['data'][kwarg]
 
-        return Node.objects.get(id=Node.load_bulk([
-            data,
-        ])[0])
+                # referenced object of ReferenceConstant can be changed
+                item['data'].setdefault('object_id', node.object_id)
+
+            for child in item.get('children', []):
+                update(child)
+
+        update(data)
+
+        for model_class, (objects, fields) in changed_by_model.items():
+            if issubclass(model_class, Operator):
+                for content_object in objects:
+                    content_object._check_operator()
+
+            model_class.objects.bulk_update(objects, sorted(fields))
+
+    @staticmethod
+    def delete_nodes(nodes):
+        """
+        Deletes nodes without descendants and ``treebeard`` gap closing, and their content objects
+        grouped by content type.
+        """
+        if not nodes:
+            return
+
+        Node.delete_content_objects((node.content_type_id, node.object_id) for node in nodes)
+
+        # QuerySet.delete() of treebeard deletes descendants and closes gaps
+        QuerySet.delete(Node.objects.filter(id__in=[node.id for node in nodes]))
+
+    def create_content_objects(self, data):
+        """
+        Creates content objects of all nodes grouped by model.
+
+        :param data: dictionary returned from BlocklyXmlParser.parse()
+        :type data: dict
+        """
+        items_by_content_type_id = OrderedDict()
+
+        def collect(item):
+            content_type_id = item['data'].get('content_type')
+            if content_type_id is not None and 'object_id' not in item['data']:
+                items_by_content_type_id.setdefault(content_type_id, []).append(item['data'])
+
+            for child in item.get('children', []):
+                collect(child)
+
+        collect(data)
+
+        node_kwargs = [x.name for x in Node._meta.get_fields()]
+
+        for content_type_id, items in items_by_content_type_id.items():
+            model_class = ContentType.objects.get_for_id(content_type_id).model_class()
+
+            if model_class == VariableDefinition:
+                continue
+
+            if not can_bulk_create(model_class):
+                for item in items:
+                    self.create_content_object(item)
+                continue
+
+            content_objects = [
+                model_class(**dict(((k, v) for k, v in item.items() if k not in node_kwargs))) for item in items
+            ]
+
+            # bulk_create() doesn't call Operator.save()
+            if issubclass(model_class, Operator):
+                for content_object in content_objects:
+                    content_object._check_operator()
+
+            content_objects = model_class.objects.bulk_create(content_objects)
+
+            for item, content_object in zip(items, content_objects):
+                for kwarg in [k for k in item.keys() if k not in node_kwargs]:
+                    del item[kwarg]
+                item['object_id'] = content_object.id
+
+    def create_nodes(self, data):
+        """
+        Creates nodes of new tree, replaces ``treebeard.NS_Node.load_bulk()`` which saves nodes one by one.
+
+        :param data: dictionary with created content objects
+        :type data: dict
+        :return: root node
+        :rtype: Node
+        """
+        last_root = Node.get_last_root_node()
+        tree_id = last_root.tree_id + 1 if last_root else 1
+
+        Node.objects.bulk_create([
+            self.build_node(item['data'], tree_id=tree_id, depth=depth, lft=lft, rgt=rgt)
+            for item, depth, lft, rgt in self.get_nested_set(data)
+        ])
+
+        return Node.objects.get(tree_id=tree_id, lft=1)
+
+    @staticmethod
+    def build_node(data, **kwargs):
+        node_data = dict(data)
+        if 'content_type' in node_data:
+            node_data['content_type_id'] = node_data.pop('content_type')
+        node_data.update(kwargs)
+        return Node(**node_data)
+
+    @staticmethod
+    def get_nested_set(data):
+        """
+        :param data: dictionary returned from BlocklyXmlParser.parse()
+        :type data: dict
+        :return: list of (item, depth, lft, rgt) tuples in preorder
+        :rtype: list
+        """
+        counter = itertools.count(1)
+        result = []
+
+        # iterative preorder, rgt is set when all children are visited
+        stack = [(data, 1, False)]
+        opened = []
+
+        while stack:
+            item, depth, is_closing = stack.pop()
+
+            if is_closing:
+                opened.pop()[3] = next(counter)
+                continue
+
+            row = [item, depth, next(counter), None]
+            result.append(row)
+            opened.append(row)
+
+            stack.append((item, depth, True))
+            stack.extend((child, depth + 1, False) for child in reversed(item.get('children', [])))
+
+        return [tuple(row) for row in result]
 
     def collect_objects(self, data, content_type_id):
         """
@@ -68,7 +379,7 @@ class NodeTreeCreator(object):
         return collection
 
     def create_content_object(self, data):
-        content_type = ContentType.objects.get(id=data['content_type'])
+        content_type = ContentType.objects.get_for_id(data['content_type'])
         model_class = content_type.model_class()
 
         if 'object_id' in data:
@@ -101,20 +412,26 @@ class NodeTreeCreator(object):
 
         variables = self.collect_objects(data, get_content_type_id(Variable))
 
+        new_names = list(OrderedDict.fromkeys(
+            variable['data']['name'] for variable in variables if variable['data']['name'] not in variable_by_name))
+
+        if can_bulk_create(VariableDefinition):
+            created = VariableDefinition.objects.bulk_create([VariableDefinition(name=name) for name in new_names])
+        else:
+            created = [VariableDefinition.objects.create(name=name) for name in new_names]
+
+        for variable_definition in created:
+            variable_definitions.append({
+                'data': {
+                    'content_type': get_content_type_id(VariableDefinition),
+                    'object_id': variable_definition.id
+                }
+            })
+            variable_by_name[variable_definition.name] = dict(variables=[], variable_definition=variable_definition.id)
+
         for variable in variables:
             variable_name = variable['data']['name']
-            if variable_name not in variable_by_name:
-                variable_definition_id = VariableDefinition.objects.create(name=variable_name).id
-                variable_definition = {
-                    'data': {
-                        'content_type': get_content_type_id(VariableDefinition),
-                        'object_id': variable_definition_id
-                    }
-                }
-                variable_definitions.append(variable_definition)
-                variable_by_name[variable_name] = dict(variables=[], variable_definition=variable_definition_id)
-            else:
-                variable_definition_id = variable_by_name[variable_name]['variable_definition']
+            variable_definition_id = variable_by_name[variable_name]['variable_definition']
 
             variable_by_name[variable_name]['variables'].append(variable)
             del variable['data']['name']
@@ -23,26 +23,32 @@ class BlocklyXmlParser(object):
 
         xml = etree.parse(StringIO(xml_str))
         root_node = xml.getroot()
-        self.cleanup_namespace(root_node)
-        self.transform_shadow(root_node)
+        self.prepare(root_node)
         return [
             self.visit(root_node),
         ]
 
     @staticmethod
-    def cleanup_namespace(root):
+    def prepare(root):
+        """
+        Removes namespaces and transforms shadow blocks by single pass over XML tree.
+        Shadow block is removed if it is replaced by real block, otherwise it is treated as real block.
+        """
+        shadows = []
+
         # http://stackoverflow.com/a/18160164
-        for elem in root.getiterator():
+        for elem in root.iter():
             if not hasattr(elem.tag, 'find'):
                 continue
             i = elem.tag.find('}')
             if i >= 0:
                 elem.tag = elem.tag[i + 1:]
+            if elem.tag == 'shadow':
+                shadows.append(elem)
+
         objectify.deannotate(root, cleanup_namespaces=True)
 
-    @staticmethod
-    def transform_shadow(root):
-        for shadow in root.xpath('.//shadow'):
+        for shadow in shadows:
             sibling = shadow.getnext()
             if sibling is not None and sibling.tag == 'block':
                 shadow.getparent().remove(shadow)
@@ -162,7 +168,14 @@ class BlocklyXmlParser(object):
     def visit_block(self, node):
         method_name = 'visit_block_{}'.format(node.get('type'))
         method = getattr(self, method_name)
-        return method(node)
+        data = method(node)
+
+        # block id is used for matching with existing node on program version update
+        block_id = node.get('id')
+        if data is not None and block_id is not None:
+            data['id'] = block_id
+
+        return data
 
     def visit_block_text(self, node):
         return self._visit_single_child(node)
@@ -191,6 +204,30 @@ class BlocklyXmlParser(object):
     def visit_block_controls_if(self, node):
         return self._visit_simple_container(node, IfStatement)
 
+    def visit_block_controls_forEach(self, node):
+        if node.find('value') is None:
+            raise BlocklyXmlParserException('List is not set for controls_forEach block')
+
+        return self._visit_simple_container(node, ForeachStatement)
+
+    def visit_block_controls_flow_statements(self, node):
+        flow = node.find('field').text
+
+        if flow != 'BREAK':
+            raise BlocklyXmlParserException('Unsupported flow statement: {}'.format(flow))
+
+        for ancestor in node.iterancestors('block'):
+            if ancestor.get('type') == 'controls_forEach':
+                break
+        else:
+            raise BlocklyXmlParserException('Flow statement is used outside of loop')
+
+        return {
+            'data': {
+                'content_type': get_content_type_id(BreakLoop),
+            }
+        }
+
     def visit_field(self, node):
         method_name = 'visit_field_{}'.format(node.get('name').lower())
         method = getattr(self, method_name)
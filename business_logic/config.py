@@ -16,6 +16,31 @@ class ExceptionHandlingPolicy:
     """Re-raise exception"""
 
 
+class LogOverflowPolicy:
+    """
+    Enumeration of names of :class:`business_logic.models.LogWriter` queue overflow policies
+    """
+    BLOCK = 'BLOCK'
+    """Wait until writer thread takes logs from queue, this is default behaviour"""
+
+    DROP = 'DROP'
+    """Drop log"""
+
+
+class LogMode:
+    """
+    Enumeration of names of :class:`business_logic.models.Logger` modes
+    """
+    ALL = 'ALL'
+    """Log all nodes, this is default behaviour"""
+
+    EXCEPTIONS = 'EXCEPTIONS'
+    """Log only nodes raised exceptions"""
+
+    SLOWEST = 'SLOWEST'
+    """Log only ``log_slowest_count`` nodes with the largest own interpretation time"""
+
+
 class ContextConfig(object):
     """
     Stores configuration of :class:`business_logic.models.Context`
@@ -30,6 +55,14 @@ class ContextConfig(object):
         log=False,
         debug=False,
         cache=True,
+        compile=True,
+        fast_interpret=False,
+        log_async=False,
+        log_sampling=1,
+        log_mode=LogMode.ALL,
+        log_slowest_count=10,
+        profile=False,
+        metrics=True,
         exception_handling_policy=ExceptionHandlingPolicy.INTERRUPT,
     )
     """object: default configuration values"""
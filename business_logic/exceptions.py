@@ -20,9 +20,32 @@ class StopInterpretationException(Exception):
 
 class BreakLoopException(Exception):
     """
-    Exception for breaking loops. This feature not implemented.
+    Exception for breaking loops. Unlike other control flow exceptions it is passed through
+    statements interpreted by their parents (e.g. branches of :class:`business_logic.models.IfStatement`)
+    up to the nearest :class:`business_logic.models.ForeachStatement`.
+    Break outside of any loop stops program execution.
 
     See Also:
         * :class:`business_logic.models.BreakLoop`
     """
     pass
+
+
+class SandboxException(Exception):
+    """
+    Raised if sandbox worker process died during function call.
+
+    See Also:
+        * :class:`business_logic.sandbox.SandboxPool`
+    """
+    pass
+
+
+class SandboxTimeoutException(SandboxException):
+    """
+    Raised if function call in sandbox worker process exceeded timeout.
+
+    See Also:
+        * :class:`business_logic.sandbox.SandboxPool`
+    """
+    pass
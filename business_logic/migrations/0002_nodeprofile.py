@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business_logic', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calls', models.PositiveIntegerField(verbose_name='Calls')),
+                ('time', models.FloatField(verbose_name='Time')),
+                ('execution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to='business_logic.execution')),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='business_logic.node', verbose_name='Program node')),
+                ('parent', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='business_logic.node')),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+    ]
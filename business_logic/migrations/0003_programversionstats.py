@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business_logic', '0002_nodeprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgramVersionStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField(verbose_name='Start time')),
+                ('finish_time', models.DateTimeField(db_index=True, verbose_name='Finish time')),
+                ('executions', models.PositiveIntegerField(verbose_name='Executions')),
+                ('errors', models.JSONField(default=dict, verbose_name='Errors')),
+                ('histogram', models.JSONField(default=dict, verbose_name='Histogram')),
+                ('program_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='business_logic.programversion')),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -2,6 +2,8 @@
 #
 
 from .assignment import *
+from .cache import *
+from .compiler import *
 from .constant import *
 from .context import *
 from .foreach import *
@@ -9,8 +11,11 @@ from .frame import *
 from .function import *
 from .ifstatement import *
 from .log import *
+from .metrics import *
 from .node import *
 from .operator_ import *
+from .parallel import *
+from .profiler import *
 from .program import *
 from .reference import *
 from .stop import *
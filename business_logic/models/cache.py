@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+
+import threading
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+from .compiler import NodeCompiler
+from .node import NodeCache
+
+try:
+    PROGRAM_CACHE_SIZE = settings.PROGRAM_CACHE_SIZE
+except AttributeError:
+    PROGRAM_CACHE_SIZE = 128
+
+
+class CachedProgram(object):
+    """
+    Holds preloaded :class:`business_logic.models.NodeCache`, compiled entry point
+    and Blockly XML of single :class:`business_logic.models.ProgramVersion`.
+
+    Attributes:
+        modification_time(:obj:`datetime`): ``ProgramVersion.modification_time`` at the moment of loading
+        entry_point_id(int): id of entry point node
+        entry_point(:class:`business_logic.models.Node`): entry point node held by node_cache
+        node_cache(:class:`business_logic.models.NodeCache`): preloaded tree
+    """
+
+    def __init__(self, program_version):
+        self.modification_time = program_version.modification_time
+        self.entry_point_id = program_version.entry_point_id
+        self.entry_point = program_version.entry_point
+        self.node_cache = NodeCache()
+        self.node_cache.initialize(self.entry_point)
+        self._compiled = None
+        self._xml = None
+
+    def is_actual(self, program_version):
+        return (self.modification_time, self.entry_point_id) == (
+            program_version.modification_time, program_version.entry_point_id)
+
+    @property
+    def compiled(self):
+        """
+        function: entry point compiled by :class:`business_logic.models.NodeCompiler` on first access
+        """
+        if self._compiled is None:
+            compiler = NodeCompiler()
+            compiler.set_node_cache(self.node_cache)
+            self._compiled = compiler.compile(self.entry_point)
+        return self._compiled
+
+    @property
+    def xml(self):
+        """
+        str: Blockly XML of program tree built by :class:`business_logic.blockly.build.BlocklyXmlBuilder`
+        on first access
+        """
+        if self._xml is None:
+            # blockly package imports models
+            from ..blockly.build import BlocklyXmlBuilder
+
+            builder = BlocklyXmlBuilder()
+            builder.set_node_cache(self.node_cache)
+            self._xml = builder.build(self.entry_point)
+        return self._xml
+
+
+class ProgramCache(object):
+    """
+    Process-wide LRU cache of :class:`business_logic.models.CachedProgram` keyed by ``ProgramVersion.id``.
+
+    Cached program is reloaded if ``modification_time`` or ``entry_point`` of
+    given :class:`business_logic.models.ProgramVersion` differs from the cached one.
+    Cached programs are invalidated on ``ProgramVersion`` saving and deletion,
+    so direct changes of program node tree should be followed by ``ProgramVersion.save()``.
+
+    Size of cache can be set by ``PROGRAM_CACHE_SIZE`` django setting, default is 128.
+    Zero value disables caching.
+
+    Attributes:
+        max_size(int): maximum count of cached programs
+        hits(int): count of cache hits
+        misses(int): count of cache misses
+        evictions(int): count of programs evicted due to size limit
+    """
+
+    def __init__(self, max_size=PROGRAM_CACHE_SIZE):
+        self.max_size = max_size
+        self._programs = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._programs)
+
+    def get(self, program_version):
+        """
+        Returns cached program, loads it on cache miss.
+
+        Args:
+            program_version(:class:`business_logic.models.ProgramVersion`): program version
+
+        Returns:
+            :class:`business_logic.models.CachedProgram`
+        """
+        with self._lock:
+            program = self._programs.get(program_version.id)
+            if program is not None and program.is_actual(program_version):
+                self._programs.move_to_end(program_version.id)
+                self.hits += 1
+                return program
+            self.misses += 1
+
+        program = CachedProgram(program_version)
+
+        if self.max_size <= 0:
+            return program
+
+        with self._lock:
+            self._programs[program_version.id] = program
+            self._programs.move_to_end(program_version.id)
+            while len(self._programs) > self.max_size:
+                self._programs.popitem(last=False)
+                self.evictions += 1
+
+        return program
+
+    def invalidate(self, program_version_id):
+        """
+        Removes program from cache.
+
+        Args:
+            program_version_id(int): id of :class:`business_logic.models.ProgramVersion`
+        """
+        with self._lock:
+            self._programs.pop(program_version_id, None)
+
+    def clear(self):
+        """
+        Removes all programs from cache and resets counters.
+        """
+        with self._lock:
+            self._programs.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: cache size and hit/miss/eviction counters
+        """
+        return dict(
+            size=len(self._programs),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+
+program_cache = ProgramCache()
+
+
+def invalidate_program_version(sender, instance, **kwargs):
+    program_cache.invalidate(instance.id)
+
+
+post_save.connect(invalidate_program_version, sender='business_logic.ProgramVersion')
+post_delete.connect(invalidate_program_version, sender='business_logic.ProgramVersion')
+
+__all__ = ('CachedProgram', 'ProgramCache', 'program_cache')
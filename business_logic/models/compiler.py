@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+#
+
+import inspect
+import sys
+
+from django.db.models import Model
+
+from .. import signals
+from ..config import ExceptionHandlingPolicy
+from ..exceptions import BreakLoopException, StopInterpretationException, InterpretationException
+from ..utils import camel_case_to_snake_case, pairs
+
+from .foreach import get_variable_setter, iterate
+from .frame import Frame
+from .function import function_table
+from .node import NodeCacheHolder
+from .operator_ import Operator
+
+CONTROL_FLOW_EXCEPTIONS = (InterpretationException, StopInterpretationException, BreakLoopException)
+
+# control flow exceptions stopped by detached nodes, breaking of loop is passed to the loop
+DETACHED_EXCEPTIONS = (InterpretationException, StopInterpretationException)
+
+
+def handle_exception(ctx, node, exception):
+    """
+    Mirrors exception handling of :func:`business_logic.models.Node.interpret`:
+    control flow exceptions are passed as is, other exceptions are reported
+    through the :data:`business_logic.signals.interpret_exception` signal
+    and wrapped with :class:`business_logic.exceptions.InterpretationException`.
+    """
+    if isinstance(exception, CONTROL_FLOW_EXCEPTIONS):
+        return exception
+
+    traceback = sys.exc_info()[2]
+    signals.interpret_exception.send(sender=ctx, node=node, exception=exception, traceback=traceback)
+    return InterpretationException(exception)
+
+
+def interpret_children(ctx, node, children, is_short_circuit=None):
+    """
+    Interprets compiled children according to ``ctx.config.exception_handling_policy``.
+    Interpretation is stopped if ``is_short_circuit`` returns ``True`` for interpreted value.
+
+    Returns:
+        :obj:`tuple` of list of interpreted values and exception (or None)
+    """
+    values = []
+    exception = None
+
+    for child in children:
+        try:
+            value = child(ctx)
+        except Exception as e:
+            exception = handle_exception(ctx, node, e)
+            exception_handling_policy = ctx.config.exception_handling_policy
+            if exception_handling_policy == ExceptionHandlingPolicy.INTERRUPT:
+                break
+            elif exception_handling_policy == ExceptionHandlingPolicy.IGNORE:
+                values.append(None)
+        else:
+            values.append(value)
+            if is_short_circuit is not None and is_short_circuit(value):
+                break
+
+    return values, exception
+
+
+def detached(interpret, exceptions=DETACHED_EXCEPTIONS):
+    """
+    Wraps compiled node for calling outside of parent node children interpretation
+    (program entry point, :class:`business_logic.models.IfStatement` branches etc).
+    Control flow exceptions except :class:`business_logic.exceptions.BreakLoopException`
+    are swallowed as :func:`business_logic.models.Node.interpret` does for non-recursive calls,
+    program entry point swallows all of them.
+    """
+    def _interpret(ctx):
+        try:
+            return interpret(ctx)
+        except exceptions:
+            return None
+
+    return _interpret
+
+
+class NodeCompiler(NodeCacheHolder):
+    """
+    Compiles tree of :class:`business_logic.models.Node` into tree of plain python closures.
+
+    Each closure accepts :class:`business_logic.models.Context` instance and returns interpreted value.
+    Compiled closures hold only values needed for interpretation, so repeated execution
+    doesn't touch ORM objects, content types and signals.
+    Exception handling, ``ExceptionHandlingPolicy`` and frames management are equivalent
+    to :func:`business_logic.models.Node.interpret`.
+
+    Content object classes are compiled by ``compile_<snake_case_class_name>`` methods
+    which are searched through class MRO as :class:`business_logic.blockly.build.BlocklyXmlBuilder` does.
+    Each method returns function which accepts context and interpreted children values.
+    Content objects without such method are interpreted by their own ``interpret()`` method.
+
+    If ``optimize`` is on compiled tree is simplified, the stored tree is not changed:
+
+        * constants and operators over constant operands are folded into constant values
+          (operators raising exception are left for runtime)
+        * :class:`business_logic.models.IfStatement` branches with constant condition are
+          pruned or become unconditional
+        * constant statements are dropped from blocks, empty blocks become constants
+
+    Folded nodes don't raise exceptions, so the optimization doesn't change execution results.
+
+    Args:
+        optimize(bool): enable constant folding and dead branch elimination
+
+    See Also:
+        * :func:`business_logic.models.ProgramVersion.execute`
+        * :class:`business_logic.config.ContextConfig`
+    """
+
+    def __init__(self, optimize=True):
+        self.optimize = optimize
+        self._constants = {}
+
+    def constant(self, value):
+        """
+        Returns:
+            function: compiled node returning value, recognized by
+                :func:`business_logic.models.NodeCompiler.is_constant`
+        """
+        def interpret(ctx, *args):
+            return value
+
+        self._constants[interpret] = value
+        return interpret
+
+    def is_constant(self, compiled):
+        return compiled in self._constants
+
+    def compile(self, node):
+        """
+        Compiles entire tree starting from node.
+
+        Args:
+            node(:class:`business_logic.models.Node`): entry point
+
+        Returns:
+            function: compiled entry point, accepts :class:`business_logic.models.Context`
+        """
+        # break outside of any loop stops the program
+        interpret = detached(self.compile_node(node), CONTROL_FLOW_EXCEPTIONS)
+
+        if node.is_block():
+            return interpret
+
+        def interpret_statement(ctx):
+            if ctx.frames:
+                return interpret(ctx)
+
+            ctx.frames.append(Frame())
+            return_value = interpret(ctx)
+            ctx.frames.pop()
+            return return_value
+
+        return interpret_statement
+
+    def compile_node(self, node):
+        """
+        Compiles single node and its descendants.
+
+        Args:
+            node(:class:`business_logic.models.Node`): node
+
+        Returns:
+            function: compiled node, raises control flow exceptions as recursive
+                call of :func:`business_logic.models.Node.interpret` does
+        """
+        if node.is_block():
+            return self.compile_block(node)
+
+        content_object = node.content_object
+        call = self.compile_content_object(node, content_object)
+
+        if getattr(content_object, 'interpret_children', False):
+            children = []
+        else:
+            children = [self.compile_node(child) for child in self.get_children(node)]
+
+        if self.optimize:
+            folded = self.fold(content_object, call, children)
+            if folded is not None:
+                return folded
+
+        return self.compile_statement(node, call, children, getattr(content_object, 'is_short_circuit', None))
+
+    def fold(self, content_object, call, children):
+        """
+        Returns:
+            function: constant compiled node if node could be evaluated at compile time, None otherwise
+        """
+        if self.is_constant(call) and not children:
+            return call
+
+        if not isinstance(content_object, Operator):
+            return None
+
+        is_short_circuit = getattr(content_object, 'is_short_circuit', None)
+        first = children[0] if children and self.is_constant(children[0]) else None
+        if is_short_circuit is not None and first is not None and is_short_circuit(self._constants[first]):
+            return first
+
+        if not all(self.is_constant(child) for child in children):
+            return None
+
+        try:
+            value = content_object.interpret(None, *[self._constants[child] for child in children])
+        except Exception:
+            # exception should be reported during execution
+            return None
+
+        return self.constant(value)
+
+    def compile_content_object(self, node, content_object):
+        for cls in inspect.getmro(content_object.__class__):
+            if cls == Model:
+                break
+
+            method = getattr(self, 'compile_{}'.format(camel_case_to_snake_case(cls.__name__)), None)
+
+            if method:
+                return method(node, content_object)
+
+        return content_object.interpret
+
+    def compile_block(self, node):
+        children = [self.compile_node(child) for child in self.get_children(node)]
+
+        if self.optimize:
+            # constant statements have no side effects
+            children = [child for child in children if not self.is_constant(child)]
+            if not children:
+                return self.constant(None)
+
+        def interpret(ctx):
+            frames = ctx.frames
+            frames.append(Frame())
+            values, exception = interpret_children(ctx, node, children)
+            frames.pop()
+
+            if exception is not None:
+                raise exception
+
+        return interpret
+
+    def compile_statement(self, node, call, children, is_short_circuit=None):
+        if not children:
+
+            def interpret(ctx):
+                try:
+                    return call(ctx)
+                except Exception as e:
+                    raise handle_exception(ctx, node, e)
+
+            return interpret
+
+        def interpret(ctx):
+            values, exception = interpret_children(ctx, node, children, is_short_circuit)
+
+            if exception is None:
+                # interpretation stopped by short circuit value
+                if len(values) < len(children):
+                    return values[-1]
+
+                try:
+                    return call(ctx, *values)
+                except Exception as e:
+                    exception = handle_exception(ctx, node, e)
+
+            raise exception
+
+        return interpret
+
+    def compile_constant(self, node, content_object):
+        return self.constant(content_object.value)
+
+    def compile_variable(self, node, content_object):
+        definition = content_object.definition
+
+        def call(ctx):
+            return ctx.get_variable(definition)
+
+        return call
+
+    def compile_assignment(self, node, content_object):
+        definition = self.get_children(node)[0].content_object.definition
+
+        def call(ctx, lhs, rhs):
+            ctx.set_variable(definition, rhs)
+            return rhs
+
+        return call
+
+    def compile_if_statement(self, node, content_object):
+        branches = []
+
+        for pair in pairs(self.get_children(node)):
+            branch = [self.compile_node(child) for child in pair]
+
+            if self.optimize and len(branch) == 2 and self.is_constant(branch[0]):
+                if not self._constants[branch[0]]:
+                    # never entered
+                    continue
+                # always entered, acts as last "else" branch
+                branch = branch[1:]
+
+            branches.append(branch)
+
+            # following branches are unreachable
+            if len(branch) == 1:
+                break
+
+        if self.optimize:
+            if not branches:
+                return self.constant(None)
+
+            if len(branches[0]) == 1:
+                statement = branches[0][0]
+                return statement if self.is_constant(statement) else detached(statement)
+
+        branches = [[detached(compiled) for compiled in branch] for branch in branches]
+
+        def call(ctx):
+            for branch in branches:
+                # last "else" branch
+                if len(branch) == 1:
+                    return branch[0](ctx)
+
+                if branch[0](ctx):
+                    return branch[1](ctx)
+
+        return call
+
+    def compile_foreach_statement(self, node, content_object):
+        children = self.get_children(node)
+        definition = children[0].content_object.definition
+        iterable = detached(self.compile_node(children[1]))
+        statement = detached(self.compile_node(children[2])) if len(children) > 2 else None
+
+        def call(ctx):
+            set_variable = get_variable_setter(ctx, definition)
+
+            for item in iterate(iterable(ctx)):
+                set_variable(item)
+
+                if statement is None:
+                    continue
+
+                try:
+                    statement(ctx)
+                except BreakLoopException:
+                    break
+
+        return call
+
+    def compile_reference_constant(self, node, content_object):
+        value_node = self.get_children(node)[0]
+
+        def call(ctx):
+            # referenced object isn't held by compiled program, every execution loads own instance
+            return ctx.get_referenced_object(value_node)
+
+        return call
+
+    def compile_function(self, node, content_object):
+        definition_id = content_object.definition_id
+        get_callable = function_table.get
+
+        def call(ctx, *args):
+            # table lookup on each call keeps compiled program actual after definition change
+            return get_callable(definition_id)(ctx, *args)
+
+        return call
+
+
+__all__ = ('NodeCompiler',)
@@ -1,16 +1,34 @@
 # -*- coding: utf-8 -*-
 #
 
+import itertools
+
+from collections import OrderedDict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+
 from .. import signals
 from ..config import ContextConfig
 from .frame import Frame
 from .log import Logger
 from .node import NodeCacheHolder
+from .profiler import Profiler
 from .variable import Variable, VariableDefinition
 
+log_sampling_counter = itertools.count()
+
 
 class Context(NodeCacheHolder):
     """
+    Connects own receivers to :ref:`Signals` sent during interpretation.
+    Receivers should be disconnected by :func:`business_logic.models.Context.close`
+    when context is not needed anymore, context can be used as context manager for this purpose::
+
+        with Context(log=True) as context:
+            program_version.execute(context=context, **kwargs)
+
     Attributes:
         config(:class:`business_logic.config.ContextConfig`):
     """
@@ -18,20 +36,67 @@ class Context(NodeCacheHolder):
     def __init__(self, **kwargs):
         self.config = ContextConfig(**kwargs)
         self._vars = {}
+        self._changed_fields = OrderedDict()
+        self._referenced_objects = {}
+        self._receivers = []
+        # signals with receivers connected for this context, checked in fast interpretation mode
+        self.listened_signals = set()
         self.frames = []
 
-        signals.block_interpret_enter.connect(self.block_interpret_enter, sender=self)
-        signals.block_interpret_leave.connect(self.block_interpret_leave, sender=self)
+        if not self.config.fast_interpret:
+            # frames are managed by Node.interpret() itself in fast interpretation mode
+            self.connect(signals.block_interpret_enter, self.block_interpret_enter)
+            self.connect(signals.block_interpret_leave, self.block_interpret_leave)
 
-        signals.interpret_enter.connect(self.interpret_enter, sender=self)
-        signals.interpret_leave.connect(self.interpret_leave, sender=self)
+            self.connect(signals.interpret_enter, self.interpret_enter)
+            self.connect(signals.interpret_leave, self.interpret_leave)
 
         self.execution = None
-        self.logger = Logger()
-        if self.config.log:
-            signals.interpret_enter.connect(self.logger.interpret_enter, sender=self)
-            signals.interpret_leave.connect(self.logger.interpret_leave, sender=self)
-            signals.interpret_exception.connect(self.logger.interpret_exception, sender=self)
+        self.logger = Logger(
+            asynchronous=self.config.log_async, mode=self.config.log_mode,
+            slowest_count=self.config.log_slowest_count)
+        if self.config.log and next(log_sampling_counter) % self.config.log_sampling == 0:
+            self.connect(signals.interpret_enter, self.logger.interpret_enter)
+            self.connect(signals.interpret_leave, self.logger.interpret_leave)
+            self.connect(signals.interpret_exception, self.logger.interpret_exception)
+
+        self.profiler = Profiler()
+        if self.config.profile:
+            self.connect(signals.interpret_enter, self.profiler.interpret_enter)
+            self.connect(signals.interpret_leave, self.profiler.interpret_leave)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def connect(self, signal, receiver):
+        """
+        Connects receiver to signal sent with this context as sender.
+        Receiver will be disconnected by :func:`business_logic.models.Context.close`.
+        In ``fast_interpret`` mode signals are sent only to receivers connected by this method
+        or connected without sender.
+
+        Args:
+            signal(:class:`django.dispatch.Signal`): one of :ref:`Signals`
+            receiver(function): receiver
+        """
+        signal.connect(receiver, sender=self)
+        self._receivers.append((signal, receiver))
+        self.listened_signals.add(signal)
+
+    def close(self):
+        """
+        Disconnects all receivers connected by context.
+        Variables stay available after closing.
+        """
+        signals.interpret_leave.disconnect(self.single_statement_interpret_leave, sender=self)
+
+        for signal, receiver in self._receivers:
+            signal.disconnect(receiver, sender=self)
+        self._receivers = []
+        self.listened_signals = set()
 
     def _frame(self):
         if not self.frames:
@@ -49,6 +114,7 @@ class Context(NodeCacheHolder):
     def single_statement_interpret_leave(self, **kwargs):
         node = kwargs['node']
         if node == self._single_statement_node:
+            signals.interpret_leave.disconnect(self.single_statement_interpret_leave, sender=self)
             self.frames.pop()
 
     def interpret_enter(self, **kwargs):
@@ -67,6 +133,26 @@ class Context(NodeCacheHolder):
 
         return super(Context, self).get_children(node)
 
+    def get_referenced_object(self, node):
+        """
+        Returns object referenced by child node of :class:`business_logic.models.ReferenceConstant`.
+        Object is loaded on first access and shared by all references during this context,
+        so changes of it are not visible to other executions.
+
+        Args:
+            node(:class:`business_logic.models.Node`): node holding content type and id of object
+
+        Returns:
+            referenced object or None if it does not exist
+        """
+        key = (node.content_type_id, node.object_id)
+
+        if key not in self._referenced_objects:
+            model = ContentType.objects.get_for_id(node.content_type_id).model_class()
+            self._referenced_objects[key] = model._default_manager.filter(pk=node.object_id).first()
+
+        return self._referenced_objects[key]
+
     def get_variable(self, variable_definition):
         """
         Get variable value in current context
@@ -124,7 +210,73 @@ class Context(NodeCacheHolder):
         for attr in attrs[1:-1]:
             current = getattr(current, attr)
 
-        setattr(current, attrs[-1], None if isinstance(value, Variable.Undefined) else value)
+        value = None if isinstance(value, Variable.Undefined) else value
+
+        if isinstance(current, models.Model):
+            self._set_model_field(current, attrs[-1], value)
+        else:
+            setattr(current, attrs[-1], value)
+
+    def _set_model_field(self, instance, name, value):
+        try:
+            field = instance._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+
+        if field is None or not field.concrete or field.primary_key or field.many_to_many:
+            setattr(instance, name, value)
+            return
+
+        previous_value = getattr(instance, field.attname)
+        setattr(instance, name, value)
+
+        if getattr(instance, field.attname) != previous_value:
+            self._changed_fields.setdefault(id(instance), (instance, set()))[1].add(field.name)
+
+    def get_changed_objects(self):
+        """
+        Returns model instances changed by assignments to argument fields
+        (e.g. ``book.publisher.name``) and names of changed fields.
+
+        Returns:
+            :obj:`list` of :obj:`tuple` (:class:`django.db.models.Model`, :obj:`set` of field names)
+        """
+        return list(self._changed_fields.values())
+
+    def clear_changed_objects(self):
+        """
+        Forgets changed model instances, e.g. after saving.
+        """
+        self._changed_fields.clear()
+
+    def save_changes(self):
+        """
+        Saves changed fields of model instances changed during execution.
+        """
+        for instance, field_names in self.get_changed_objects():
+            instance.save(update_fields=field_names)
+        self.clear_changed_objects()
+
+
+def bulk_save_changes(contexts, batch_size=None):
+    """
+    Saves model instances changed in given contexts using ``QuerySet.bulk_update()``,
+    one call per model and set of changed fields.
+
+    Args:
+        contexts(:obj:`list` of :class:`business_logic.models.Context`): executed contexts
+        batch_size(int, optional): ``batch_size`` argument of ``bulk_update()``
+    """
+    objects_by_fields = OrderedDict()
+
+    for context in contexts:
+        for instance, field_names in context.get_changed_objects():
+            key = (instance.__class__, frozenset(field_names))
+            objects_by_fields.setdefault(key, OrderedDict())[instance.pk] = instance
+        context.clear_changed_objects()
+
+    for (model, field_names), objects in objects_by_fields.items():
+        model._default_manager.bulk_update(list(objects.values()), sorted(field_names), batch_size=batch_size)
 
 
-__all__ = ('Context',)
+__all__ = ('Context', 'bulk_save_changes')
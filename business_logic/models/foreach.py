@@ -1,12 +1,82 @@
 # -*- coding: utf-8 -*-
 #
 
+from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from ..exceptions import BreakLoopException
 
-class ForeachStatement(models.Model):
+from .node import NodeAccessor
+
+try:
+    FOREACH_CHUNK_SIZE = settings.PROGRAM_FOREACH_CHUNK_SIZE
+except AttributeError:
+    FOREACH_CHUNK_SIZE = 2000
+
+
+def iterate(value):
+    """
+    Returns iterator over loop values. Querysets and related managers are iterated by
+    ``QuerySet.iterator()`` fetching ``PROGRAM_FOREACH_CHUNK_SIZE`` django setting rows at once
+    (default is 2000), so whole table is never loaded into memory.
+    """
+    if isinstance(value, models.Manager):
+        value = value.all()
+
+    if isinstance(value, models.QuerySet):
+        return value.iterator(chunk_size=FOREACH_CHUNK_SIZE)
+
+    return iter(value)
+
+
+class ForeachStatement(NodeAccessor):
+    """
+    Interprets statement for each item of list or queryset.
+
+    Node children are loop variable, iterated value and optional loop statement.
+    Loop is stopped by :class:`business_logic.models.BreakLoop` statement.
+    """
+    interpret_children = True
 
     class Meta:
         verbose_name = _('Foreach statement')
         verbose_name_plural = _('Foreach statements')
+
+    def interpret(self, ctx):
+        children = ctx.get_children(self.node)
+        variable_node, iterable_node = children[:2]
+        statement_node = children[2] if len(children) > 2 else None
+        set_variable = get_variable_setter(ctx, variable_node.content_object.definition)
+
+        for item in iterate(iterable_node.interpret(ctx)):
+            set_variable(item)
+
+            if statement_node is None:
+                continue
+
+            try:
+                statement_node.interpret(ctx)
+            except BreakLoopException:
+                break
+
+
+def get_variable_setter(ctx, variable_definition):
+    """
+    Returns:
+        function: sets variable value, plain variables are stored directly into context
+    """
+    name = variable_definition.name
+
+    if name.find('.') != -1:
+        return lambda value: ctx.set_variable(variable_definition, value)
+
+    variables = ctx._vars
+
+    def set_variable(value):
+        variables[name] = value
+
+    return set_variable
+
+
+__all__ = ('ForeachStatement', )
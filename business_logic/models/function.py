@@ -1,13 +1,51 @@
 # -*- coding: utf-8 -*-
 #
 
+import logging
+import threading
+import time
+
 from importlib import import_module
 
+from django.conf import settings
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 
 from polymorphic.models import PolymorphicModel
 
+from ..sandbox import SandboxPool, compile_function_code, run_function_code
+
+logger = logging.getLogger(__name__)
+
+try:
+    FUNCTION_TABLE_TTL = settings.PROGRAM_FUNCTION_TABLE_TTL
+except AttributeError:
+    FUNCTION_TABLE_TTL = 60
+
+try:
+    PYTHON_CODE_SANDBOX = settings.PROGRAM_PYTHON_CODE_SANDBOX
+except AttributeError:
+    PYTHON_CODE_SANDBOX = False
+
+try:
+    SANDBOX_WORKERS = settings.PROGRAM_SANDBOX_WORKERS
+except AttributeError:
+    SANDBOX_WORKERS = 2
+
+try:
+    SANDBOX_TIMEOUT = settings.PROGRAM_SANDBOX_TIMEOUT
+except AttributeError:
+    SANDBOX_TIMEOUT = 5
+
+try:
+    SANDBOX_MEMORY_LIMIT = settings.PROGRAM_SANDBOX_MEMORY_LIMIT
+except AttributeError:
+    SANDBOX_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# worker processes are started on first call
+sandbox_pool = SandboxPool(workers=SANDBOX_WORKERS, timeout=SANDBOX_TIMEOUT, memory_limit=SANDBOX_MEMORY_LIMIT)
+
 
 class FunctionDefinition(PolymorphicModel):
     title = models.CharField(_('Title'), max_length=255, unique=True)
@@ -21,6 +59,23 @@ class FunctionDefinition(PolymorphicModel):
     def call(self, context, *args):
         raise NotImplementedError()
 
+    def call_many(self, context, calls):
+        """
+        Calls function for each of arguments tuples.
+
+        Returns:
+            list: return values of function
+        """
+        call = self.get_callable()
+        return [call(context, *args) for args in calls]
+
+    def get_callable(self):
+        """
+        Returns:
+            function: accepts context and function arguments, is cached by :class:`business_logic.models.FunctionTable`
+        """
+        return self.call
+
 
 class FunctionArgument(models.Model):
     function = models.ForeignKey(FunctionDefinition, related_name='arguments', on_delete=models.CASCADE)
@@ -70,18 +125,33 @@ class PythonModuleFunctionDefinition(FunctionDefinition):
         pass
 
     def call(self, context, *args):
+        return self.get_callable()(context, *args)
+
+    def get_callable(self):
         if not self.module or self.module == '__builtins__':
             code = __builtins__[self.function]
         else:
             module = import_module(self.module)
             code = getattr(module, self.function)
+
         if self.is_context_required:
-            return code(context, *args)
-        return code(*args)
+            return code
+
+        def call(context, *args):
+            return code(*args)
+
+        return call
 
 
 class PythonCodeFunctionDefinition(FunctionDefinition):
     """
+    Function defined by python code.
+
+    If ``PROGRAM_PYTHON_CODE_SANDBOX`` django setting is ``True`` functions which don't require context
+    are called in worker processes of :class:`business_logic.sandbox.SandboxPool` with
+    ``PROGRAM_SANDBOX_WORKERS`` (default is 2) workers, ``PROGRAM_SANDBOX_TIMEOUT`` (default is 5 seconds)
+    call timeout and ``PROGRAM_SANDBOX_MEMORY_LIMIT`` (default is 256Mb) memory limit of worker process.
+
     Todo:
         * re-raise exception
         * rewrite block with eval() to more safe
@@ -96,20 +166,50 @@ class PythonCodeFunctionDefinition(FunctionDefinition):
         pass
 
     def call(self, context, *args):
-        kwargs = dict(zip((x.name for x in self.arguments.all()), args))
+        return self.get_callable()(context, *args)
 
-        if self.is_context_required:
-            kwargs['context'] = context
+    def call_many(self, context, calls):
+        """
+        Calls function for each of arguments tuples, sandboxed function receives all of them
+        by single message to worker process.
+
+        Returns:
+            list: return values of function
+        """
+        if PYTHON_CODE_SANDBOX and not self.is_context_required:
+            argument_names = [argument.name for argument in self.arguments.all()]
+            return sandbox_pool.call_many(self.code, argument_names, calls)
+
+        return super(PythonCodeFunctionDefinition, self).call_many(context, calls)
+
+    def get_callable(self):
+        # code and argument names are prepared once, function table invalidates callable
+        # on definition and arguments change
+        argument_names = [argument.name for argument in self.arguments.all()]
+        is_context_required = self.is_context_required
+        code = compile_function_code(self.code)
+
+        # context can't be passed to another process
+        if PYTHON_CODE_SANDBOX and not is_context_required:
+            source = self.code
+
+            def call(context, *args):
+                return sandbox_pool.call(source, argument_names, args)
+
+            return call
 
-        function_locals = dict(kwargs=kwargs, ret=None)
-        code = compile('''{}
-ret = function(**kwargs)
-'''.format(self.code), '<string>', 'exec')
-        try:
-            eval(code, {}, function_locals)
-        except Exception as e:
-            print(e)
-        return function_locals['ret']
+        def call(context, *args):
+            kwargs = dict(zip(argument_names, args))
+
+            if is_context_required:
+                kwargs['context'] = context
+
+            try:
+                return run_function_code(code, kwargs)
+            except Exception as e:
+                logger.error('Function call failed: %s: %s', e.__class__.__name__, e)
+
+        return call
 
 
 class FunctionLibrary(models.Model):
@@ -124,6 +224,72 @@ class FunctionLibrary(models.Model):
         return self.title
 
 
+class FunctionTable(object):
+    """
+    Process-wide table of callables of :class:`business_logic.models.FunctionDefinition` keyed by definition id.
+    Definition is loaded and resolved to callable on first call only, so further calls don't touch database
+    and don't import modules. Callables are invalidated on saving and deletion of definition
+    and its :class:`business_logic.models.FunctionArgument` records in current process.
+    Changes made by other processes are picked up when callable expires after ``PROGRAM_FUNCTION_TABLE_TTL``
+    django setting seconds (default is 60).
+    """
+
+    def __init__(self, ttl=FUNCTION_TABLE_TTL):
+        self.ttl = ttl
+        # (callable, expiration time) by definition id
+        self._callables = {}
+        self._lock = threading.Lock()
+
+    def get(self, definition_id):
+        """
+        Args:
+            definition_id(int): id of :class:`business_logic.models.FunctionDefinition`
+
+        Returns:
+            function: accepts context and function arguments
+        """
+        entry = self._callables.get(definition_id)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+
+        function = FunctionDefinition.objects.get(id=definition_id).get_callable()
+
+        with self._lock:
+            self._callables[definition_id] = (function, time.monotonic() + self.ttl)
+
+        return function
+
+    def invalidate(self, definition_id):
+        with self._lock:
+            self._callables.pop(definition_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._callables.clear()
+
+
+function_table = FunctionTable()
+
+
+def invalidate_function_definition(sender, instance, **kwargs):
+    if isinstance(instance, FunctionDefinition):
+        function_table.invalidate(instance.id)
+    elif isinstance(instance, FunctionArgument):
+        function_table.invalidate(instance.function_id)
+
+
+# post_save is sent with concrete class of polymorphic definition as sender
+post_save.connect(invalidate_function_definition, sender=FunctionDefinition)
+post_save.connect(invalidate_function_definition, sender=PythonModuleFunctionDefinition)
+post_save.connect(invalidate_function_definition, sender=PythonCodeFunctionDefinition)
+post_save.connect(invalidate_function_definition, sender=FunctionArgument)
+
+# post_delete receiver without sender disables fast deletion of all models,
+# parent FunctionDefinition is collected on deletion of polymorphic subclass
+post_delete.connect(invalidate_function_definition, sender=FunctionDefinition)
+post_delete.connect(invalidate_function_definition, sender=FunctionArgument)
+
+
 class Function(models.Model):
     definition = models.ForeignKey('FunctionDefinition', related_name='functions', on_delete=models.CASCADE)
 
@@ -132,4 +298,10 @@ class Function(models.Model):
         verbose_name_plural = _('Functions')
 
     def interpret(self, context, *args):
-        return self.definition.call(context, *args)
+        if self.definition_id is None:
+            return self.definition.call(context, *args)
+        return function_table.get(self.definition_id)(context, *args)
+
+
+__all__ = ('FunctionDefinition', 'FunctionArgument', 'FunctionArgumentChoice', 'PythonModuleFunctionDefinition',
+           'PythonCodeFunctionDefinition', 'FunctionLibrary', 'FunctionTable', 'function_table', 'Function')
@@ -1,8 +1,18 @@
 # -*- coding: utf-8 -*-
 #
+import atexit
+import heapq
+import itertools
+import logging
+import queue
+import reprlib
+import threading
+import time
+
+from collections import namedtuple
 from traceback import format_exception
 
-from django.db import models
+from django.db import close_old_connections, connections, models, router, transaction
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -11,60 +21,395 @@ from django.utils.translation import gettext_lazy as _
 
 from treebeard.al_tree import AL_Node
 
+from ..config import LogMode, LogOverflowPolicy
 from .node import Node
 
+logger = logging.getLogger(__name__)
+
 try:
     LOG_ENTRY_VALUE_LENGTH = settings.PROGRAM_LOG_ENTRY_VALUE_LENGTH
 except AttributeError:
     LOG_ENTRY_VALUE_LENGTH = 255
 
+try:
+    LOG_WRITER_QUEUE_SIZE = settings.PROGRAM_LOG_WRITER_QUEUE_SIZE
+except AttributeError:
+    LOG_WRITER_QUEUE_SIZE = 1000
+
+try:
+    LOG_WRITER_BATCH_SIZE = settings.PROGRAM_LOG_WRITER_BATCH_SIZE
+except AttributeError:
+    LOG_WRITER_BATCH_SIZE = 100
+
+try:
+    LOG_WRITER_OVERFLOW_POLICY = settings.PROGRAM_LOG_WRITER_OVERFLOW_POLICY
+except AttributeError:
+    LOG_WRITER_OVERFLOW_POLICY = LogOverflowPolicy.BLOCK
+
+value_repr = reprlib.Repr()
+value_repr.maxstring = value_repr.maxother = LOG_ENTRY_VALUE_LENGTH
+
+CollectedLog = namedtuple('CollectedLog', ('levels', 'exception_logs', 'execution'))
+
+
+def write_logs(collected_logs):
+    """
+    Saves logs collected by :class:`business_logic.models.Logger`.
+    Root entries are added by ``LogEntry.add_root()``, other entries of all logs are inserted
+    by one ``bulk_create()`` query per tree level with precomputed ``sib_order``.
+    Executions are linked to their logs.
+
+    Args:
+        collected_logs(list): logs collected by :class:`business_logic.models.Logger`
+    """
+    can_bulk_create = connections[router.db_for_write(LogEntry)].features.can_return_rows_from_bulk_insert
+    levels = []
+
+    for collected_log in collected_logs:
+        root, = collected_log.levels[0]
+        LogEntry.add_root(instance=root)
+
+        for depth, level in enumerate(collected_log.levels[1:]):
+            if len(levels) == depth:
+                levels.append([])
+            levels[depth].extend(level)
+
+    for level in levels:
+        if can_bulk_create:
+            LogEntry.objects.bulk_create(level)
+        else:
+            for log_entry in level:
+                log_entry.save()
+
+    ExceptionLog.objects.bulk_create(
+        [exception_log for collected_log in collected_logs for exception_log in collected_log.exception_logs])
+
+    for collected_log in collected_logs:
+        if collected_log.execution is not None:
+            Execution.objects.filter(id=collected_log.execution.id).update(log=collected_log.levels[0][0])
+
+
+class LogWriter(object):
+    """
+    Saves logs in background thread, so logging doesn't slow down execution.
+    Logs are taken from bounded queue and saved by :func:`business_logic.models.write_logs`
+    in batches, each batch is saved in single transaction.
+
+    Size of queue, size of batch and queue overflow policy can be set by
+    ``PROGRAM_LOG_WRITER_QUEUE_SIZE`` (default is 1000), ``PROGRAM_LOG_WRITER_BATCH_SIZE`` (default is 100)
+    and ``PROGRAM_LOG_WRITER_OVERFLOW_POLICY`` (default is ``LogOverflowPolicy.BLOCK``) django settings.
+
+    Attributes:
+        written(int): count of saved logs
+        dropped(int): count of logs dropped due to queue overflow
+        errors(int): count of failed batches
+    """
+
+    def __init__(self, queue_size=LOG_WRITER_QUEUE_SIZE, batch_size=LOG_WRITER_BATCH_SIZE,
+                 overflow_policy=LOG_WRITER_OVERFLOW_POLICY):
+        self.batch_size = batch_size
+        self.overflow_policy = overflow_policy
+        self.written = self.dropped = self.errors = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, collected_log):
+        """
+        Adds log to queue, starts writer thread if needed.
+        If queue is full, waits for free slot or drops log according to overflow policy.
+        """
+        self.start()
+
+        if self.overflow_policy == LogOverflowPolicy.DROP:
+            try:
+                self._queue.put_nowait(collected_log)
+            except queue.Full:
+                self.dropped += 1
+        else:
+            self._queue.put(collected_log)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='business_logic.LogWriter', daemon=True)
+                self._thread.start()
+
+    def join(self):
+        """
+        Waits until all queued logs are saved.
+        """
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                close_old_connections()
+                with transaction.atomic(using=router.db_for_write(LogEntry)):
+                    write_logs(batch)
+                self.written += len(batch)
+            except Exception:
+                self.errors += 1
+                logger.exception('Saving of %s logs failed', len(batch))
+            finally:
+                for log in batch:
+                    self._queue.task_done()
+
+
+log_writer = LogWriter()
+atexit.register(log_writer.join)
+
+
+class LogRecord(object):
+    """
+    Interpretation of single node collected by :class:`business_logic.models.Logger` in memory.
+    Values are rendered on leaving the node only if record could be saved (``selected``),
+    exception traceback is formatted only if record is saved.
+    """
+    __slots__ = ('node', 'children', 'previous_value', 'current_value', 'start_time', 'start_overhead', 'time',
+                 'exception', 'selected')
+
+    def __init__(self, node):
+        self.node = node
+        self.children = []
+        self.previous_value = self.current_value = self.exception = None
+        self.selected = False
+        self.start_time = self.start_overhead = 0
+        self.time = 0
+
+    def get_self_time(self):
+        return self.time - sum(child.time for child in self.children)
+
 
 class Logger(object):
     """
     Processed log creation during calling the :func:`business_logic.models.ProgramVersion.execute` method.
     Will work only if ``Context.config.log`` flag is set to ``True``.
 
+    Interpretation events are collected in memory and saved by :func:`business_logic.models.Logger.flush`
+    when interpretation of root node is finished.
+    Depending on ``mode`` all nodes, nodes raised exceptions or ``slowest_count`` nodes with the largest
+    own interpretation time are saved together with their ancestors.
+    Values are rendered by :func:`business_logic.models.Logger.prepare_value` on leaving the node,
+    so later changes of mutable values do not affect the log. Only nodes which could be saved are rendered:
+    all nodes for ``LogMode.ALL``, nodes raised exceptions and their ancestors for ``LogMode.EXCEPTIONS``,
+    nodes being among the slowest ones at the moment of leaving and their ancestors for ``LogMode.SLOWEST``.
+    Creation of log entries and formatting of exception tracebacks are deferred until saving.
+    Interpretation time of nodes doesn't include time spent by logger.
+
+    Args:
+        asynchronous(bool): save log by background :class:`business_logic.models.LogWriter`
+        mode(:class:`business_logic.config.LogMode`): which nodes are saved
+        slowest_count(int): count of saved nodes for ``LogMode.SLOWEST`` mode
+
+    Attributes:
+        log(:class:`business_logic.models.LogEntry`): root log entry
+        execution(:class:`business_logic.models.Execution`): execution linked to log after saving
+
     See Also:
         * :class:`business_logic.config.ContextConfig`
         * :class:`business_logic.models.Context`
         * :ref:`Signals`
     """
-    def __init__(self):
+    def __init__(self, asynchronous=False, mode=LogMode.ALL, slowest_count=10):
         self.log = None
+        self.execution = None
+        self.asynchronous = asynchronous
+        self.mode = mode
+        self.slowest_count = slowest_count
+        self._root = None
         self._stack = []
+        # min-heap of (self time, order, record) for LogMode.SLOWEST
+        self._slowest = []
+        self._order = itertools.count()
+        # total time spent by logger, excluded from interpretation time of nodes
+        self._overhead = 0
         self.exceptions = {}
 
     def interpret_enter(self, node, **kwargs):
-        if not self.log:
+        enter_time = time.perf_counter()
+        record = LogRecord(node)
+
+        if self._root is None:
             # first record
-            log_entry = LogEntry.add_root(node=node)
-            self.log = log_entry
+            self._root = record
         else:
-            log_entry = parent = self._stack[-1].add_child(node=node)
-        if not node.is_block():
-            log_entry.previous_value = self.prepare_value(node.content_object)
-        self._stack.append(log_entry)
-        log_entry.save()
+            self._stack[-1].children.append(record)
+
+        self._stack.append(record)
+
+        record.start_time = time.perf_counter()
+        self._overhead += record.start_time - enter_time
+        record.start_overhead = self._overhead
 
     def interpret_leave(self, node, value, **kwargs):
-        log_entry = self._stack.pop()
-        log_entry.current_value = self.prepare_value(value)
-        log_entry.save()
+        leave_time = time.perf_counter()
+        record = self._stack.pop()
+        record.time = leave_time - record.start_time - (self._overhead - record.start_overhead)
+        record.exception = self.exceptions.pop(node, None)
+
+        if self.select(record) or not self._stack:
+            record.selected = True
+            if self._stack:
+                # ancestors are saved together with record
+                self._stack[-1].selected = True
+
+            if not node.is_block():
+                record.previous_value = self.prepare_value(str(node.content_object))
+            record.current_value = self.prepare_value(value)
+
+        if not self._stack:
+            self.flush()
+
+        self._overhead += time.perf_counter() - leave_time
+
+    def select(self, record):
+        """
+        Called on leaving the node, record which is not selected at this moment is never saved.
+
+        Returns:
+            bool: True if record could be saved according to ``mode``
+        """
+        if self.mode == LogMode.ALL:
+            return True
+
+        if self.mode == LogMode.EXCEPTIONS:
+            return record.selected or record.exception is not None
+
+        if self.mode == LogMode.SLOWEST:
+            # self time of record is known on leaving, since children are left already
+            entry = (record.get_self_time(), next(self._order), record)
+            if len(self._slowest) < self.slowest_count:
+                heapq.heappush(self._slowest, entry)
+                return True
+            if self._slowest and entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+                return True
+            return record.selected
+
+        raise ValueError('Unknown log mode {}'.format(self.mode))
+
+    def flush(self):
+        """
+        Saves collected log by :func:`business_logic.models.write_logs`
+        or passes it to :data:`business_logic.models.log_writer` if ``Context.config.log_async`` flag is set.
+        Called automatically when interpretation of root node is finished.
+        """
+        if self._root is None:
+            return
 
-        exception, traceback = self.exceptions.pop(node, (None, None))
-        if exception:
-            ExceptionLog.objects.create(
+        root = self._root
+        self._root = None
+        saved = self.select_records(root)
+        self._slowest = []
+
+        exception_logs = []
+        self.log = self.create_log_entry(root, exception_logs)
+        levels = [[self.log]]
+        current_level = [(root, self.log)]
+
+        while current_level:
+            next_level = []
+
+            for record, log_entry in current_level:
+                sib_order = 0
+                for child in record.children:
+                    if saved is not None and id(child) not in saved:
+                        continue
+                    sib_order += 1
+                    next_level.append((child, self.create_log_entry(child, exception_logs, log_entry, sib_order)))
+
+            if next_level:
+                levels.append([log_entry for record, log_entry in next_level])
+            current_level = next_level
+
+        collected_log = CollectedLog(levels, exception_logs, self.execution)
+
+        if self.asynchronous:
+            log_writer.put(collected_log)
+        else:
+            write_logs([collected_log])
+
+    def select_records(self, root):
+        """
+        Returns:
+            :obj:`set`: ids of records which should be saved according to ``mode``, None if all records are saved
+        """
+        if self.mode == LogMode.ALL:
+            return None
+
+        records = []
+        parents = {}
+        stack = [root]
+        while stack:
+            record = stack.pop()
+            records.append(record)
+            for child in record.children:
+                parents[id(child)] = record
+                stack.append(child)
+
+        if self.mode == LogMode.EXCEPTIONS:
+            selected = [record for record in records if record.exception is not None]
+        elif self.mode == LogMode.SLOWEST:
+            selected = [record for self_time, order, record in self._slowest]
+        else:
+            raise ValueError('Unknown log mode {}'.format(self.mode))
+
+        saved = {id(root)}
+        for record in selected:
+            while id(record) not in saved:
+                saved.add(id(record))
+                record = parents[id(record)]
+
+        return saved
+
+    def create_log_entry(self, record, exception_logs, parent=None, sib_order=None):
+        log_entry = LogEntry(node=record.node, parent=parent, sib_order=sib_order)
+
+        if record.previous_value is not None:
+            log_entry.previous_value = record.previous_value
+        log_entry.current_value = record.current_value
+
+        if record.exception is not None:
+            exception, traceback = record.exception
+            exception_logs.append(ExceptionLog(
                 log_entry=log_entry,
                 type=exception.__class__.__name__,
                 module=exception.__class__.__module__,
                 message=str(exception),
-                traceback=format_exception(exception.__class__, exception, traceback))
+                traceback=format_exception(exception.__class__, exception, traceback)))
+
+        return log_entry
 
     def interpret_exception(self, node, exception, traceback, **kwargs):
         self.exceptions[node] = (exception, traceback)
 
     def prepare_value(self, value):
-        value = str(value)
+        """
+        Renders value capped by ``PROGRAM_LOG_ENTRY_VALUE_LENGTH`` django setting (default is 255).
+        Long strings and collections are truncated before rendering,
+        querysets which are not fetched yet are not evaluated,
+        model instances are rendered by model label and primary key without calling ``__str__()``.
+        """
+        if isinstance(value, str):
+            pass
+        elif isinstance(value, (list, tuple, set, frozenset, dict)):
+            value = value_repr.repr(value)
+        elif isinstance(value, models.QuerySet) and value._result_cache is None:
+            value = '<{} of {}>'.format(value.__class__.__name__, value.model._meta.label)
+        elif isinstance(value, models.Model):
+            value = '<{} pk={}>'.format(value._meta.label, value.pk)
+        else:
+            value = str(value)
+
         if len(value) > LOG_ENTRY_VALUE_LENGTH:
             value = value[:LOG_ENTRY_VALUE_LENGTH - 3] + '...'
         return value
@@ -152,3 +497,7 @@ class ExecutionArgument(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
+
+
+__all__ = ('Logger', 'LogEntry', 'ExceptionLog', 'Execution', 'ExecutionArgument', 'LogWriter', 'log_writer',
+           'write_logs')
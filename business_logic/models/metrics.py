@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+#
+
+import atexit
+import bisect
+import logging
+import threading
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .. import signals
+
+logger = logging.getLogger(__name__)
+
+try:
+    METRICS_FLUSH_INTERVAL = settings.PROGRAM_METRICS_FLUSH_INTERVAL
+except AttributeError:
+    METRICS_FLUSH_INTERVAL = 60
+
+# upper bounds of latency histogram buckets in seconds: from 10 microseconds to ~100 seconds with 2 ** 0.25 step,
+# the last bucket holds longer executions
+LATENCY_BUCKETS = tuple(0.00001 * 2 ** (i / 4) for i in range(94))
+
+
+class LatencyHistogram(object):
+    """
+    Histogram of execution times with logarithmic buckets (relative error of percentiles is about 19%).
+
+    Attributes:
+        counts(dict): count of values by bucket index
+    """
+
+    def __init__(self, counts=None):
+        self.counts = Counter({int(index): count for index, count in (counts or {}).items()})
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+
+    def merge(self, histogram):
+        self.counts.update(histogram.counts)
+
+    def get_percentile(self, percent):
+        """
+        Returns:
+            float: upper bound of bucket holding given percentile, None if histogram is empty
+        """
+        total = sum(self.counts.values())
+        if not total:
+            return None
+
+        threshold = total * percent / 100.0
+        cumulative = 0
+        for index in sorted(self.counts):
+            cumulative += self.counts[index]
+            if cumulative >= threshold:
+                break
+
+        return LATENCY_BUCKETS[min(index, len(LATENCY_BUCKETS) - 1)]
+
+
+class ProgramVersionMetrics(object):
+    """
+    Counters of executions of single :class:`business_logic.models.ProgramVersion`.
+
+    Attributes:
+        executions(int): count of executions
+        errors(:obj:`collections.Counter`): count of exceptions by exception class name
+        histogram(:class:`business_logic.models.LatencyHistogram`): execution times
+        start_time(:obj:`datetime`): time of the first counted execution
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.errors = Counter()
+        self.histogram = LatencyHistogram()
+        self.start_time = timezone.now()
+
+    def add(self, execution_time, errors):
+        self.executions += 1
+        self.errors.update(errors)
+        self.histogram.add(execution_time)
+
+    def merge(self, stats):
+        """
+        Adds counters saved in :class:`business_logic.models.ProgramVersionStats` record.
+        """
+        self.executions += stats.executions
+        self.errors.update(stats.errors)
+        self.histogram.merge(LatencyHistogram(stats.histogram))
+
+    def get_summary(self):
+        """
+        Returns:
+            dict: ``executions``, ``errors`` by exception class name and ``p50``, ``p95``, ``p99``
+            execution time percentiles in seconds
+        """
+        return dict(
+            executions=self.executions,
+            errors=dict(self.errors),
+            p50=self.histogram.get_percentile(50),
+            p95=self.histogram.get_percentile(95),
+            p99=self.histogram.get_percentile(99),
+        )
+
+
+class MetricsCollector(object):
+    """
+    Process-wide collector of :class:`business_logic.models.ProgramVersionMetrics`.
+
+    Counters are collected in memory and saved as :class:`business_logic.models.ProgramVersionStats`
+    records not often than once per ``PROGRAM_METRICS_FLUSH_INTERVAL`` django setting seconds (default is 60).
+    Counters of :data:`business_logic.models.metrics_collector` are flushed at interpreter exit,
+    processes terminated without exit handlers should call :func:`business_logic.models.MetricsCollector.flush`.
+    Collecting can be disabled by the ``metrics`` option of :class:`business_logic.config.ContextConfig`.
+    """
+
+    def __init__(self, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._flush_time = time.monotonic()
+        # errors of measured executions by context
+        self._errors = {}
+        signals.interpret_exception.connect(self.interpret_exception)
+
+    def interpret_exception(self, sender, exception, **kwargs):
+        errors = self._errors.get(sender)
+        if errors is not None:
+            errors.append(exception.__class__.__name__)
+
+    @contextmanager
+    def measure(self, program_version_id, context):
+        """
+        Counts execution of program version made inside ``with`` block,
+        collects exceptions reported by :data:`business_logic.signals.interpret_exception`
+        and exception raised from the block.
+        """
+        errors = self._errors[context] = []
+        start_time = time.perf_counter()
+
+        try:
+            yield
+        except Exception as e:
+            errors.append(e.__class__.__name__)
+            raise
+        finally:
+            execution_time = time.perf_counter() - start_time
+            del self._errors[context]
+            self.add(program_version_id, execution_time, errors)
+
+    def add(self, program_version_id, execution_time, errors=()):
+        with self._lock:
+            metrics = self._metrics.get(program_version_id)
+            if metrics is None:
+                metrics = self._metrics[program_version_id] = ProgramVersionMetrics()
+            metrics.add(execution_time, errors)
+            need_flush = time.monotonic() - self._flush_time >= self.flush_interval
+
+        if need_flush:
+            self.flush()
+
+    def get_metrics(self, program_version_id):
+        """
+        Returns:
+            :class:`business_logic.models.ProgramVersionMetrics`: not saved counters of program version or None
+        """
+        return self._metrics.get(program_version_id)
+
+    def clear(self):
+        """
+        Drops collected counters without saving.
+        """
+        with self._lock:
+            self._metrics = {}
+            self._flush_time = time.monotonic()
+
+    def flush(self):
+        """
+        Saves collected counters as :class:`business_logic.models.ProgramVersionStats` records and resets them.
+        """
+        with self._lock:
+            collected, self._metrics = self._metrics, {}
+            self._flush_time = time.monotonic()
+
+        if not collected:
+            return
+
+        finish_time = timezone.now()
+
+        try:
+            with transaction.atomic():
+                # program versions could be deleted since execution
+                existing = set(apps.get_model('business_logic', 'ProgramVersion').objects.filter(
+                    id__in=collected.keys()).values_list('id', flat=True))
+                ProgramVersionStats.objects.bulk_create([
+                    ProgramVersionStats(
+                        program_version_id=program_version_id,
+                        start_time=metrics.start_time,
+                        finish_time=finish_time,
+                        executions=metrics.executions,
+                        errors=dict(metrics.errors),
+                        histogram={str(index): count for index, count in metrics.histogram.counts.items()})
+                    for program_version_id, metrics in collected.items() if program_version_id in existing
+                ])
+        except Exception:
+            logger.exception('Saving of program version metrics failed')
+
+
+metrics_collector = MetricsCollector()
+atexit.register(metrics_collector.flush)
+
+
+class ProgramVersionStats(models.Model):
+    """
+    Stores counters of executions of :class:`business_logic.models.ProgramVersion`
+    collected by :class:`business_logic.models.MetricsCollector` during period of time.
+
+    Attributes:
+        program_version(:class:`business_logic.models.ProgramVersion`): executed program version
+        start_time(:obj:`datetime`): start of period
+        finish_time(:obj:`datetime`): finish of period
+        executions(int): count of executions
+        errors(dict): count of exceptions by exception class name
+        histogram(dict): count of executions by latency histogram bucket
+    """
+    program_version = models.ForeignKey(
+        'business_logic.ProgramVersion', related_name='stats', on_delete=models.CASCADE)
+    start_time = models.DateTimeField(_('Start time'))
+    finish_time = models.DateTimeField(_('Finish time'), db_index=True)
+    executions = models.PositiveIntegerField(_('Executions'))
+    errors = models.JSONField(_('Errors'), default=dict)
+    histogram = models.JSONField(_('Histogram'), default=dict)
+
+    class Meta:
+        ordering = ('id',)
+
+
+def get_program_version_metrics(program_version, since=None):
+    """
+    Aggregates saved and not saved yet counters of program version.
+
+    Args:
+        program_version(:class:`business_logic.models.ProgramVersion`): program version
+        since(:obj:`datetime`, optional): ignore counters saved before this time
+
+    Returns:
+        :class:`business_logic.models.ProgramVersionMetrics`
+    """
+    metrics = ProgramVersionMetrics()
+    stats = program_version.stats.all()
+
+    if since is not None:
+        stats = stats.filter(finish_time__gte=since)
+
+    for record in stats:
+        metrics.merge(record)
+
+    with metrics_collector._lock:
+        collected = metrics_collector.get_metrics(program_version.id)
+        if collected is not None:
+            metrics.executions += collected.executions
+            metrics.errors.update(collected.errors)
+            metrics.histogram.merge(collected.histogram)
+
+    return metrics
+
+
+__all__ = ('LatencyHistogram', 'ProgramVersionMetrics', 'MetricsCollector', 'metrics_collector',
+           'ProgramVersionStats', 'get_program_version_metrics')
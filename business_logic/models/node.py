@@ -2,7 +2,7 @@
 
 import sys
 
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
 from django.contrib.contenttypes.models import ContentType
@@ -12,7 +12,8 @@ from treebeard.ns_tree import NS_Node
 
 from .. import signals
 from ..config import ExceptionHandlingPolicy
-from ..exceptions import StopInterpretationException, InterpretationException
+from ..exceptions import BreakLoopException, StopInterpretationException, InterpretationException
+from .frame import Frame
 
 
 class Node(NS_Node):
@@ -80,15 +81,57 @@ class Node(NS_Node):
     def delete(self):
         """
         Removes a node and all it’s descendants, and content_objects if needed.
+        Content objects of subtree are deleted by one query per content type,
+        nodes are deleted by single range query.
         """
-        if (self.object_id and self.content_object and
-                self.content_type.app_label == ContentType.objects.get_for_model(self.__class__).app_label):
-            self.content_object.delete()
+        relations = [
+            field for field in Node._meta.get_fields(include_hidden=True)
+            if field.auto_created and not field.concrete and (field.one_to_one or field.one_to_many)
+        ]
 
-        for child in self.get_children():
-            child.delete()
+        if any(relation.on_delete is not models.CASCADE for relation in relations):
+            # nodes are referenced by models requiring Collector logic
+            self.delete_content_objects(self.get_tree(self).values_list('content_type_id', 'object_id'))
+            return super(Node, self).delete()
 
-        return super(Node, self).delete()
+        with transaction.atomic(using=self._state.db):
+            # nested set values of instance can be outdated
+            tree_id, lft, rgt = Node.objects.filter(pk=self.pk).values_list('tree_id', 'lft', 'rgt').get()
+            subtree = Node.objects.filter(tree_id=tree_id, lft__range=(lft, rgt))
+
+            self.delete_content_objects(subtree.values_list('content_type_id', 'object_id'))
+
+            for relation in relations:
+                relation.related_model._base_manager.filter(**{
+                    '{}__in'.format(relation.field.name): subtree.values('id')
+                }).delete()
+
+            deleted = subtree._raw_delete(subtree.db)
+
+            sql, params = Node._get_close_gap_sql(lft, rgt, tree_id)
+            Node._get_database_cursor('write').execute(sql, params)
+
+        return deleted, {Node._meta.label: deleted}
+
+    @staticmethod
+    def delete_content_objects(content_objects):
+        """
+        Deletes content objects of this application grouped by content type.
+        Content objects of other applications (referenced by ``ReferenceConstant``) are kept.
+
+        Args:
+            content_objects(:obj:`iterable` of :obj:`tuple`): pairs of content type id and object id
+        """
+        object_ids_by_content_type_id = {}
+
+        for content_type_id, object_id in content_objects:
+            if content_type_id is not None and object_id:
+                object_ids_by_content_type_id.setdefault(content_type_id, []).append(object_id)
+
+        for content_type_id, object_ids in object_ids_by_content_type_id.items():
+            content_type = ContentType.objects.get_for_id(content_type_id)
+            if content_type.app_label == Node._meta.app_label:
+                content_type.model_class().objects.filter(id__in=object_ids).delete()
 
     def clone(self):
         """
@@ -135,6 +178,14 @@ class Node(NS_Node):
         """
         Interprets the held code.
 
+        If ``fast_interpret`` option of context is on frames are managed directly
+        and signals are sent only if they have receivers connected by :func:`business_logic.models.Context.connect`
+        or receivers connected without sender.
+
+        If content object has ``is_short_circuit(value)`` method (see :class:`business_logic.models.BinaryOperator`)
+        it is called with each interpreted child value, remaining children are not interpreted
+        if it returns ``True`` and the value becomes the result.
+
         Args:
             ctx(:class:`business_logic.models.Context`): execution context
 
@@ -146,16 +197,39 @@ class Node(NS_Node):
         is_block = self.is_block()
         is_content_object_interpret_children_itself = self.is_content_object_interpret_children_itself()
         exception_handling_policy = ctx.config.exception_handling_policy
+        fast_interpret = ctx.config.fast_interpret
         children = ctx.get_children(self)
         exception = None
         return_value = None
         children_interpreted = []
-        control_flow_exceptions = (InterpretationException, StopInterpretationException)
+        is_short_circuit = None if is_block else getattr(self.content_object, 'is_short_circuit', None)
+        is_short_circuited = False
+        control_flow_exceptions = (InterpretationException, StopInterpretationException, BreakLoopException)
+
+        # manage frames directly instead of Context signal handlers
+        if fast_interpret:
+            is_frame_owner = is_block or not ctx.frames
+            if is_frame_owner:
+                ctx.frames.append(Frame())
+
+        # receivers are checked by attributes, receivers lookup depends on count of all connected receivers
+        if fast_interpret:
+            listened = ctx.listened_signals
+            send = signals.interpret_enter.has_any_sender_receivers or signals.interpret_enter in listened
+            send_leave = signals.interpret_leave.has_any_sender_receivers or signals.interpret_leave in listened
+            send_block = is_block and (
+                signals.block_interpret_enter.has_any_sender_receivers or signals.block_interpret_enter in listened)
+            send_block_leave = is_block and (
+                signals.block_interpret_leave.has_any_sender_receivers or signals.block_interpret_leave in listened)
+        else:
+            send = send_leave = True
+            send_block = send_block_leave = is_block
 
         # send signals
-        if is_block:
+        if send_block:
             signals.block_interpret_enter.send(sender=ctx, node=self)
-        signals.interpret_enter.send(sender=ctx, node=self, value=self.content_object)
+        if send:
+            signals.interpret_enter.send(sender=ctx, node=self, value=self.content_object)
 
         def handle_exception(exception):
             if isinstance(exception, control_flow_exceptions):
@@ -169,28 +243,42 @@ class Node(NS_Node):
         if is_block or not is_content_object_interpret_children_itself:
             for child in children:
                 try:
-                    children_interpreted.append(child.interpret(ctx))
+                    value = child.interpret(ctx)
                 except Exception as e:
                     exception = handle_exception(e)
                     if exception_handling_policy == ExceptionHandlingPolicy.INTERRUPT:
                         break
                     elif exception_handling_policy == ExceptionHandlingPolicy.IGNORE:
                         children_interpreted.append(None)
+                else:
+                    children_interpreted.append(value)
+                    if is_short_circuit is not None and is_short_circuit(value):
+                        is_short_circuited = True
+                        return_value = value
+                        break
 
-        if not is_block and exception is None:
+        if not is_block and exception is None and not is_short_circuited:
             try:
                 return_value = self.content_object.interpret(ctx, *children_interpreted)
             except Exception as e:
                 exception = handle_exception(e)
 
         # send signals
-        signals.interpret_leave.send(sender=ctx, node=self, value=return_value)
-        if is_block:
+        if send_leave:
+            signals.interpret_leave.send(sender=ctx, node=self, value=return_value)
+        if send_block_leave:
             signals.block_interpret_leave.send(sender=ctx, node=self)
 
+        if fast_interpret and is_frame_owner:
+            ctx.frames.pop()
+
         if isinstance(exception, control_flow_exceptions) and is_recursive_call:
             raise exception
 
+        # loop statement is interpreted by loop content object, not recursively
+        if isinstance(exception, BreakLoopException):
+            raise exception
+
         return return_value
 
     def is_block(self):
@@ -225,6 +313,8 @@ class NodeCache:
     """
     Creates cache with preloaded content objects for entire tree
     on first call of get_children().
+    Objects of other applications referenced by :class:`business_logic.models.ReferenceConstant`
+    are not preloaded, see :func:`business_logic.models.Context.get_referenced_object`.
 
     Uses `1 + n` SQL queries, where n is count of used content types.
 
@@ -245,6 +335,19 @@ class NodeCache:
         self.initialize(node)
         return self._child_by_parent_id[node.id]
 
+    def get_parent(self, node):
+        """
+        Returns cached parent node
+
+        Args:
+            node(:class:`business_logic.models.Node`): child node
+
+        Returns:
+            :class:`business_logic.models.Node` or None for root node
+        """
+        self.initialize(node)
+        return self._parent_by_id[node.id]
+
     def initialize(self, node):
         if not self._initialized:
             self._initialize(node)
@@ -259,28 +362,48 @@ class NodeCache:
         content_type_by_id = {}
         for content_type in content_types:
             content_type_by_id[content_type.id] = content_type
+            if content_type.app_label != Node._meta.app_label:
+                # objects referenced by ReferenceConstant are loaded by Context on each execution,
+                # cache can outlive them
+                continue
             model = content_type.model_class()
             objects_by_ct_id_by_id[content_type.id] = dict([(x.id, x) for x in model.objects.filter(
                 id__in=tree.values_list('object_id', flat=True).filter(content_type=content_type))])
 
-        tree = list(tree)
+        tree = list(tree.order_by('lft'))
         tree[[x.id for x in tree].index(node.id)] = node
 
         self._node_by_id = dict([(x.id, x) for x in tree])
 
         for node in tree:
             if node.content_type_id:
+                Node.content_type.field.set_cached_value(node, content_type_by_id[node.content_type_id])
+
+            if node.content_type_id in objects_by_ct_id_by_id:
                 content_object = objects_by_ct_id_by_id[node.content_type_id][node.object_id]
                 content_object._node_cache = node
-                node._content_object_cache = content_object
-                node._content_type_cache = content_type_by_id[node.content_type_id]
+                Node.content_object.set_cached_value(node, content_object)
 
-        self._child_by_parent_id = {}
-        for parent in tree:
-            self._child_by_parent_id[parent.id] = [
-                node for node in tree
-                if node.lft >= parent.lft and node.lft <= parent.rgt - 1 and node.depth == parent.depth + 1
-            ]
+        self._build_index(tree)
+
+    def _build_index(self, tree):
+        # single pass over nodes ordered by lft: stack holds ancestors of current node,
+        # ancestors which rgt is less than lft of current node are already closed
+        self._child_by_parent_id = child_by_parent_id = {}
+        self._parent_by_id = parent_by_id = {}
+        ancestors = []
+
+        for node in tree:
+            while ancestors and ancestors[-1].rgt < node.lft:
+                ancestors.pop()
+
+            parent = ancestors[-1] if ancestors else None
+            parent_by_id[node.id] = parent
+            if parent is not None:
+                child_by_parent_id[parent.id].append(node)
+
+            child_by_parent_id[node.id] = []
+            ancestors.append(node)
 
 
 class NodeCacheHolder(object):
@@ -301,6 +424,15 @@ class NodeCacheHolder(object):
             self._node_cache = NodeCache()
         return self._node_cache.get_children(node)
 
+    def set_node_cache(self, node_cache):
+        """
+        Sets preloaded node cache
+
+        Args:
+            node_cache(:class:`business_logic.models.NodeCache`): node cache
+        """
+        self._node_cache = node_cache
+
 
 class NodeVisitor(NodeCacheHolder):
     """
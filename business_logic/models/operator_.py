@@ -58,6 +58,9 @@ class BinaryOperator(Operator):
         * ``<=``
         * ``in``
 
+    Logical operators ``&`` and ``|`` are short-circuit: right operand is not interpreted
+    if left one is ``False`` or ``True`` respectively.
+
     """
     operator_table = {
         '+': operator.add,
@@ -81,6 +84,19 @@ class BinaryOperator(Operator):
         'in': operator.contains,
     }
 
+    # values of left operand defining result of logical operators
+    short_circuit_table = {
+        '&': False,
+        '|': True,
+    }
+
+    def is_short_circuit(self, lhs):
+        """
+        Returns:
+            bool: True if result is defined by boolean left operand, so right operand should not be interpreted
+        """
+        return self.operator in self.short_circuit_table and lhs is self.short_circuit_table[self.operator]
+
     def interpret(self, ctx, *args):
 
         def is_decimal(value):
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+from django.apps import apps
+from django.db import connections
+from django.db.transaction import TransactionManagementError
+
+from .. import signals
+from ..config import ContextConfig
+from .cache import program_cache
+from .context import Context, bulk_save_changes
+from .metrics import metrics_collector
+
+ExecutionResult = namedtuple('ExecutionResult', ('pk', 'variables', 'error'))
+ExecutionResult.__doc__ = """
+Result of single execution made by :func:`business_logic.models.ProgramVersion.execute_parallel`.
+
+Attributes:
+    pk: primary key of program argument
+    variables(dict): values of program variables (except arguments) by name
+    error(str): first exception raised during execution formatted as ``ExceptionClass: message``, or None
+"""
+
+
+def is_in_memory_db(connection):
+    return getattr(connection, 'is_in_memory_db', lambda: False)()
+
+
+def close_connections():
+    """
+    Closes database connections before starting worker processes,
+    so forked workers open their own connections.
+    In-memory SQLite databases are not closed, forked workers use copy of them.
+
+    Raises:
+        TransactionManagementError: if connection is in atomic block
+    """
+    for connection in connections.all():
+        if is_in_memory_db(connection):
+            continue
+
+        if connection.in_atomic_block:
+            raise TransactionManagementError(
+                'Parallel execution is not available inside atomic block, '
+                'worker processes would not see uncommitted changes.')
+
+        connection.close()
+
+
+def initialize_worker():
+    # spawned workers start from scratch
+    if not apps.ready:
+        django.setup()
+
+    # forked workers inherit counters not flushed by parent process
+    metrics_collector.clear()
+
+
+def format_exception(exception):
+    return '{}: {}'.format(exception.__class__.__name__, exception)
+
+
+def execute_chunk(program_version_id, pks, save, context_kwargs):
+    """
+    Executes program version for each primary key of chunk in worker process.
+    Program tree is cached by process-wide :data:`business_logic.models.program_cache`,
+    so it is loaded once per worker.
+
+    Returns:
+        :obj:`list` of :class:`business_logic.models.ExecutionResult`
+    """
+    program_version = apps.get_model('business_logic', 'ProgramVersion').objects.get(id=program_version_id)
+    program_arguments = program_version.get_program_arguments()
+    program_argument, = program_arguments
+    model = program_argument.content_type.model_class()
+    objects = program_argument.with_related(model._default_manager.all()).in_bulk(pks)
+    program = program_cache.get(program_version) if ContextConfig(**context_kwargs).cache else None
+
+    errors = {}
+
+    def on_interpret_exception(sender, **kwargs):
+        errors.setdefault(sender, kwargs['exception'])
+
+    results = []
+    contexts = []
+    signals.interpret_exception.connect(on_interpret_exception)
+
+    try:
+        for pk in pks:
+            with Context(**context_kwargs) as context:
+                try:
+                    if pk not in objects:
+                        raise model.DoesNotExist('{} matching pk={} does not exist'.format(model.__name__, pk))
+                    program_version._execute(context, program, program_arguments,
+                                             {program_argument.name: objects[pk]})
+                except Exception as e:
+                    errors.setdefault(context, e)
+
+            error = errors.pop(context, None)
+            variables = {
+                name: value
+                for name, value in context._vars.items()
+                if name != program_argument.variable_definition.name
+            }
+            results.append(ExecutionResult(pk, variables, None if error is None else format_exception(error)))
+            contexts.append(context)
+    finally:
+        signals.interpret_exception.disconnect(on_interpret_exception)
+
+    if save:
+        bulk_save_changes(contexts)
+
+    # worker processes are terminated without exit handlers
+    metrics_collector.flush()
+
+    return results
+
+
+def chunks(iterable, chunk_size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def execute_parallel(program_version, pks, workers=None, chunk_size=500, save=False, mp_context=None,
+                     **context_kwargs):
+    # primary keys are fetched before closing connections, forked workers shouldn't inherit open ones
+    pk_chunks = list(chunks(pks, chunk_size))
+    close_connections()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=initialize_worker) as executor:
+        futures = [
+            executor.submit(execute_chunk, program_version.id, chunk, save, context_kwargs) for chunk in pk_chunks
+        ]
+
+        for future in futures:
+            for result in future.result():
+                yield result
+
+
+__all__ = ('ExecutionResult', )
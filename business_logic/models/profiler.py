@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+#
+
+import time
+
+from collections import OrderedDict
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .log import Execution
+from .node import Node
+
+
+class Profiler(object):
+    """
+    Collects wall time and count of calls of each :class:`business_logic.models.Node`
+    interpreted during calling the :func:`business_logic.models.ProgramVersion.execute` method.
+    Will work only if ``Context.config.profile`` flag is set to ``True``.
+    Profile is saved as :class:`business_logic.models.NodeProfile` records
+    if ``Context.config.debug`` flag is set too.
+
+    Time of node includes time of its children.
+
+    See Also:
+        * :class:`business_logic.config.ContextConfig`
+        * :class:`business_logic.models.Context`
+        * :ref:`Signals`
+    """
+
+    def __init__(self):
+        self._stats = OrderedDict()
+        self._stack = []
+
+    def interpret_enter(self, node, **kwargs):
+        if node.id not in self._stats:
+            self._stats[node.id] = [self._stack[-1][0] if self._stack else None, 0, 0.0]
+        self._stack.append((node.id, time.perf_counter()))
+
+    def interpret_leave(self, node, **kwargs):
+        node_id, start_time = self._stack.pop()
+        stats = self._stats[node_id]
+        stats[1] += 1
+        stats[2] += time.perf_counter() - start_time
+
+    def get_report(self):
+        """
+        Returns:
+            :obj:`list` of :obj:`dict`: ``node`` id, ``parent`` node id, count of ``calls`` and ``time``
+            in seconds of each interpreted node, in order of the first interpretation
+        """
+        return [
+            dict(node=node_id, parent=parent_id, calls=calls, time=time_)
+            for node_id, (parent_id, calls, time_) in self._stats.items()
+        ]
+
+    def get_flame_graph(self):
+        """
+        Returns:
+            dict: flame graph of profile, see :func:`business_logic.models.get_flame_graph`
+        """
+        return get_flame_graph(self.get_report())
+
+    def save(self, execution):
+        """
+        Saves profile as :class:`business_logic.models.NodeProfile` records.
+
+        Args:
+            execution(:class:`business_logic.models.Execution`): profiled execution
+        """
+        NodeProfile.objects.bulk_create([
+            NodeProfile(execution=execution, node_id=row['node'], parent_id=row['parent'],
+                        calls=row['calls'], time=row['time'])
+            for row in self.get_report()
+        ])
+
+
+def get_flame_graph(report):
+    """
+    Builds flame graph compatible tree (``name``, ``value`` and ``children`` keys of each item)
+    from profile report. ``value`` is time in seconds.
+    Reports of several program roots are joined under the ``all`` item.
+
+    Args:
+        report(:obj:`list` of :obj:`dict`): items with ``node``, ``parent``, ``calls`` and ``time`` keys
+            as returned by :func:`business_logic.models.Profiler.get_report`
+            or ``NodeProfile`` queryset ``values()``
+
+    Returns:
+        dict: root item of flame graph, None if report is empty
+    """
+    items = OrderedDict()
+    for row in report:
+        items[row['node']] = dict(
+            name=str(row['node']), node=row['node'], value=row['time'], calls=row['calls'], children=[])
+
+    roots = []
+    for row in report:
+        parent = items.get(row['parent'])
+        (roots if parent is None else parent['children']).append(items[row['node']])
+
+    if len(roots) == 1:
+        return roots[0]
+
+    if not roots:
+        return None
+
+    return dict(
+        name='all', node=None, value=sum(root['value'] for root in roots),
+        calls=sum(root['calls'] for root in roots), children=roots)
+
+
+class NodeProfile(models.Model):
+    """
+    Stores wall time and count of calls of single :class:`business_logic.models.Node`
+    during :class:`business_logic.models.Execution`.
+    Will be created only if ``Context.config.profile`` and ``Context.config.debug`` flags are set to ``True``.
+
+    Attributes:
+        execution(:class:`business_logic.models.Execution`): profiled execution
+        node(:class:`business_logic.models.Node`): interpreted node
+        parent(:class:`business_logic.models.Node`): node interpreted the node
+        calls(int): count of interpretations
+        time(float): total interpretation time in seconds including children time
+    """
+    execution = models.ForeignKey(Execution, related_name='profile', on_delete=models.CASCADE)
+    node = models.ForeignKey(Node, verbose_name=_('Program node'), related_name='+', on_delete=models.CASCADE)
+    parent = models.ForeignKey(Node, null=True, related_name='+', on_delete=models.CASCADE)
+    calls = models.PositiveIntegerField(_('Calls'))
+    time = models.FloatField(_('Time'))
+
+    class Meta:
+        ordering = ('id',)
+
+
+__all__ = ('Profiler', 'NodeProfile', 'get_flame_graph')
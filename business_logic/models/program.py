@@ -1,20 +1,144 @@
 # -*- coding: utf-8 -*-
 
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from .context import Context
+from .cache import program_cache
+from .context import Context, bulk_save_changes
 from .log import Execution, ExecutionArgument
+from .metrics import metrics_collector
 from .node import Node
 from .variable import VariableDefinition, Variable
 from .types_ import DJANGO_FIELDS_FOR_TYPES
 
-from ..config import ExceptionHandlingPolicy
+from ..config import ContextConfig, ExceptionHandlingPolicy
+from ..exceptions import BreakLoopException
 from ..fields import DeepAttributeField
 
 
+def get_relation_paths(model, names):
+    """
+    Collects relations traversed by dotted attribute names of model (e.g. ``publisher.country.name``).
+
+    Args:
+        model: django model class
+        names(list): dotted attribute names
+
+    Returns:
+        tuple: lists of ``select_related()`` lookups (forward and one-to-one relations chains)
+            and ``prefetch_related()`` lookups (chains containing many-to-many or reverse relations)
+    """
+    select_related = set()
+    prefetch_related = set()
+
+    for name in names:
+        current_model = model
+        path = []
+        is_prefetch = False
+
+        for part in name.split('.'):
+            try:
+                field = current_model._meta.get_field(part)
+            except FieldDoesNotExist:
+                break
+
+            # attribute names like ``publisher_id`` are resolved to the relation field too
+            if not field.is_relation or field.related_model is None or field.name != part:
+                break
+
+            path.append(part)
+            is_prefetch = is_prefetch or field.many_to_many or field.one_to_many
+            current_model = field.related_model
+
+        if path:
+            (prefetch_related if is_prefetch else select_related).add('__'.join(path))
+
+    def drop_prefixes(paths):
+        return sorted(path for path in paths if not any(other.startswith(path + '__') for other in paths))
+
+    return drop_prefixes(select_related), drop_prefixes(prefetch_related)
+
+
+def _is_relation_loaded(instance, path):
+    """
+    Returns:
+        bool: True if traversing of ``select_related()`` path doesn't need queries
+    """
+    current = instance
+
+    for part in path.split('__'):
+        field = current._meta.get_field(part)
+
+        if not field.is_cached(current):
+            # empty foreign key is resolved without query
+            return field.concrete and getattr(current, field.attname) is None
+
+        current = field.get_cached_value(current)
+
+        if current is None:
+            return True
+
+    return True
+
+
+def _copy_cached_relations(source, target, parts):
+    field = target._meta.get_field(parts[0])
+
+    if not field.is_cached(source):
+        return
+
+    # foreign key of target could be changed in memory
+    if field.concrete and getattr(source, field.attname) != getattr(target, field.attname):
+        return
+
+    if not field.is_cached(target):
+        field.set_cached_value(target, field.get_cached_value(source))
+        return
+
+    source, target = field.get_cached_value(source), field.get_cached_value(target)
+
+    if len(parts) > 1 and source is not None and target is not None:
+        _copy_cached_relations(source, target, parts[1:])
+
+
+def load_related(instances, select_related=(), prefetch_related=()):
+    """
+    Loads relations of given model instances without replacing them.
+    Instances missing ``select_related`` relations are fetched again by single query
+    and fetched related objects are copied to instances.
+
+    Args:
+        instances(list): saved instances of the same model
+        select_related(list): ``select_related()`` lookups
+        prefetch_related(list): ``prefetch_related()`` lookups
+    """
+    instances = [instance for instance in instances if instance.pk is not None]
+
+    if not instances:
+        return
+
+    missing = [
+        instance for instance in instances
+        if not all(_is_relation_loaded(instance, path) for path in select_related)
+    ]
+
+    if missing:
+        model = missing[0].__class__
+        fetched = model._default_manager.select_related(*select_related).in_bulk(
+            [instance.pk for instance in missing])
+
+        for instance in missing:
+            if instance.pk in fetched:
+                for path in select_related:
+                    _copy_cached_relations(fetched[instance.pk], instance, path.split('__'))
+
+    if prefetch_related:
+        models.prefetch_related_objects(instances, *prefetch_related)
+
+
 class ExecutionEnvironment(models.Model):
     """
     Environment of execution.
@@ -117,6 +241,34 @@ class ProgramArgument(models.Model):
         self.variable_definition.delete()
         super(ProgramArgument, self).delete(**kwargs)
 
+    def get_relation_paths(self):
+        """
+        Returns:
+            tuple: lists of ``select_related()`` and ``prefetch_related()`` lookups of relations
+                traversed by names of argument fields, see :func:`business_logic.models.get_relation_paths`
+        """
+        if not hasattr(self, '_relation_paths'):
+            self._relation_paths = get_relation_paths(
+                self.content_type.model_class(), [field.name for field in self.fields.all()])
+        return self._relation_paths
+
+    def with_related(self, queryset):
+        """
+        Returns:
+            queryset of argument model loading relations traversed by argument fields
+        """
+        select_related, prefetch_related = self.get_relation_paths()
+        return queryset.select_related(*select_related).prefetch_related(*prefetch_related)
+
+    def load_related(self, instances):
+        """
+        Loads relations traversed by argument fields to given instances of argument model,
+        see :func:`business_logic.models.load_related`.
+        """
+        select_related, prefetch_related = self.get_relation_paths()
+        if select_related or prefetch_related:
+            load_related(instances, select_related, prefetch_related)
+
 
 class ProgramArgumentField(models.Model):
     """
@@ -261,12 +413,41 @@ class ProgramVersion(models.Model):
         new_version.save()
         return new_version
 
+    def get_compiled_entry_point(self):
+        """
+        Returns entry point compiled by :class:`business_logic.models.NodeCompiler`.
+        Compiled entry point is held by process-wide :class:`business_logic.models.ProgramCache`.
+
+        Returns:
+            function: compiled entry point
+        """
+        return program_cache.get(self).compiled
+
+    def get_xml(self):
+        """
+        Returns Blockly XML of program tree.
+        XML is built once and held by process-wide :class:`business_logic.models.ProgramCache`.
+
+        Returns:
+            str: Blockly XML
+        """
+        return program_cache.get(self).xml
+
     def execute(self, context=None, **kwargs):
         """
         Main function for program execution
 
+        Program node tree is held by process-wide :class:`business_logic.models.ProgramCache`
+        if ``cache`` option of context is on.
+        Relations traversed by :class:`business_logic.models.ProgramArgumentField` names are loaded
+        into passed model instances by single query, see :func:`business_logic.models.ProgramArgument.load_related`.
+        If ``log`` and ``debug`` options of context are off entry point is interpreted in compiled form,
+        see :func:`business_logic.models.ProgramVersion.get_compiled_entry_point`.
+        Compilation can be disabled by the ``compile`` option.
+
         Args:
-            context(:class:`business_logic.models.Context`, optional): Context instance
+            context(:class:`business_logic.models.Context`, optional): Context instance,
+                if omitted new context is created and closed after execution
             **kwargs: program arguments
 
         Returns:
@@ -285,16 +466,139 @@ class ProgramVersion(models.Model):
             * :class:`business_logic.models.Context`
             * :class:`business_logic.models.ExecutionEnvironment`
         """
-        context = context if context is not None else Context()
+        if context is None:
+            with Context() as context:
+                return self.execute(context=context, **kwargs)
+
+        program = program_cache.get(self) if context.config.cache else None
+        return self._execute(context, program, self.get_program_arguments(), kwargs)
+
+    def execute_many(self, arguments, chunk_size=2000, save=False, **context_kwargs):
+        """
+        Executes program for each item of arguments.
+        Program interface metadata and program node tree are loaded once for all executions.
+
+        Args:
+            arguments: iterable or queryset of program arguments.
+                Each item is dict of program arguments (kwargs of :func:`business_logic.models.ProgramVersion.execute`)
+                or model instance if program interface has single argument.
+                Querysets are fetched by chunks using ``QuerySet.iterator()``
+                with relations traversed by argument fields
+            chunk_size(int): count of objects fetched from database at once
+            save(bool): save model instances changed by programs using
+                :func:`business_logic.models.bulk_save_changes` after each ``chunk_size`` executions
+            **context_kwargs: kwargs for :class:`business_logic.models.Context` created for each execution
+
+        Yields:
+            :class:`business_logic.models.Context`: closed Context instance of each execution
+
+        Raises:
+            TypeError: if items are not dicts and program interface has not single argument
+        """
+        program_arguments = self.get_program_arguments()
+        program = program_cache.get(self) if ContextConfig(**context_kwargs).cache else None
+
+        if isinstance(arguments, models.QuerySet):
+            if len(program_arguments) == 1:
+                arguments = program_arguments[0].with_related(arguments)
+            arguments = arguments.iterator(chunk_size=chunk_size)
+
+        executed = []
+
+        try:
+            for kwargs in arguments:
+                if not isinstance(kwargs, dict):
+                    if len(program_arguments) != 1:
+                        raise TypeError('Program arguments should be passed as dict')
+                    kwargs = {program_arguments[0].name: kwargs}
+
+                with Context(**context_kwargs) as context:
+                    self._execute(context, program, program_arguments, dict(kwargs))
+
+                if save:
+                    executed.append(context)
+                    if len(executed) >= chunk_size:
+                        bulk_save_changes(executed)
+                        executed = []
+
+                yield context
+        finally:
+            if executed:
+                bulk_save_changes(executed)
+
+    def execute_parallel(self, arguments, workers=None, chunk_size=500, save=False, mp_context=None,
+                         **context_kwargs):
+        """
+        Executes program for each of arguments in pool of worker processes.
+        Primary keys of arguments are split by chunks which are executed by workers,
+        each worker uses own database connection and keeps own program cache.
+        Results are yielded in order of arguments.
+
+        Program interface should have single argument.
+        Database connections of current process are closed before starting workers,
+        so method can't be called inside atomic block.
+        In-memory SQLite database can be used with ``fork`` start method only.
+
+        Args:
+            arguments: queryset, iterable of model instances or primary keys of program argument
+            workers(int, optional): count of worker processes, default is count of processors
+            chunk_size(int): count of arguments sent to worker at once
+            save(bool): save model instances changed by programs using
+                :func:`business_logic.models.bulk_save_changes` after each chunk
+            mp_context(optional): multiprocessing context of ``concurrent.futures.ProcessPoolExecutor``
+            **context_kwargs: kwargs for :class:`business_logic.models.Context` created for each execution
+
+        Yields:
+            :class:`business_logic.models.ExecutionResult`: result of each execution
+
+        Raises:
+            TypeError: if program interface has not single argument
+            django.db.TransactionManagementError: if called inside atomic block
+        """
+        from .parallel import execute_parallel
+
+        if len(self.get_program_arguments()) != 1:
+            raise TypeError('Parallel execution requires program interface with single argument')
+
+        if isinstance(arguments, models.QuerySet):
+            pks = arguments.values_list('pk', flat=True).iterator(chunk_size=chunk_size)
+        else:
+            pks = (getattr(argument, 'pk', argument) for argument in arguments)
+
+        return execute_parallel(self, pks, workers=workers, chunk_size=chunk_size, save=save,
+                                mp_context=mp_context, **context_kwargs)
+
+    def get_program_arguments(self):
+        """
+        Returns:
+            :obj:`list` of :class:`business_logic.models.ProgramArgument`: arguments of program interface
+                with preloaded content types, variable definitions and fields
+        """
+        return list(
+            ProgramArgument.objects.filter(program_interface__programs=self.program_id).select_related(
+                'content_type', 'variable_definition').prefetch_related(
+                    models.Prefetch(
+                        'fields', queryset=ProgramArgumentField.objects.select_related('variable_definition'))))
+
+    def _execute(self, context, program, program_arguments, kwargs):
+        if not context.config.metrics:
+            return self._run(context, program, program_arguments, kwargs)
+
+        with metrics_collector.measure(self.id, context):
+            return self._run(context, program, program_arguments, kwargs)
+
+    def _run(self, context, program, program_arguments, kwargs):
         execution = context.execution = Execution.objects.create(program_version=self) if context.config.debug else None
+        context.logger.execution = execution
 
-        for program_argument in self.program.program_interface.arguments.all():
+        for program_argument in program_arguments:
             try:
                 argument = kwargs.pop(program_argument.name)
                 assert program_argument.content_type.model_class() == argument.__class__
             except (KeyError, AssertionError, AttributeError):
                 raise
             context.set_variable(program_argument.variable_definition, argument)
+            program_argument.load_related([argument])
 
             if context.config.debug:
                 ExecutionArgument.objects.create(
@@ -321,11 +625,31 @@ class ProgramVersion(models.Model):
 
         assert not kwargs
 
-        self.entry_point.interpret(context)
+        config = context.config
+        try:
+            if program is None:
+                self.entry_point.interpret(context)
+            else:
+                context.set_node_cache(program.node_cache)
+
+                if config.compile and not config.log and not config.debug and not config.profile:
+                    program.compiled(context)
+                else:
+                    program.entry_point.interpret(context)
+        except BreakLoopException:
+            # break outside of any loop stops the program as compiled entry point does
+            pass
 
         if context.config.debug:
-            execution.log = context.logger.log
+            if config.profile:
+                context.profiler.save(execution)
+
             execution.finish_time = timezone.now()
-            execution.save(update_fields=['log', 'finish_time'])
+            if context.config.log_async:
+                # log is linked to execution by LogWriter after saving
+                execution.save(update_fields=['finish_time'])
+            else:
+                execution.log = context.logger.log
+                execution.save(update_fields=['log', 'finish_time'])
 
         return context
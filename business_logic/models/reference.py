@@ -38,4 +38,4 @@ class ReferenceConstant(NodeAccessor):
         verbose_name_plural = _('Reference constants')
 
     def interpret(self, ctx):
-        return ctx.get_children(self.node)[0].content_object
+        return ctx.get_referenced_object(ctx.get_children(self.node)[0])
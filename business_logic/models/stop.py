@@ -18,6 +18,9 @@ class StopInterpretation(models.Model):
 
 
 class BreakLoop(models.Model):
+    """
+    Stops the nearest enclosing :class:`business_logic.models.ForeachStatement`.
+    """
 
     class Meta:
         verbose_name = _('Break instruction')
@@ -2,6 +2,7 @@
 import copy
 
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from django.urls import reverse
 
 from rest_framework import serializers
@@ -89,11 +90,29 @@ class ProgramInterfaceListSerializer(serializers.ModelSerializer):
 
 class BlocklyXMLSerializer(serializers.CharField):
 
+    def get_attribute(self, instance):
+        # XML of program version is taken from program cache without loading entry point
+        if isinstance(instance, ProgramVersion):
+            return instance
+
+        return super(BlocklyXMLSerializer, self).get_attribute(instance)
+
     def to_representation(self, instance):
+        if isinstance(instance, ProgramVersion):
+            return instance.get_xml()
+
         return BlocklyXmlBuilder().build(instance)
 
     def to_internal_value(self, data):
-        return NodeTreeCreator().create(BlocklyXmlParser().parse(data)[0])
+        # XML is parsed once, parse errors are reported as validation errors
+        try:
+            parsed = BlocklyXmlParser().parse(data)
+        except Exception as e:
+            raise serializers.ValidationError(
+                ["Xml parse error - {}: {}".format(e.__class__.__name__, str(e))])
+
+        # node tree is created or updated on saving of program version
+        return parsed[0]
 
     def run_validation(self, data=serializers.empty):
         if data == '' or (self.trim_whitespace and str(data).strip() == ''):
@@ -105,12 +124,6 @@ class BlocklyXMLSerializer(serializers.CharField):
         if is_empty_value:
             return data
 
-        try:
-            BlocklyXmlParser().parse(data)
-        except Exception as e:
-            raise serializers.ValidationError(
-                ["Xml parse error - {}: {}".format(e.__class__.__name__, str(e))])
-
         value = self.to_internal_value(data)
         self.run_validators(value)
         return value
@@ -149,6 +162,11 @@ class ProgramVersionCreateSerializer(serializers.ModelSerializer):
         model = ProgramVersion
         fields = ('title', 'description', 'xml', 'program', 'id')
 
+    def create(self, validated_data):
+        with transaction.atomic():
+            validated_data['entry_point'] = NodeTreeCreator().create(validated_data['entry_point'])
+            return super(ProgramVersionCreateSerializer, self).create(validated_data)
+
 
 class ProgramVersionSerializer(serializers.ModelSerializer):
     xml = BlocklyXMLSerializer(source='entry_point', required=True)
@@ -159,6 +177,13 @@ class ProgramVersionSerializer(serializers.ModelSerializer):
         model = ProgramVersion
         exclude = ('entry_point',)
 
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            if 'entry_point' in validated_data:
+                validated_data['entry_point'] = NodeTreeCreator().update(
+                    instance.entry_point, validated_data['entry_point'])
+            return super(ProgramVersionSerializer, self).update(instance, validated_data)
+
 
 class ReferenceDescriptorListSerializer(serializers.ModelSerializer):
     name = serializers.SerializerMethodField()
@@ -12,9 +12,14 @@ urlpatterns = [
     re_path(r'^program-version$', ProgramVersionList.as_view(), name='program-version-list'),
     re_path(r'^program-version/new$', ProgramVersionCreate.as_view(), name='program-version-create'),
     re_path(r'^program-version/(?P<pk>\d+)$', ProgramVersionView.as_view(), name='program-version'),
+    re_path(r'^program-version/(?P<pk>\d+)/profile$', ProgramVersionProfileView.as_view(),
+            name='program-version-profile'),
+    re_path(r'^program-version/(?P<pk>\d+)/metrics$', ProgramVersionMetricsView.as_view(),
+            name='program-version-metrics'),
     re_path(r'^execution$', ExecutionList.as_view(), name='execution-list'),
     re_path(r'^execution/(?P<pk>\d+)$', ExecutionView.as_view(), name='execution'),
     re_path(r'^execution/(?P<execution__id>\d+)/log$', LogView.as_view(), name='log'),
+    re_path(r'^execution/(?P<pk>\d+)/profile$', ExecutionProfileView.as_view(), name='execution-profile'),
     re_path(r'^reference$', ReferenceDescriptorList.as_view(), name='reference-descriptor-list'),
     re_path(r'^reference/(?P<model>[\w.]+)$', ReferenceList.as_view(), name='reference-list'),
     re_path(r'^reference/(?P<model>[\w.]+)/(?P<pk>\d+)$', ReferenceView.as_view(), name='reference'),
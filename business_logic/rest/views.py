@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import json
 import operator
 
 from collections import OrderedDict
 from functools import reduce
 
 from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
 
 from rest_framework import generics, exceptions
 
@@ -18,6 +23,8 @@ from rest_framework.response import Response
 
 from django_filters.rest_framework import DjangoFilterBackend
 
+from ..models import NodeProfile, get_flame_graph, get_program_version_metrics
+
 from .serializers import *
 
 
@@ -84,14 +91,29 @@ class ProgramVersionCreate(generics.CreateAPIView):
     serializer_class = ProgramVersionCreateSerializer
 
 
+def get_etag(data):
+    content = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode('utf-8')
+    return '"{}"'.format(hashlib.md5(content).hexdigest())
+
+
 class ProgramVersionView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    Program version with Blockly XML held by :class:`business_logic.models.ProgramCache`.
+    Retrieved representation has ``ETag`` header, 304 response is returned
+    if it matches ``If-None-Match`` request header.
+    """
     queryset = ProgramVersion.objects.all()
     serializer_class = ProgramVersionSerializer
 
-    def perform_update(self, serializer):
-        instance = self.get_object()
-        instance.entry_point.delete()
-        super(ProgramVersionView, self).perform_update(serializer)
+    def retrieve(self, request, *args, **kwargs):
+        data = self.get_serializer(self.get_object()).data
+        etag = get_etag(data)
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(status=304, headers={'ETag': etag})
+
+        return Response(data, headers={'ETag': etag})
 
 
 class ExecutionList(ObjectList):
@@ -111,6 +133,46 @@ class LogView(generics.RetrieveAPIView):
     lookup_field = 'execution__id'
 
 
+class ProfileView(generics.RetrieveAPIView):
+
+    def get_profile(self, obj):
+        raise NotImplementedError()
+
+    def retrieve(self, request, *args, **kwargs):
+        report = self.get_profile(self.get_object())
+        return Response(get_flame_graph(report))
+
+
+class ExecutionProfileView(ProfileView):
+    queryset = Execution.objects.all()
+
+    def get_profile(self, execution):
+        return execution.profile.values('node', 'parent', 'calls', 'time')
+
+
+class ProgramVersionProfileView(ProfileView):
+    queryset = ProgramVersion.objects.all()
+
+    def get_profile(self, program_version):
+        return NodeProfile.objects.filter(execution__program_version=program_version).values(
+            'node', 'parent').annotate(calls=models.Sum('calls'), time=models.Sum('time')).order_by('node')
+
+
+class ProgramVersionMetricsView(generics.RetrieveAPIView):
+    queryset = ProgramVersion.objects.all()
+
+    def retrieve(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+
+        if since is not None:
+            since = parse_datetime(since)
+            if since is None:
+                raise exceptions.ValidationError('Incorrect `since` parameter: datetime expected')
+
+        metrics = get_program_version_metrics(self.get_object(), since=since)
+        return Response(metrics.get_summary())
+
+
 class ReferenceDescriptorList(generics.ListAPIView):
     queryset = ReferenceDescriptor.objects.all()
     serializer_class = ReferenceDescriptorListSerializer
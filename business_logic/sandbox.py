@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Pool of persistent worker processes running code of
+:class:`business_logic.models.PythonCodeFunctionDefinition` outside of interpreter process.
+
+Module doesn't import django, so workers are started by ``spawn`` method without django setup.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+from .exceptions import SandboxException, SandboxTimeoutException
+
+logger = logging.getLogger(__name__)
+
+FUNCTION_CODE_TEMPLATE = '''{}
+ret = function(**kwargs)
+'''
+
+# count of compiled code objects kept by worker
+WORKER_CODE_CACHE_SIZE = 256
+
+
+def compile_function_code(source):
+    return compile(FUNCTION_CODE_TEMPLATE.format(source), '<string>', 'exec')
+
+
+def run_function_code(code, kwargs):
+    function_locals = dict(kwargs=kwargs, ret=None)
+    eval(code, {}, function_locals)
+    return function_locals['ret']
+
+
+def run_worker(connection, memory_limit):
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    codes = {}
+
+    while True:
+        try:
+            source, argument_names, calls = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+
+        results = []
+
+        try:
+            code = codes.get(source)
+            if code is None:
+                if len(codes) >= WORKER_CODE_CACHE_SIZE:
+                    codes.clear()
+                code = codes[source] = compile_function_code(source)
+        except Exception as e:
+            results = [(False, '{}: {}'.format(e.__class__.__name__, e))] * len(calls)
+        else:
+            for args in calls:
+                try:
+                    results.append((True, run_function_code(code, dict(zip(argument_names, args)))))
+                except Exception as e:
+                    results.append((False, '{}: {}'.format(e.__class__.__name__, e)))
+
+        try:
+            connection.send(results)
+        except Exception as e:
+            # unpicklable return value
+            connection.send([(False, '{}: {}'.format(e.__class__.__name__, e))] * len(calls))
+
+
+class SandboxWorker(object):
+
+    def __init__(self, context, memory_limit):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=run_worker, args=(child_connection, memory_limit), name='business_logic.SandboxWorker',
+            daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def execute(self, message, timeout):
+        self.connection.send(message)
+
+        if not self.connection.poll(timeout):
+            raise SandboxTimeoutException('Function call timeout {} seconds exceeded'.format(timeout))
+
+        try:
+            return self.connection.recv()
+        except EOFError:
+            raise SandboxException('Sandbox worker process died, exit code {}'.format(self.process.exitcode))
+
+    def terminate(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class SandboxPool(object):
+    """
+    Runs function code in pool of persistent worker processes.
+    Workers are started on demand and replaced after timeout or crash.
+
+    Each call has own timeout, batch of calls sent at once by :func:`business_logic.sandbox.SandboxPool.call_many`
+    has timeout multiplied by count of calls. Memory of worker process is limited by ``RLIMIT_AS`` on Unix.
+    Exceptions raised by function code are logged and ``None`` is returned as
+    :class:`business_logic.models.PythonCodeFunctionDefinition` does in process.
+    Arguments and return values should be picklable.
+
+    Args:
+        workers(int): maximum count of worker processes
+        timeout(float): timeout of single call in seconds
+        memory_limit(int, optional): memory limit of worker process in bytes
+    """
+
+    def __init__(self, workers=2, timeout=5, memory_limit=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.LifoQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def call(self, source, argument_names, args):
+        """
+        Calls function defined by source code.
+
+        Args:
+            source(str): source code defining ``function``
+            argument_names(list): names of function arguments
+            args(tuple): function arguments
+
+        Returns:
+            return value of function
+
+        Raises:
+            business_logic.exceptions.SandboxTimeoutException: if timeout is exceeded
+            business_logic.exceptions.SandboxException: if worker process died
+        """
+        return self.call_many(source, argument_names, [args])[0]
+
+    def call_many(self, source, argument_names, calls):
+        """
+        Calls function for each of arguments tuples sending them to worker at once.
+
+        Returns:
+            list: return values of function
+        """
+        calls = [tuple(args) for args in calls]
+        worker = self._acquire()
+
+        try:
+            results = worker.execute((source, argument_names, calls), self.timeout * max(len(calls), 1))
+        except BaseException:
+            self._discard(worker)
+            raise
+
+        self._idle.put(worker)
+
+        values = []
+        for is_ok, value in results:
+            if not is_ok:
+                logger.error('Function call failed: %s', value)
+                value = None
+            values.append(value)
+
+        return values
+
+    def close(self):
+        """
+        Terminates idle worker processes.
+        """
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(worker)
+
+    def _acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                start = self._started < self.workers
+                if start:
+                    self._started += 1
+
+            if start:
+                try:
+                    return SandboxWorker(self._context, self.memory_limit)
+                except BaseException:
+                    with self._lock:
+                        self._started -= 1
+                    raise
+
+            # discarded worker could free a slot, so waiting is limited
+            try:
+                return self._idle.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def _discard(self, worker):
+        worker.terminate()
+        with self._lock:
+            self._started -= 1
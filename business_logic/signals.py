@@ -3,22 +3,53 @@
 
 from django.dispatch import Signal
 
-block_interpret_enter = Signal()
+
+class InterpretationSignal(Signal):
+    """
+    Signal which tracks if it has receivers connected for any sender, so ``fast_interpret`` mode of
+    :func:`business_logic.models.Node.interpret` checks receivers by attributes
+    instead of receivers lookup on each node (see :func:`business_logic.models.Context.connect`).
+
+    Attributes:
+        has_any_sender_receivers(bool): receivers connected without sender exist
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(InterpretationSignal, self).__init__(*args, **kwargs)
+        self.has_any_sender_receivers = False
+
+    def connect(self, receiver, sender=None, *args, **kwargs):
+        super(InterpretationSignal, self).connect(receiver, sender, *args, **kwargs)
+        self._update_any_sender_receivers()
+
+    def disconnect(self, receiver=None, sender=None, *args, **kwargs):
+        disconnected = super(InterpretationSignal, self).disconnect(receiver, sender, *args, **kwargs)
+        self._update_any_sender_receivers()
+        return disconnected
+
+    def _update_any_sender_receivers(self):
+        # receivers are keyed by (receiver id, sender id), dead receivers are kept until next connect,
+        # so flag could stay set longer than needed that just makes signals be sent
+        with self.lock:
+            self.has_any_sender_receivers = any(receiver[0][1] == id(None) for receiver in self.receivers)
+
+
+block_interpret_enter = InterpretationSignal()
 """Fired on entering to code block interpretation"""
 
-block_interpret_leave = Signal()
+block_interpret_leave = InterpretationSignal()
 """Fired on leaving code block interpretation"""
 
-statement_interpret_enter = Signal()
+statement_interpret_enter = InterpretationSignal()
 """Fired on entering statement interpretation"""
 
-statement_interpret_leave = Signal()
+statement_interpret_leave = InterpretationSignal()
 """Fired on leaving statement interpretation"""
 
-interpret_enter = Signal()
+interpret_enter = InterpretationSignal()
 """Fired on entering code interpretation"""
 
-interpret_leave = Signal()
+interpret_leave = InterpretationSignal()
 """Fired on leaving code interpretation"""
 
 interpret_exception = Signal()
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import re
+
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 
@@ -8,6 +10,11 @@ def pairs(iterable):
     return [iterable[i:i + 2] for i in range(0, len(iterable), 2)]
 
 
+def camel_case_to_snake_case(name):
+    s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
+    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
+
+
 def get_content_type_id(model):
     return ContentType.objects.get_for_model(model).id
 
@@ -45,6 +45,15 @@ def unittest(session, django):
     session.run('py.test', 'tests')
 
 
+@nox.session(python=DEFAULT_PYTHON_VERSION, tags=['benchmarks'])
+def benchmark(session):
+    session.install('-r', 'requirements.test.txt')
+
+    session.env['DJANGO_SETTINGS_MODULE'] = 'sites.test.settings'
+    session.env['BENCHMARK'] = '1'
+    session.run('py.test', 'tests')
+
+
 @nox.session(reuse_venv=True, tags=['formatting'])
 def flake8(session):
     session.install('flake8')
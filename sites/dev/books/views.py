@@ -60,7 +60,8 @@ class BookDetail(generic.DetailView):
         book = super(BookDetail, self).get_object(queryset)
         program = Program.objects.get(code='on_book_view')
         version = program.versions.order_by('id').last()
-        version.execute(context=Context(debug=True, log=True), book=book)
-        book.publisher.save()
+        with Context(debug=True, log=True) as context:
+            version.execute(context=context, book=book)
+            context.save_changes()
 
         return book
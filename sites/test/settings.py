@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from ..settings import *
 
@@ -10,7 +11,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
+        # worker processes of parallel execution tests open own connections to test database,
+        # file name is unique per test run, so concurrent runs don't share it
+        'TEST': {
+            'NAME': os.path.join(tempfile.gettempdir(), 'business_logic_test_{}.sqlite3'.format(os.getpid())),
+        },
     },
 }
 
 STATIC_URL = '/admin-static/'
+
+# metrics are flushed explicitly by tests
+PROGRAM_METRICS_FLUSH_INTERVAL = 24 * 60 * 60
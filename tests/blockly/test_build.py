@@ -533,3 +533,43 @@ class BlocklyXmlBuilderFunctionTest(TestCase):
         arg0_value_block = arg0_value_children[0]
         self.assertEqual('block', arg0_value_block.tag)
         self.assertEqual('math_number', arg0_value_block.get('type'))
+
+
+class BlocklyXmlBuilderForeachStatementTest(TestCase):
+
+    def test_foreach(self):
+        root = Node.add_root(content_object=ForeachStatement())
+        root.add_child(content_object=Variable(definition=VariableDefinition.objects.create(name='item')))
+        root = Node.objects.get(id=root.id)
+        root.add_child(content_object=Variable(definition=VariableDefinition.objects.create(name='items')))
+        root = Node.objects.get(id=root.id)
+        root.add_child(content_object=BreakLoop())
+        root = Node.objects.get(id=root.id)
+
+        xml_str = BlocklyXmlBuilder().build(root)
+        xml = etree.parse(StringIO(xml_str))
+        block = xml.find('/block')
+        self.assertEqual('controls_forEach', block.get('type'))
+
+        variable_field, list_value, statement = block.getchildren()
+        self.assertEqual('VAR', variable_field.get('name'))
+        self.assertEqual('item', variable_field.text)
+
+        self.assertEqual('LIST', list_value.get('name'))
+        self.assertEqual('variables_get', list_value.find('block').get('type'))
+
+        self.assertEqual('DO', statement.get('name'))
+        break_block = statement.find('block')
+        self.assertEqual('controls_flow_statements', break_block.get('type'))
+        self.assertEqual('BREAK', break_block.find('field').text)
+
+    def test_foreach_without_statement(self):
+        root = Node.add_root(content_object=ForeachStatement())
+        root.add_child(content_object=Variable(definition=VariableDefinition.objects.create(name='item')))
+        root = Node.objects.get(id=root.id)
+        root.add_child(content_object=Variable(definition=VariableDefinition.objects.create(name='items')))
+        root = Node.objects.get(id=root.id)
+
+        xml_str = BlocklyXmlBuilder().build(root)
+        xml = etree.parse(StringIO(xml_str))
+        self.assertEqual(['field', 'value'], [child.tag for child in xml.find('/block').getchildren()])
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from .common import *
 
 from ..test_program import ProgramTestBase
@@ -136,6 +139,40 @@ class NodeTreeCreatorTest(NodeTreeCreatorTestCase):
         tree2 = NodeTreeCreator().create(dict1)
         self.assertFalse(self.tree_diff(tree1, tree2))
 
+    def test_create_should_use_bulk_inserts(self):
+        tree1 = Node.add_root()
+        variable_definition = VariableDefinition.objects.create(name='A')
+        tree1.add_child(content_object=variable_definition)
+        tree1 = Node.objects.get(id=tree1.id)
+        assignment = tree1.add_child(content_object=Assignment())
+        assignment.add_child(content_object=Variable(definition=variable_definition))
+        symmetric_tree(count=256, parent=assignment)
+        tree1 = Node.objects.get(id=tree1.id)
+        dict1 = self.build_dict(tree1)
+
+        with CaptureQueriesContext(connection) as queries:
+            tree2 = NodeTreeCreator().create(dict1)
+
+        inserts = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        node_inserts = [sql for sql in inserts if 'business_logic_node' in sql]
+        # variable definition, assignment, variable, binary operator and number constant
+        self.assertEqual(5, len(inserts) - len(node_inserts))
+        # nodes are split into batches by backend limits only
+        self.assertLess(len(node_inserts), tree1.get_descendant_count() / 100)
+        self.assertEqual(tree1.get_descendant_count(), tree2.get_descendant_count())
+        self.assertFalse(self.tree_diff(tree1, tree2))
+
+    def test_create_nested_set(self):
+        tree1 = get_test_tree()
+        tree2 = NodeTreeCreator().create(self.build_dict(tree1))
+        tree3 = NodeTreeCreator().create(self.build_dict(tree1))
+
+        self.assertEqual(tree2.tree_id + 1, tree3.tree_id)
+        self.assertEqual(
+            [(node.depth, node.lft, node.rgt) for node in Node.get_tree(tree1)],
+            [(node.depth, node.lft, node.rgt) for node in Node.get_tree(tree3)])
+        self.assertEqual(tree2, Node.objects.get(id=tree2.get_children()[1].id).get_root())
+
 
 class NodeTreeCreatorProgramVersionTest(ProgramTestBase, NodeTreeCreatorTestCase):
 
@@ -167,3 +204,153 @@ class NodeTreeCreatorProgramVersionTest(ProgramTestBase, NodeTreeCreatorTestCase
         self.assertRaises(NodeTreeCreatorException, NodeTreeCreator().create, dict1, self.program_interface)
 
         self.assertEqual(variable_definitions_count, VariableDefinition.objects.count())
+
+
+class NodeTreeCreatorUpdateTest(NodeTreeCreatorTestCase):
+    xml = '''
+    <xml>
+      <block type="variables_set" id="a">
+        <field name="VAR">A</field>
+        <value name="VALUE">
+          <block type="math_number" id="b">
+            <field name="NUM">1</field>
+          </block>
+        </value>
+        <next>
+          <block type="variables_set" id="c">
+            <field name="VAR">B</field>
+            <value name="VALUE">
+              <block type="math_arithmetic" id="d">
+                <field name="OP">ADD</field>
+                <value name="A">
+                  <block type="variables_get" id="e">
+                    <field name="VAR">A</field>
+                  </block>
+                </value>
+                <value name="B">
+                  <block type="math_number" id="f">
+                    <field name="NUM">2</field>
+                  </block>
+                </value>
+              </block>
+            </value>
+          </block>
+        </next>
+      </block>
+    </xml>
+    '''
+
+    def setUp(self):
+        self.entry_point = NodeTreeCreator().create(BlocklyXmlParser().parse(self.xml)[0])
+        self.node_ids = set(node.id for node in Node.get_tree(self.entry_point))
+
+    def update(self, xml):
+        with CaptureQueriesContext(connection) as queries:
+            entry_point = NodeTreeCreator().update(self.entry_point, BlocklyXmlParser().parse(xml)[0])
+
+        self.assertEqual(self.entry_point.id, entry_point.id)
+
+        # nested set of updated tree is the same as one of created tree
+        created = NodeTreeCreator().create(BlocklyXmlParser().parse(xml)[0])
+        self.assertFalse(self.tree_diff(created, entry_point))
+        self.assertEqual(
+            [(node.depth, node.lft, node.rgt) for node in Node.get_tree(created)],
+            [(node.depth, node.lft, node.rgt) for node in Node.get_tree(entry_point)])
+
+        return entry_point, [query['sql'] for query in queries.captured_queries]
+
+    def get_xml(self):
+        return self.build_xml(self.entry_point)
+
+    def test_update_constant(self):
+        xml = self.get_xml().replace('>2.0<', '>3.0<')
+        entry_point, queries = self.update(xml)
+
+        self.assertEqual(self.node_ids, set(node.id for node in Node.get_tree(entry_point)))
+        self.assertEqual(['UPDATE'], [sql.split()[0] for sql in queries if not sql.startswith('SELECT')])
+        self.assertEqual(3, entry_point.get_descendants().last().content_object.value)
+
+    def test_update_not_changed(self):
+        entry_point, queries = self.update(self.get_xml())
+        self.assertFalse([sql for sql in queries if not sql.startswith('SELECT')])
+
+    def test_update_operator(self):
+        xml = self.get_xml().replace('>ADD<', '>MINUS<')
+        entry_point, queries = self.update(xml)
+        self.assertEqual(self.node_ids, set(node.id for node in Node.get_tree(entry_point)))
+        self.assertEqual('-', BinaryOperator.objects.get(id=entry_point.get_descendants()[5].object_id).operator)
+
+    def test_update_variable_name(self):
+        variable_node = self.entry_point.get_descendants().filter(
+            content_type=get_content_type_id(Variable)).first()
+        xml = self.get_xml().replace('<field name="VAR">A</field>', '<field name="VAR">C</field>')
+
+        entry_point, queries = self.update(xml)
+
+        variable_node = Node.objects.get(id=variable_node.id)
+        self.assertEqual('C', variable_node.content_object.definition.name)
+        self.assertEqual(['B', 'C'], sorted(node.content_object.name for node in entry_point.get_children()
+                                            if isinstance(node.content_object, VariableDefinition)))
+
+    def test_update_remove_statement(self):
+        xml = etree.fromstring(self.get_xml())
+        next_element = xml.find('.//{*}next')
+        removed_block_id = int(next_element[0].get('id'))
+        next_element.getparent().remove(next_element)
+        removed = Node.objects.get(id=removed_block_id)
+        removed_ids = set(node.id for node in Node.get_tree(removed))
+        removed_ids.add(self.entry_point.get_children()[1].id)
+        removed_constant_id = removed.get_descendants().last().object_id
+
+        entry_point, queries = self.update(etree.tostring(xml).decode('utf-8'))
+
+        self.assertEqual(self.node_ids - removed_ids, set(node.id for node in Node.get_tree(entry_point)))
+        self.assertFalse(Node.objects.filter(id__in=removed_ids))
+        self.assertFalse(NumberConstant.objects.filter(id=removed_constant_id))
+        # unused variable definition is removed
+        self.assertEqual(['A'], [node.content_object.name for node in entry_point.get_children()
+                                 if isinstance(node.content_object, VariableDefinition)])
+
+    def test_update_insert_statement(self):
+        xml = etree.fromstring(self.get_xml())
+        last_block = xml.findall('.//{*}block[@type="variables_set"]')[-1]
+        next_element = etree.SubElement(last_block, 'next')
+        new_block = etree.SubElement(next_element, 'block', type='variables_set', id='new_block')
+        etree.SubElement(new_block, 'field', name='VAR').text = 'C'
+        value = etree.SubElement(new_block, 'value', name='VALUE')
+        constant = etree.SubElement(value, 'block', type='math_number', id='new_constant')
+        etree.SubElement(constant, 'field', name='NUM').text = '4'
+
+        entry_point, queries = self.update(etree.tostring(xml).decode('utf-8'))
+
+        node_ids = set(node.id for node in Node.get_tree(entry_point))
+        self.assertTrue(self.node_ids < node_ids)
+        # variable definition, assignment, variable, constant
+        self.assertEqual(4, len(node_ids - self.node_ids))
+
+    def test_update_move_statement(self):
+        xml = etree.fromstring(self.get_xml())
+        first, second = xml.findall('.//{*}block[@type="variables_set"]')
+        first_ids = (first.get('id'), first.find('{*}value/{*}block').get('id'))
+        second.getparent().remove(second)
+        first.remove(first.find('{*}next'))
+        xml.remove(first)
+        xml.append(second)
+        etree.SubElement(second, 'next').append(first)
+
+        entry_point, queries = self.update(etree.tostring(xml).decode('utf-8'))
+
+        self.assertEqual(self.node_ids, set(node.id for node in Node.get_tree(entry_point)))
+        self.assertFalse([sql for sql in queries if sql.startswith('INSERT') or sql.startswith('DELETE')])
+        moved = Node.objects.get(id=first_ids[0])
+        self.assertEqual(int(first_ids[1]), moved.get_children()[1].id)
+
+    def test_update_should_ignore_foreign_block_ids(self):
+        other = NodeTreeCreator().create(BlocklyXmlParser().parse(self.xml)[0])
+        xml = self.build_xml(other)
+
+        entry_point, queries = self.update(xml)
+
+        # root and variable definitions
+        self.assertEqual(3, len(set(node.id for node in Node.get_tree(entry_point)) & self.node_ids))
+        self.assertEqual(len(self.node_ids), Node.objects.filter(tree_id=other.tree_id).count())
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from .common import *
+from ..test_foreach import FOREACH_XML
 
 
 class BlocklyXmlParserTestCase(TestCase):
@@ -164,6 +165,18 @@ class BlocklyXmlParserAssignmentTest(BlocklyXmlParserTestCase):
         self.assertEqual(get_content_type_id(NumberConstant), constant_data['content_type'])
         self.assertEqual(1, constant_data['value'])
 
+    def test_block_ids(self):
+        entry_point = variable_assign_value()
+        assignment_node, variable_node, constant_node = entry_point.get_descendants()[1:]
+
+        root = BlocklyXmlParser().parse(self.build_xml(assignment_node))[0]
+        variable, constant = root['children']
+
+        self.assertEqual(str(assignment_node.id), root['id'])
+        # variable is a field of assignment block
+        self.assertNotIn('id', variable)
+        self.assertEqual(str(constant_node.id), constant['id'])
+
 
 class BlocklyXmlParserBinaryOperatorTest(BlocklyXmlParserTestCase):
 
@@ -384,11 +397,11 @@ class BlocklyXmlParserArgumentFieldTest(TestCase):
 
     def test_argument_field_set(self):
         root = variable_assign_value(variable_name='argument.field')
-        xml_str = BlocklyXmlBuilder().build(root)
+        xml_str = cleanup_xml_ids(BlocklyXmlBuilder().build(root))
         parsed_argument_field_set = BlocklyXmlParser().parse(xml_str)
 
         root = variable_assign_value(variable_name='X')
-        xml_str = BlocklyXmlBuilder().build(root)
+        xml_str = cleanup_xml_ids(BlocklyXmlBuilder().build(root))
         parsed_variable_set = BlocklyXmlParser().parse(xml_str)
 
         # replace variable name
@@ -400,13 +413,13 @@ class BlocklyXmlParserArgumentFieldTest(TestCase):
         variable_definition = VariableDefinition.objects.create(name='argument.field')
         variable = Variable.objects.create(definition=variable_definition)
         root = Node.add_root(content_object=variable)
-        xml_str = BlocklyXmlBuilder().build(root)
+        xml_str = cleanup_xml_ids(BlocklyXmlBuilder().build(root))
         parsed_argument_field_get = BlocklyXmlParser().parse(xml_str)
 
         variable_definition = VariableDefinition.objects.create(name='X')
         variable = Variable.objects.create(definition=variable_definition)
         root = Node.add_root(content_object=variable)
-        xml_str = BlocklyXmlBuilder().build(root)
+        xml_str = cleanup_xml_ids(BlocklyXmlBuilder().build(root))
         parsed_variable_get = BlocklyXmlParser().parse(xml_str)
 
         # replace variable name
@@ -428,3 +441,44 @@ class BlocklyXmlParserFunctionTest(TestCase):
 
         self.assertEqual(get_content_type_id(Function), parsed_function['data']['content_type'])
         self.assertEqual(function_definition.id, parsed_function['data']['definition_id'])
+
+
+class BlocklyXmlParserForeachStatementTest(BlocklyXmlParserTestCase):
+
+    def test_parse_foreach(self):
+        parsed = BlocklyXmlParser().parse(FOREACH_XML)[0]
+        self.assertEqual(get_content_type_id(ForeachStatement), parsed['data']['content_type'])
+
+        variable, iterable, statement = parsed['children']
+        self.assertEqual(dict(content_type=get_content_type_id(Variable), name='item'), variable['data'])
+        self.assertEqual(dict(content_type=get_content_type_id(Variable), name='items'), iterable['data'])
+
+        # block of if statement and assignment
+        self.assertEqual({}, statement['data'])
+        if_statement = statement['children'][0]
+        self.assertEqual(get_content_type_id(IfStatement), if_statement['data']['content_type'])
+        self.assertEqual(dict(content_type=get_content_type_id(BreakLoop)), if_statement['children'][1]['data'])
+
+    def test_build_parse(self):
+        root = NodeTreeCreator().create(BlocklyXmlParser().parse(FOREACH_XML)[0])
+        foreach_node = root.get_children().last()
+        xml_str = self.build_xml(foreach_node)
+        self.assertEqual(BlocklyXmlParser().parse(FOREACH_XML), BlocklyXmlParser().parse(cleanup_xml_ids(xml_str)))
+
+    def test_parse_without_list(self):
+        xml_str = '<xml><block type="controls_forEach"><field name="VAR">item</field></block></xml>'
+
+        with self.assertRaises(BlocklyXmlParserException):
+            BlocklyXmlParser().parse(xml_str)
+
+    def test_parse_break_outside_of_loop(self):
+        xml_str = '<xml><block type="controls_flow_statements"><field name="FLOW">BREAK</field></block></xml>'
+
+        with self.assertRaises(BlocklyXmlParserException):
+            BlocklyXmlParser().parse(xml_str)
+
+    def test_parse_continue(self):
+        xml_str = FOREACH_XML.replace('<field name="FLOW">BREAK</field>', '<field name="FLOW">CONTINUE</field>')
+
+        with self.assertRaises(BlocklyXmlParserException):
+            BlocklyXmlParser().parse(xml_str)
@@ -8,7 +8,7 @@ from pprint import pprint
 
 from django.contrib.auth.models import User
 from django.urls import reverse
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.utils import timezone
 
 from business_logic.blockly.build import *
@@ -24,7 +24,7 @@ from .test_app.models import *
 from .utils import *
 
 
-class ProgramTestBase(TestCase):
+class ProgramTestMixin(object):
     field_list = (
         'int_value',
         'string_value',
@@ -63,3 +63,7 @@ class ProgramTestBase(TestCase):
 
     def create_entry_point(self):
         return get_test_tree()
+
+
+class ProgramTestBase(ProgramTestMixin, TestCase):
+    pass
@@ -65,3 +65,57 @@ class LogRestTest(ProgramRestTestBase):
                 sorted(['node', 'previous_value', 'current_value', 'exception', 'children']), sorted(log_entry.keys()))
 
             self.assertIsInstance(log_entry['children'], list)
+
+
+class ProfileRestTest(ProgramRestTestBase):
+
+    def setUp(self):
+        super(ProfileRestTest, self).setUp()
+        for i in range(2):
+            self.context = Context(profile=True, debug=True)
+            self.program_version.execute(test_model=self.test_model, context=self.context)
+
+    def test_execution_profile(self):
+        url = reverse('business-logic:rest:execution-profile', kwargs=dict(pk=self.context.execution.id))
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code, response.content)
+        _json = response_json(response)
+
+        self.assertEqual(self.program_version.entry_point_id, _json['node'])
+        self.assertEqual(1, _json['calls'])
+        self.assertEqual(sorted(['name', 'node', 'value', 'calls', 'children']), sorted(_json.keys()))
+
+    def test_program_version_profile(self):
+        url = reverse('business-logic:rest:program-version-profile', kwargs=dict(pk=self.program_version.id))
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code, response.content)
+        _json = response_json(response)
+
+        self.assertEqual(self.program_version.entry_point_id, _json['node'])
+        self.assertEqual(2, _json['calls'])
+        self.assertTrue(_json['children'])
+
+
+class MetricsRestTest(ProgramRestTestBase):
+
+    def setUp(self):
+        super(MetricsRestTest, self).setUp()
+        metrics_collector.clear()
+        self.program_version.execute(test_model=self.test_model)
+        metrics_collector.flush()
+        self.program_version.execute(test_model=self.test_model)
+        self.url = reverse('business-logic:rest:program-version-metrics', kwargs=dict(pk=self.program_version.id))
+
+    def test_metrics(self):
+        response = self.client.get(self.url)
+        self.assertEqual(200, response.status_code, response.content)
+        _json = response_json(response)
+        self.assertEqual(sorted(['executions', 'errors', 'p50', 'p95', 'p99']), sorted(_json.keys()))
+        self.assertEqual(2, _json['executions'])
+
+    def test_metrics_since(self):
+        response = self.client.get(self.url, dict(since='2100-01-01T00:00:00Z'))
+        self.assertEqual(1, response_json(response)['executions'])
+
+        response = self.client.get(self.url, dict(since='yesterday'))
+        self.assertEqual(400, response.status_code)
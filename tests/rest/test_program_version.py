@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
 
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from .common import *
 
 
@@ -56,13 +61,10 @@ class ProgramVersionRESTTest(TestCase):
         self.assertIsInstance(_json, dict)
         self.assertEqual(cleanup_xml_ids(xml), cleanup_xml_ids(_json['xml']))
 
-        response = self.client.get(url)
-        _json = response_json(response)
-
+        # tree is updated in place
         program_version = ProgramVersion.objects.get(id=self.program_version.id)
-        self.assertNotEqual(old_entry_point_id, program_version.entry_point_id)
-
-        self.assertFalse(Node.objects.filter(id=old_entry_point_id))
+        self.assertEqual(old_entry_point_id, program_version.entry_point_id)
+        self.assertEqual(xml, _json['xml'])
 
     def test_program_version_update_should_validate_xml(self):
         url = reverse('business-logic:rest:program-version', kwargs=dict(pk=self.program_version.id))
@@ -78,3 +80,61 @@ class ProgramVersionRESTTest(TestCase):
 
         _json = response_json(response)
         self.assertNotIn('XMLSyntaxError:', _json['xml'][0])
+
+    def test_program_version_view_etag(self):
+        url = reverse('business-logic:rest:program-version', kwargs=dict(pk=self.program_version.id))
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(etag)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response['ETag'])
+        self.assertFalse([query for query in queries.captured_queries if 'business_logic_node' in query['sql']])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(200, response.status_code)
+
+    def test_program_version_update_should_change_etag(self):
+        url = reverse('business-logic:rest:program-version', kwargs=dict(pk=self.program_version.id))
+        etag = self.client.get(url)['ETag']
+        xml = self.xml.replace('>1.0<', '>3.0<')
+        self.client.put(url, json.dumps(dict(program=self.program.id, xml=xml)))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+        self.assertEqual(cleanup_xml_ids(xml), cleanup_xml_ids(response_json(response)['xml']))
+
+    def test_program_version_update_should_parse_xml_once(self):
+        url = reverse('business-logic:rest:program-version', kwargs=dict(pk=self.program_version.id))
+
+        with mock.patch.object(BlocklyXmlParser, 'parse', autospec=True, side_effect=BlocklyXmlParser.parse) as parse:
+            response = self.client.put(url, json.dumps(dict(program=self.program.id, xml=self.xml)))
+
+        self.assertEqual(200, response.status_code, response.content)
+        self.assertEqual(1, parse.call_count)
+
+    def test_program_version_update_should_not_recreate_tree(self):
+        url = reverse('business-logic:rest:program-version', kwargs=dict(pk=self.program_version.id))
+        node_ids = list(Node.get_tree(self.program_version.entry_point).values_list('id', flat=True))
+        xml = self.xml.replace('>1.0<', '>3.0<')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(url, json.dumps(dict(program=self.program.id, xml=xml)))
+
+        self.assertEqual(200, response.status_code, response.content)
+        self.assertEqual(node_ids, list(Node.get_tree(self.program_version.entry_point).values_list('id', flat=True)))
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT') or query['sql'].startswith('DELETE')
+        ])
+
+    def test_program_version_create_should_validate_xml(self):
+        url = reverse('business-logic:rest:program-version-create')
+        nodes_count = Node.objects.count()
+        response = self.client.post(url, json.dumps(dict(program=self.program.id, xml=self.xml + '<')))
+        self.assertEqual(400, response.status_code, response.content)
+        self.assertEqual(nodes_count, Node.objects.count())
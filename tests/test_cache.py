@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+
+import datetime
+
+from .common import *
+
+
+class ProgramCacheTest(ProgramTestBase):
+
+    def setUp(self):
+        super(ProgramCacheTest, self).setUp()
+        self.cache = ProgramCache(max_size=2)
+
+    def test_get(self):
+        program = self.cache.get(self.program_version)
+        self.assertIsInstance(program, CachedProgram)
+        self.assertEqual(self.program_version.entry_point_id, program.entry_point.id)
+        self.assertIs(program, self.cache.get(self.program_version))
+        self.assertEqual(dict(size=1, max_size=2, hits=1, misses=1, evictions=0), self.cache.get_stats())
+
+    def test_hit_should_not_query_db(self):
+        self.cache.get(self.program_version).compiled
+        program_version = ProgramVersion.objects.get(id=self.program_version.id)
+
+        with self.assertNumQueries(0):
+            program = self.cache.get(program_version)
+            program.compiled(Context())
+            context = Context()
+            context.set_node_cache(program.node_cache)
+            program.entry_point.interpret(context)
+
+    def test_xml(self):
+        program = self.cache.get(self.program_version)
+        self.assertEqual(BlocklyXmlBuilder().build(self.program_version.entry_point), program.xml)
+
+        with self.assertNumQueries(0):
+            self.assertIs(program.xml, self.cache.get(self.program_version).xml)
+
+    def test_modification_time_change(self):
+        program = self.cache.get(self.program_version)
+        self.program_version.modification_time += datetime.timedelta(seconds=1)
+        self.assertIsNot(program, self.cache.get(self.program_version))
+        self.assertEqual(2, self.cache.misses)
+
+    def test_eviction(self):
+        program_versions = [self.program_version] + [
+            ProgramVersion.objects.create(program=self.program, entry_point=variable_assign_value()) for _ in range(2)
+        ]
+        for program_version in program_versions:
+            self.cache.get(program_version)
+
+        self.assertEqual(2, len(self.cache))
+        self.assertEqual(1, self.cache.evictions)
+        self.cache.get(program_versions[0])
+        self.assertEqual(4, self.cache.misses)
+
+    def test_clear(self):
+        self.cache.get(self.program_version)
+        self.cache.clear()
+        self.assertEqual(dict(size=0, max_size=2, hits=0, misses=0, evictions=0), self.cache.get_stats())
+
+    def test_disabled(self):
+        cache = ProgramCache(max_size=0)
+        cache.get(self.program_version)
+        self.assertEqual(0, len(cache))
+
+
+class ProgramVersionCacheTest(ProgramTestBase):
+
+    def test_execute_should_use_cache(self):
+        self.program_version.execute(test_model=self.test_model)
+        hits = program_cache.hits
+        context = self.program_version.execute(test_model=self.test_model)
+        self.assertEqual(hits + 1, program_cache.hits)
+        self.assertEqual(1 + 2 * 3, context.get_variable(VariableDefinition.objects.get(name='A')))
+
+    def test_save_should_invalidate(self):
+        program = program_cache.get(self.program_version)
+        self.program_version.save()
+        self.assertIsNot(program, program_cache.get(self.program_version))
+
+    def test_delete_should_invalidate(self):
+        program_cache.get(self.program_version)
+        size = len(program_cache)
+        self.program_version.delete()
+        self.assertEqual(size - 1, len(program_cache))
+
+    def create_reference_program(self):
+        variable_definition = self.fields['foreign_value'].variable_definition
+        related_model = RelatedModel.objects.create(int_value=1)
+
+        root = Node.add_root()
+        assignment_node = root.add_child(content_object=Assignment())
+        assignment_node.add_child(content_object=Variable(definition=variable_definition))
+        constant_node = assignment_node.add_child(content_object=ReferenceConstant())
+        constant_node.add_child(content_object=related_model)
+
+        self.program_version.entry_point = Node.objects.get(id=root.id)
+        self.program_version.save()
+
+        return variable_definition, related_model
+
+    def test_referenced_objects_should_not_be_cached(self):
+        variable_definition, related_model = self.create_reference_program()
+
+        for kwargs in (dict(), dict(log=True)):
+            with Context(**kwargs) as context:
+                first = self.program_version.execute(context, test_model=self.test_model).get_variable(
+                    variable_definition)
+            first.int_value = 999
+            RelatedModel.objects.filter(id=related_model.id).update(int_value=42)
+
+            with Context(**kwargs) as context:
+                second = self.program_version.execute(context, test_model=self.test_model).get_variable(
+                    variable_definition)
+
+            self.assertIsNot(first, second)
+            self.assertEqual(42, second.int_value)
+            RelatedModel.objects.filter(id=related_model.id).update(int_value=1)
+
+        self.assertFalse([
+            node for node in program_cache.get(self.program_version).node_cache._node_by_id.values()
+            if Node.content_object.is_cached(node) and isinstance(node.content_object, RelatedModel)
+        ])
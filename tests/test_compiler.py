@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+#
+
+import timeit
+
+from .common import *
+
+
+def not_builtin_bin(x):
+    return bin(int(x))
+
+
+class NodeCompilerTest(TestCase):
+
+    def interpret(self, node, **kwargs):
+        context = Context(**kwargs)
+        return NodeCompiler().compile(node)(context), context
+
+    def test_compile_tree(self):
+        root = tree_1plus2mul3()
+        result, context = self.interpret(root)
+        self.assertEqual(1 + 2 * 3, result)
+        self.assertFalse(context.frames)
+
+    def test_compile_symmetric_tree(self):
+        root = symmetric_tree(operator='*', count=4, value=5)
+        result, context = self.interpret(root)
+        self.assertEqual(625, result)
+
+    def test_compile_block_should_return_none(self):
+        root = Node.add_root()
+        tree_1plus2mul3(parent=root)
+        root = Node.objects.get(id=root.id)
+        result, context = self.interpret(root)
+        self.assertIsNone(result)
+        self.assertFalse(context.frames)
+
+    def test_compile_assignment(self):
+        root = get_test_tree()
+        result, context = self.interpret(root)
+        self.assertEqual(1 + 2 * 3, context.get_variable(VariableDefinition.objects.get(name='A')))
+
+    def test_compile_if_statement(self):
+        root, var_defs = create_if_statement(6)
+        compiled = NodeCompiler().compile(root)
+
+        context = Context()
+        context.set_variable(var_defs['ElseIfCondition2'], True)
+        compiled(context)
+        self.assertFalse(context.get_variable(var_defs['IfEnter']))
+        self.assertFalse(context.get_variable(var_defs['ElseIfEnter1']))
+        self.assertTrue(context.get_variable(var_defs['ElseIfEnter2']))
+
+        context = Context()
+        context.set_variable(var_defs['IfCondition'], True)
+        compiled(context)
+        self.assertTrue(context.get_variable(var_defs['IfEnter']))
+        self.assertFalse(context.get_variable(var_defs['ElseIfEnter2']))
+
+    def test_compile_reference_constant(self):
+        root = Node.add_root(content_object=ReferenceConstant.objects.create())
+        test_model = Model.objects.create()
+        root.add_child(content_object=test_model)
+        root = Node.objects.get(id=root.id)
+        result, context = self.interpret(root)
+        self.assertEqual(test_model, result)
+
+    def test_compile_function(self):
+        root = Node.add_root()
+        func_def = PythonModuleFunctionDefinition.objects.create(module=__name__, function='not_builtin_bin')
+        func_node = root.add_child(content_object=Function(definition=func_def))
+        func_node.add_child(content_object=NumberConstant(value=3))
+        func_node = Node.objects.get(id=func_node.id)
+        result, context = self.interpret(func_node)
+        self.assertEqual('0b11', result)
+
+    def test_compile_stop(self):
+        root = Node.add_root()
+        node1 = root.add_child()
+        node1.add_child(content_object=StopInterpretation())
+        root = Node.objects.get(id=root.id)
+        node2 = root.add_child()
+        variable_assign_value(parent=node2)
+        root = Node.objects.get(id=root.id)
+        result, context = self.interpret(root)
+        self.assertIsInstance(context.get_variable(VariableDefinition.objects.get(name='A')), Variable.Undefined)
+        self.assertFalse(context.frames)
+
+    def test_compile_should_handle_exception(self):
+        root = symmetric_tree(operator='/', value=0, count=2)
+        result, context = self.interpret(root)
+        self.assertIsNone(result)
+
+    def test_compile_exception_handling_policy(self):
+        root = Node.add_root()
+        symmetric_tree(operator='/', value=0, count=2, parent=root)
+        root = Node.objects.get(id=root.id)
+        variable_assign_value(parent=root.add_child())
+        root = Node.objects.get(id=root.id)
+        variable_definition = VariableDefinition.objects.get(name='A')
+
+        result, context = self.interpret(root)
+        self.assertIsInstance(context.get_variable(variable_definition), Variable.Undefined)
+
+        result, context = self.interpret(root, exception_handling_policy=ExceptionHandlingPolicy.IGNORE)
+        self.assertEqual(1, context.get_variable(variable_definition))
+
+    def test_compile_exception_signal(self):
+        root = symmetric_tree(operator='/', value=0, count=2)
+        exceptions = []
+
+        def on_interpret_exception(**kwargs):
+            exceptions.append(kwargs['exception'])
+
+        signals.interpret_exception.connect(on_interpret_exception)
+        try:
+            self.interpret(root)
+        finally:
+            signals.interpret_exception.disconnect(on_interpret_exception)
+
+        self.assertEqual(1, len(exceptions))
+        self.assertIsInstance(exceptions[0], ZeroDivisionError)
+
+    def test_compiled_interpretation_should_not_query_db(self):
+        root = get_test_tree()
+        compiled = NodeCompiler().compile(root)
+
+        with self.assertNumQueries(0):
+            compiled(Context())
+
+
+class NodeCompilerOptimizationTest(TestCase):
+
+    def create_if_statement(self, *conditions):
+        """
+        Creates block with variable definition and if statement, each branch assigns its index to variable.
+        """
+        root = Node.add_root()
+        variable_definition = VariableDefinition.objects.create(name='Branch')
+        root.add_child(content_object=variable_definition)
+        root = Node.objects.get(id=root.id)
+        if_statement = root.add_child(content_object=IfStatement())
+
+        for i, condition in enumerate(conditions + (None, )):
+            if condition is not None:
+                Node.objects.get(id=if_statement.id).add_child(content_object=condition)
+            variable_assign_value(
+                variable_definition=variable_definition, value=NumberConstant(value=i),
+                parent=Node.objects.get(id=if_statement.id))
+
+        return Node.objects.get(id=root.id), variable_definition
+
+    def test_fold_binary_operator(self):
+        root = tree_1plus2mul3()
+        compiler = NodeCompiler()
+        compiled = compiler.compile_node(root)
+        self.assertTrue(compiler.is_constant(compiled))
+        self.assertEqual(1 + 2 * 3, compiled(Context()))
+
+    def test_fold_should_not_change_tree(self):
+        root = tree_1plus2mul3()
+        nodes = list(Node.objects.values_list('id', 'content_type', 'object_id'))
+        NodeCompiler().compile(root)
+        self.assertEqual(nodes, list(Node.objects.values_list('id', 'content_type', 'object_id')))
+
+    def test_fold_should_skip_variables(self):
+        root = get_test_tree()
+        compiler = NodeCompiler()
+        assignment = compiler.get_children(root)[1]
+        self.assertFalse(compiler.is_constant(compiler.compile_node(assignment)))
+        # right hand side is folded
+        self.assertTrue(compiler.is_constant(compiler.compile_node(compiler.get_children(assignment)[1])))
+
+    def test_fold_should_leave_exception_to_runtime(self):
+        root = symmetric_tree(operator='/', value=0, count=2)
+        compiler = NodeCompiler()
+        self.assertFalse(compiler.is_constant(compiler.compile_node(root)))
+
+    def test_prune_false_branch(self):
+        root, variable_definition = self.create_if_statement(
+            BooleanConstant(value=False), BooleanConstant(value=False))
+        context = Context()
+        NodeCompiler().compile(root)(context)
+        self.assertEqual(2, context.get_variable(variable_definition))
+
+    def test_prune_after_true_branch(self):
+        root, variable_definition = self.create_if_statement(
+            Variable(definition=VariableDefinition.objects.create(name='Condition')), BooleanConstant(value=True))
+        context = Context()
+        NodeCompiler().compile(root)(context)
+        self.assertEqual(1, context.get_variable(variable_definition))
+
+    def test_prune_all_branches(self):
+        root = Node.add_root(content_object=IfStatement())
+        root.add_child(content_object=BooleanConstant(value=False))
+        variable_assign_value(
+            variable_definition=VariableDefinition.objects.create(name='A'), parent=Node.objects.get(id=root.id))
+        compiler = NodeCompiler()
+        self.assertTrue(compiler.is_constant(compiler.compile_node(Node.objects.get(id=root.id))))
+
+    def test_drop_empty_blocks(self):
+        root = Node.add_root()
+        block = root.add_child()
+        block.add_child(content_object=NumberConstant(value=1))
+        Node.objects.get(id=root.id).add_child()
+        compiler = NodeCompiler()
+        compiled = compiler.compile_node(Node.objects.get(id=root.id))
+        self.assertTrue(compiler.is_constant(compiled))
+
+    def test_optimize_disabled(self):
+        root, variable_definition = self.create_if_statement(BooleanConstant(value=False))
+        compiler = NodeCompiler(optimize=False)
+        self.assertFalse(compiler.is_constant(compiler.compile_node(tree_1plus2mul3())))
+        context = Context()
+        NodeCompiler(optimize=False).compile(root)(context)
+        self.assertEqual(1, context.get_variable(variable_definition))
+
+    @benchmark
+    def test_benchmark(self):
+        root = Node.add_root()
+        for _ in range(20):
+            symmetric_tree(count=16, parent=Node.objects.get(id=root.id))
+        root = Node.objects.get(id=root.id)
+        optimized = NodeCompiler().compile(root)
+        not_optimized = NodeCompiler(optimize=False).compile(root)
+        context = Context()
+
+        optimized_time = min(timeit.repeat(lambda: optimized(context), number=100, repeat=3))
+        not_optimized_time = min(timeit.repeat(lambda: not_optimized(context), number=100, repeat=3))
+        self.assertLess(optimized_time * 5, not_optimized_time)
+
+
+class ProgramCompiledExecutionTest(ProgramTestBase):
+
+    def setUp(self):
+        super(ProgramCompiledExecutionTest, self).setUp()
+        self.entered = []
+        signals.interpret_enter.connect(self.on_interpret_enter)
+
+    def tearDown(self):
+        signals.interpret_enter.disconnect(self.on_interpret_enter)
+
+    def on_interpret_enter(self, **kwargs):
+        self.entered.append(kwargs['node'])
+
+    def test_execute_compiled(self):
+        context = self.program_version.execute(test_model=self.test_model)
+        self.assertEqual(1 + 2 * 3, context.get_variable(VariableDefinition.objects.get(name='A')))
+        self.assertFalse(self.entered)
+
+    def test_execute_compiled_once(self):
+        self.program_version.execute(test_model=self.test_model)
+        compiled = self.program_version.get_compiled_entry_point()
+        self.program_version.execute(test_model=self.test_model)
+        self.assertIs(compiled, self.program_version.get_compiled_entry_point())
+
+    def test_execute_compile_disabled(self):
+        context = self.program_version.execute(context=Context(compile=False), test_model=self.test_model)
+        self.assertEqual(1 + 2 * 3, context.get_variable(VariableDefinition.objects.get(name='A')))
+        self.assertTrue(self.entered)
+
+    def test_execute_log_should_not_use_compiled(self):
+        self.program_version.execute(context=Context(log=True), test_model=self.test_model)
+        self.assertTrue(self.entered)
+
+    def test_entry_point_change_should_recompile(self):
+        self.program_version.execute(test_model=self.test_model)
+        compiled = self.program_version.get_compiled_entry_point()
+        self.program_version.entry_point = variable_assign_value(value=NumberConstant(value=5))
+        self.program_version.save()
+        self.assertIsNot(compiled, self.program_version.get_compiled_entry_point())
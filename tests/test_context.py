@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 #
 
+import gc
+import timeit
+
 from django.test import TestCase
 from django.conf import settings
 from django.db import connection
@@ -21,3 +24,101 @@ class ContextTest(TestCase):
     def test_init_args_check(self):
         context = Context(log=True)
         self.assertRaises(TypeError, Context, wtf=True)
+
+
+class ContextLifecycleTest(TestCase):
+
+    signals = (
+        signals.block_interpret_enter,
+        signals.block_interpret_leave,
+        signals.interpret_enter,
+        signals.interpret_leave,
+        signals.interpret_exception,
+    )
+
+    def has_listeners(self, context):
+        return [signal.has_listeners(context) for signal in self.signals]
+
+    def assertNoListeners(self, context):
+        # receivers connected for any sender (e.g. by metrics collector) are not checked
+        self.assertEqual(self.has_listeners(object()), self.has_listeners(context))
+
+    def test_close(self):
+        context = Context(log=True)
+        self.assertEqual([True] * len(self.signals), self.has_listeners(context))
+        context.close()
+        self.assertNoListeners(context)
+
+    def test_context_manager(self):
+        root = tree_1plus2mul3()
+        with Context() as context:
+            self.assertEqual(7, root.interpret(context))
+        self.assertNoListeners(context)
+
+    def test_single_statement_receiver_disconnected(self):
+        root = tree_1plus2mul3()
+        context = Context(fast_interpret=True)
+        context.connect(signals.interpret_enter, context.interpret_enter)
+        root.interpret(context)
+        self.assertFalse(signals.interpret_leave.has_listeners(context))
+        self.assertFalse(context.frames)
+
+    def test_program_execute_should_close_own_context(self):
+        program_interface = ProgramInterface.objects.create(code='test')
+        program = Program.objects.create(program_interface=program_interface, title='test', code='test')
+        program_version = ProgramVersion.objects.create(program=program, entry_point=get_test_tree())
+
+        context = program_version.execute()
+        self.assertEqual(7, context.get_variable(VariableDefinition.objects.get(name='A')))
+        self.assertNoListeners(context)
+
+    def test_executions_should_not_grow_receivers(self):
+        root = Node.add_root(content_object=NumberConstant.objects.create(value=1))
+        node_cache = NodeCache()
+        node_cache.initialize(root)
+
+        def execute(times):
+            for _ in range(times):
+                with Context(log=True, profile=True) as context:
+                    context.set_node_cache(node_cache)
+                    root.interpret(context)
+
+        # first execution clears receivers of contexts garbage collected before
+        execute(1)
+        receivers = [len(signal.receivers) for signal in self.signals]
+
+        execute(100)
+        self.assertEqual(receivers, [len(signal.receivers) for signal in self.signals])
+
+
+@benchmark
+class ContextSoakTest(TestCase):
+
+    def send_time(self):
+        sender = object()
+        return min(timeit.repeat(lambda: signals.interpret_enter.send(sender=sender), number=100, repeat=5))
+
+    def test_executions_should_not_grow_memory(self):
+        root = Node.add_root(content_object=NumberConstant.objects.create(value=1))
+        node_cache = NodeCache()
+        node_cache.initialize(root)
+        count = 100000
+
+        def execute(times):
+            for _ in range(times):
+                with Context() as context:
+                    context.set_node_cache(node_cache)
+                    root.interpret(context)
+
+        execute(count // 10)
+        gc.collect()
+        initial_send_time = self.send_time()
+        initial_objects = len(gc.get_objects())
+        receivers = len(signals.interpret_enter.receivers)
+
+        execute(count - count // 10)
+
+        gc.collect()
+        self.assertLessEqual(len(signals.interpret_enter.receivers), receivers)
+        self.assertLess(len(gc.get_objects()) - initial_objects, 1000)
+        self.assertLess(self.send_time(), initial_send_time * 2)
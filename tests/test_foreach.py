@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+#
+
+from unittest import mock
+
+from django.db import models
+
+from business_logic.exceptions import BreakLoopException
+
+from .common import *
+
+FOREACH_XML = '''
+<xml>
+  <block type="controls_forEach">
+    <field name="VAR">item</field>
+    <value name="LIST">
+      <block type="variables_get">
+        <field name="VAR">items</field>
+      </block>
+    </value>
+    <statement name="DO">
+      <block type="controls_if">
+        <value name="IF0">
+          <block type="logic_compare">
+            <field name="OP">EQ</field>
+            <value name="A">
+              <block type="variables_get">
+                <field name="VAR">item</field>
+              </block>
+            </value>
+            <value name="B">
+              <block type="math_number">
+                <field name="NUM">3</field>
+              </block>
+            </value>
+          </block>
+        </value>
+        <statement name="DO0">
+          <block type="controls_flow_statements">
+            <field name="FLOW">BREAK</field>
+          </block>
+        </statement>
+        <next>
+          <block type="variables_set">
+            <field name="VAR">total</field>
+            <value name="VALUE">
+              <block type="math_arithmetic">
+                <field name="OP">ADD</field>
+                <value name="A">
+                  <block type="variables_get">
+                    <field name="VAR">total</field>
+                  </block>
+                </value>
+                <value name="B">
+                  <block type="variables_get">
+                    <field name="VAR">item</field>
+                  </block>
+                </value>
+              </block>
+            </value>
+          </block>
+        </next>
+      </block>
+    </statement>
+  </block>
+</xml>
+'''
+
+
+class ForeachStatementTest(TestCase):
+
+    def setUp(self):
+        self.root = NodeTreeCreator().create(BlocklyXmlParser().parse(FOREACH_XML)[0])
+        self.variable_definitions = {
+            variable_definition.name: variable_definition
+            for variable_definition in VariableDefinition.objects.all()
+        }
+
+    def interpret(self, items, compile=False):
+        context = Context()
+        context.set_variable(self.variable_definitions['items'], items)
+        context.set_variable(self.variable_definitions['total'], 0)
+
+        if compile:
+            NodeCompiler().compile(self.root)(context)
+        else:
+            self.root.interpret(context)
+
+        return context
+
+    def get_variable(self, context, name):
+        return context.get_variable(self.variable_definitions[name])
+
+    def test_iterate_list(self):
+        for compile in (False, True):
+            context = self.interpret([1, 2, 4], compile=compile)
+            self.assertEqual(7, self.get_variable(context, 'total'))
+            self.assertEqual(4, self.get_variable(context, 'item'))
+
+    def test_break(self):
+        for compile in (False, True):
+            context = self.interpret([1, 2, 3, 4], compile=compile)
+            self.assertEqual(3, self.get_variable(context, 'total'))
+            self.assertEqual(3, self.get_variable(context, 'item'))
+
+    def test_empty(self):
+        for compile in (False, True):
+            context = self.interpret([], compile=compile)
+            self.assertEqual(0, self.get_variable(context, 'total'))
+            self.assertIsInstance(self.get_variable(context, 'item'), Variable.Undefined)
+
+    def test_not_iterable(self):
+        exceptions = []
+
+        def on_interpret_exception(**kwargs):
+            exceptions.append(kwargs['exception'])
+
+        signals.interpret_exception.connect(on_interpret_exception)
+        try:
+            for compile in (False, True):
+                context = self.interpret(5, compile=compile)
+                self.assertEqual(0, self.get_variable(context, 'total'))
+        finally:
+            signals.interpret_exception.disconnect(on_interpret_exception)
+
+        self.assertEqual(2, len(exceptions))
+        self.assertIsInstance(exceptions[0], TypeError)
+
+    def test_iterate_queryset(self):
+        objects = [Model.objects.create() for _ in range(5)]
+        queryset = Model.objects.order_by('id')
+
+        with mock.patch('business_logic.models.foreach.FOREACH_CHUNK_SIZE', 2), \
+                mock.patch.object(models.QuerySet, 'iterator', autospec=True,
+                                  side_effect=models.QuerySet.iterator) as iterator:
+            for compile in (False, True):
+                context = self.interpret(queryset, compile=compile)
+                self.assertEqual(objects[-1], self.get_variable(context, 'item'))
+
+        self.assertEqual(2, iterator.call_count)
+        self.assertEqual(dict(chunk_size=2), iterator.call_args[1])
+        self.assertIsNone(queryset._result_cache)
+
+    def test_iterate_manager(self):
+        related_model = RelatedModel.objects.create()
+        objects = [Model.objects.create(foreign_value=related_model) for _ in range(2)]
+        context = self.interpret(related_model.model_set)
+        self.assertEqual(objects[-1], self.get_variable(context, 'item'))
+
+    def test_break_outside_of_loop(self):
+        root = Node.add_root()
+        root.add_child(content_object=BreakLoop())
+        root = Node.objects.get(id=root.id)
+
+        with self.assertRaises(BreakLoopException):
+            root.interpret(Context())
+
+    def test_program_break_outside_of_loop(self):
+        root = Node.add_root()
+        root.add_child(content_object=BreakLoop())
+        variable_assign_value(parent=Node.objects.get(id=root.id))
+        root = Node.objects.get(id=root.id)
+        program_interface = ProgramInterface.objects.create(code='test')
+        program = Program.objects.create(program_interface=program_interface, title='test', code='test')
+        program_version = ProgramVersion.objects.create(program=program, entry_point=root)
+        variable_definition = VariableDefinition.objects.get(name='A')
+
+        for kwargs in (dict(cache=False), dict(compile=False), dict(compile=True)):
+            with Context(**kwargs) as context:
+                program_version.execute(context)
+            self.assertIsInstance(context.get_variable(variable_definition), Variable.Undefined)
@@ -71,3 +71,29 @@ class FrameTest(TestCase):
         root.interpret(context)
         self.assertFalse(context.frame)
         self.assertFalse(context.frames)
+
+    def test_fast_interpret_frames(self):
+        root = Node.add_root()
+        node1 = tree_1plus2mul3(parent=root)
+        root = Node.objects.get(id=root.id)
+        context = Context(fast_interpret=True)
+        frames = []
+
+        def on_interpret_leave(**kwargs):
+            frames.append((kwargs['node'], len(context.frames)))
+
+        signals.interpret_leave.connect(on_interpret_leave)
+        try:
+            root.interpret(context)
+        finally:
+            signals.interpret_leave.disconnect(on_interpret_leave)
+
+        self.assertIn((root, 1), frames)
+        self.assertIn((node1, 1), frames)
+        self.assertFalse(context.frames)
+
+    def test_fast_interpret_single_statement_frame(self):
+        root = tree_1plus2mul3()
+        context = Context(fast_interpret=True)
+        self.assertEqual(7, root.interpret(context))
+        self.assertFalse(context.frames)
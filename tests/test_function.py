@@ -1,6 +1,13 @@
 # -*- coding: utf-8 -*-
 #
 
+import time
+import timeit
+
+from unittest import mock
+
+from django.db.models.signals import post_delete, post_save
+
 from .common import *
 
 
@@ -64,6 +71,65 @@ class PythonModuleFunctionTest(TestCase):
         self.assertEqual(result, '3.0')
 
 
+class FunctionTableTest(TestCase):
+
+    def setUp(self):
+        function_table.clear()
+        self.func_def = PythonModuleFunctionDefinition.objects.create(module=__name__, function='not_builtin_bin')
+        root = Node.add_root(content_object=Function(definition=self.func_def))
+        root.add_child(content_object=NumberConstant(value=3))
+        self.root = Node.objects.get(id=root.id)
+        self.node_cache = NodeCache()
+        self.node_cache.initialize(self.root)
+
+    def interpret(self):
+        with Context() as context:
+            context.set_node_cache(self.node_cache)
+            return self.root.interpret(context)
+
+    def test_repeated_calls_should_not_query_db(self):
+        self.assertEqual('0b11', self.interpret())
+
+        with self.assertNumQueries(0):
+            with mock.patch('business_logic.models.function.import_module') as import_module:
+                self.assertEqual('0b11', self.interpret())
+                self.assertFalse(import_module.called)
+
+    def test_get(self):
+        function = function_table.get(self.func_def.id)
+        self.assertIs(function, function_table.get(self.func_def.id))
+        self.assertEqual('0b11', function(Context(), 3))
+
+    def test_save_should_invalidate(self):
+        self.interpret()
+        self.func_def.function = 'bin_with_context'
+        self.func_def.is_context_required = True
+        self.func_def.save()
+        self.assertEqual('0b11', self.interpret()[1])
+
+    def test_change_by_other_process_should_expire(self):
+        function = function_table.get(self.func_def.id)
+        PythonModuleFunctionDefinition.objects.filter(id=self.func_def.id).update(function='bin_with_context')
+
+        with mock.patch('business_logic.models.function.time.monotonic', return_value=time.monotonic() + 59):
+            self.assertIs(function, function_table.get(self.func_def.id))
+
+        with mock.patch('business_logic.models.function.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNot(function, function_table.get(self.func_def.id))
+
+    def test_save_of_other_models_should_not_be_received(self):
+        self.assertFalse(post_save.has_listeners(NumberConstant))
+        self.assertTrue(post_save.has_listeners(PythonCodeFunctionDefinition))
+        self.assertFalse(post_delete.has_listeners(NumberConstant))
+        self.assertTrue(post_delete.has_listeners(FunctionArgument))
+
+    def test_delete_should_invalidate(self):
+        function = function_table.get(self.func_def.id)
+        self.func_def.delete()
+        with self.assertRaises(FunctionDefinition.DoesNotExist):
+            function_table.get(self.func_def.id)
+
+
 class PythonCodeFunctionTest(TestCase):
 
     def test_arguments(self):
@@ -111,3 +177,56 @@ def function(context, arg1, another_arg):
 
         result = func_node.interpret(context)
         self.assertEqual((context, '3.0'), result)
+
+
+class PythonCodeFunctionTableTest(TestCase):
+
+    def setUp(self):
+        function_table.clear()
+        self.function_definition = PythonCodeFunctionDefinition.objects.create(code='''
+def function(a, b):
+    return a - b
+''')
+        self.arguments = [
+            FunctionArgument.objects.create(name=argument_name, order=i, function=self.function_definition)
+            for i, argument_name in enumerate(('a', 'b'))
+        ]
+
+    def test_cached_call_should_not_query_db(self):
+        function = function_table.get(self.function_definition.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(2, function(Context(), 5, 3))
+
+    def test_argument_change_should_invalidate(self):
+        self.assertEqual(2, function_table.get(self.function_definition.id)(Context(), 5, 3))
+        self.arguments[0].order = 2
+        self.arguments[0].save()
+        self.assertEqual(-2, function_table.get(self.function_definition.id)(Context(), 5, 3))
+
+        self.arguments[1].delete()
+        self.arguments[0].name = 'b'
+        self.arguments[0].save()
+        FunctionArgument.objects.create(name='a', order=3, function=self.function_definition)
+        self.assertEqual(-2, function_table.get(self.function_definition.id)(Context(), 5, 3))
+
+    def test_code_change_should_invalidate(self):
+        function_table.get(self.function_definition.id)
+        self.function_definition.code = self.function_definition.code.replace('-', '+')
+        self.function_definition.save()
+        self.assertEqual(8, function_table.get(self.function_definition.id)(Context(), 5, 3))
+
+    def test_exception_should_be_logged(self):
+        function = function_table.get(self.function_definition.id)
+        with self.assertLogs('business_logic.models.function', 'ERROR') as logs:
+            self.assertIsNone(function(Context(), 'a', 1))
+        self.assertIn('TypeError', logs.output[0])
+
+    @benchmark
+    def test_benchmark(self):
+        context = Context()
+        function_definition = PythonCodeFunctionDefinition.objects.get(id=self.function_definition.id)
+        function = function_table.get(self.function_definition.id)
+
+        uncached = min(timeit.repeat(lambda: function_definition.call(context, 5, 3), number=100, repeat=3))
+        cached = min(timeit.repeat(lambda: function(context, 5, 3), number=100, repeat=3))
+        self.assertLess(cached * 3, uncached)
@@ -1,10 +1,22 @@
 # -*- coding: utf-8 -*-
 #
+from unittest import mock
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
 from business_logic.models.log import LOG_ENTRY_VALUE_LENGTH
 
 from .common import *
 
 
+def root_node_cache(root):
+    node_cache = NodeCache()
+    node_cache.initialize(root)
+    return node_cache
+
+
 class LogTest(TestCase):
 
     def test_logger(self):
@@ -132,6 +144,142 @@ class LogTest(TestCase):
         result = root.interpret(context)
         self.assertFalse(ExceptionLog.objects.all())
 
+    def test_log_sib_order(self):
+        root = Node.add_root()
+        for i in range(3):
+            tree_1plus2mul3(parent=root)
+            root = Node.objects.get(id=root.id)
+
+        context = Context(log=True)
+        root.interpret(context)
+
+        log = LogEntry.objects.get(id=context.logger.log.id)
+        children = list(log.get_children())
+        self.assertEqual([1, 2, 3], [child.sib_order for child in children])
+        self.assertEqual([node.id for node in root.get_children()], [child.node_id for child in children])
+        self.assertEqual(['1.0', '*'], [child.previous_value for child in children[0].get_children()])
+
+    def test_log_queries_count_should_depend_on_depth(self):
+        root = symmetric_tree(count=64)
+        queries_count = []
+
+        for log in (False, True):
+            context = Context(log=log)
+            context.set_node_cache(root_node_cache(root))
+            with CaptureQueriesContext(connection) as queries:
+                root.interpret(context)
+            queries_count.append(len(queries))
+
+        # select of last root sib_order, root insert and insert per other 6 levels
+        self.assertEqual(queries_count[0] + 8, queries_count[1])
+        self.assertEqual(64 * 2 - 1, LogEntry.objects.count())
+
+    def test_value_should_be_rendered_on_interpret_leave(self):
+        root = Node.add_root()
+        node = tree_1plus2mul3(parent=root)
+        root = Node.objects.get(id=root.id)
+        value = [1]
+
+        logger = Logger()
+        logger.interpret_enter(node=root)
+        logger.interpret_enter(node=node)
+        logger.interpret_leave(node=node, value=value)
+        value.append(2)
+        logger.interpret_leave(node=root, value=None)
+
+        self.assertEqual('[1]', LogEntry.objects.get(node=node).current_value)
+
+    def test_prepare_value_should_not_evaluate_queryset(self):
+        queryset = Execution.objects.all()
+        with self.assertNumQueries(0):
+            self.assertEqual('<QuerySet of business_logic.Execution>', Logger().prepare_value(queryset))
+
+    def test_prepare_value_long_collection(self):
+        value = Logger().prepare_value(list(range(100000)))
+        self.assertTrue(value.endswith('...]'))
+        self.assertLessEqual(len(value), LOG_ENTRY_VALUE_LENGTH)
+
+    def test_prepare_value_model_instance(self):
+        instance = Model.objects.create()
+        instance = Model.objects.get(id=instance.id)
+
+        with mock.patch.object(Model, '__str__', return_value='model') as model_str, self.assertNumQueries(0):
+            self.assertEqual('<test_app.Model pk={}>'.format(instance.pk), Logger().prepare_value(instance))
+
+        model_str.assert_not_called()
+
+
+class LogModeTest(TestCase):
+
+    def test_sampling(self):
+        root = tree_1plus2mul3()
+        logs = []
+
+        for i in range(6):
+            with Context(log=True, log_sampling=3) as context:
+                root.interpret(context)
+                logs.append(context.logger.log)
+
+        self.assertEqual(2, len([log for log in logs if log is not None]))
+
+    def test_exceptions(self):
+        root = Node.add_root()
+        failed = symmetric_tree(operator='/', value=0, count=2, parent=root)
+        root = Node.objects.get(id=root.id)
+        tree_1plus2mul3(parent=root)
+        root = Node.objects.get(id=root.id)
+
+        with Context(log=True, log_mode=LogMode.EXCEPTIONS,
+                     exception_handling_policy=ExceptionHandlingPolicy.IGNORE) as context:
+            root.interpret(context)
+
+        log = LogEntry.objects.get(id=context.logger.log.id)
+        self.assertEqual([failed.id], [log_entry.node_id for log_entry in log.get_children()])
+        self.assertEqual(2, LogEntry.objects.count())
+        self.assertEqual(1, ExceptionLog.objects.count())
+
+    def test_exceptions_should_render_only_logged_nodes(self):
+        root = Node.add_root()
+        symmetric_tree(operator='/', value=0, count=2, parent=root)
+        root = Node.objects.get(id=root.id)
+        tree_1plus2mul3(parent=root)
+        root = Node.objects.get(id=root.id)
+
+        with mock.patch.object(NumberConstant, '__str__', return_value='0') as number_str, \
+                mock.patch.object(Logger, 'prepare_value', autospec=True, return_value='') as prepare_value:
+            with Context(log=True, log_mode=LogMode.EXCEPTIONS,
+                         exception_handling_policy=ExceptionHandlingPolicy.IGNORE) as context:
+                root.interpret(context)
+
+        number_str.assert_not_called()
+        # current value of root, previous and current values of failed binary operator
+        self.assertEqual(3, prepare_value.call_count)
+        self.assertEqual(2, LogEntry.objects.count())
+
+    def test_without_exceptions(self):
+        with Context(log=True, log_mode=LogMode.EXCEPTIONS) as context:
+            tree_1plus2mul3().interpret(context)
+
+        self.assertEqual(1, LogEntry.objects.count())
+
+    def test_slowest(self):
+        root = Node.add_root()
+        for i in range(3):
+            tree_1plus2mul3(parent=root)
+            root = Node.objects.get(id=root.id)
+
+        func_def = PythonModuleFunctionDefinition.objects.create(module='time', function='sleep')
+        func_node = root.add_child(content_object=Function(definition=func_def))
+        func_node.add_child(content_object=NumberConstant(value=0.01))
+        root = Node.objects.get(id=root.id)
+
+        with Context(log=True, log_mode=LogMode.SLOWEST, log_slowest_count=1) as context:
+            root.interpret(context)
+
+        log = LogEntry.objects.get(id=context.logger.log.id)
+        self.assertEqual([func_node.id], [log_entry.node_id for log_entry in log.get_children()])
+        self.assertEqual(2, LogEntry.objects.count())
+
 
 class ProgramTest(ProgramTestBase):
 
@@ -158,3 +306,54 @@ class ProgramTest(ProgramTestBase):
         context = Context(debug=True, log=False)
         result = self.program_version.execute(context=context, test_model=self.test_model)
         self.assertIsNone(result.execution.log)
+
+
+class PausedLogWriter(LogWriter):
+
+    def start(self):
+        pass
+
+
+class LogWriterTest(TransactionTestCase):
+
+    def interpret(self, writer, root):
+        with mock.patch('business_logic.models.log.log_writer', writer):
+            with Context(log=True, log_async=True) as context:
+                root.interpret(context)
+
+    def test_write(self):
+        writer = PausedLogWriter(queue_size=10)
+        for i in range(3):
+            self.interpret(writer, tree_1plus2mul3())
+        self.assertEqual(0, LogEntry.objects.count())
+
+        LogWriter.start(writer)
+        writer.join()
+        self.assertEqual(3, writer.written)
+        self.assertEqual(3, LogEntry.objects.filter(parent__isnull=True).count())
+        self.assertEqual(3 * 5, LogEntry.objects.count())
+
+    def test_drop(self):
+        writer = PausedLogWriter(queue_size=1, overflow_policy=LogOverflowPolicy.DROP)
+        root = tree_1plus2mul3()
+        self.interpret(writer, root)
+        self.interpret(writer, root)
+        self.assertEqual(1, writer.dropped)
+
+        LogWriter.start(writer)
+        writer.join()
+        self.assertEqual(1, writer.written)
+
+    def test_execute_log_async(self):
+        program = Program.objects.create(
+            program_interface=ProgramInterface.objects.create(code='test'), title='test', code='test')
+        program_version = ProgramVersion.objects.create(program=program, entry_point=tree_1plus2mul3())
+
+        context = Context(debug=True, log=True, log_async=True)
+        program_version.execute(context=context)
+        log_writer.join()
+
+        execution = Execution.objects.get(id=context.execution.id)
+        self.assertIsNotNone(execution.finish_time)
+        self.assertEqual(context.logger.log.id, execution.log_id)
+        self.assertEqual(program_version.entry_point, execution.log.node)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+
+import datetime
+
+from business_logic.models.metrics import LATENCY_BUCKETS
+from business_logic.models.parallel import initialize_worker
+
+from .common import *
+
+
+class LatencyHistogramTest(TestCase):
+
+    def test_percentile(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.get_percentile(50))
+
+        for i in range(1, 101):
+            histogram.add(i / 1000.0)
+
+        for percent in (50, 95, 99):
+            value = histogram.get_percentile(percent)
+            self.assertGreaterEqual(value, percent / 1000.0)
+            self.assertLess(value, percent / 1000.0 * 1.2)
+
+    def test_long_values(self):
+        histogram = LatencyHistogram()
+        histogram.add(1000)
+        self.assertEqual(LATENCY_BUCKETS[-1], histogram.get_percentile(99))
+
+    def test_merge(self):
+        histogram = LatencyHistogram()
+        histogram.add(0.001)
+        other = LatencyHistogram({str(index): count for index, count in histogram.counts.items()})
+        other.merge(histogram)
+        self.assertEqual([2], list(other.counts.values()))
+
+
+class MetricsCollectorTest(ProgramTestBase):
+
+    def setUp(self):
+        super(MetricsCollectorTest, self).setUp()
+        metrics_collector.clear()
+
+    def test_execute(self):
+        for i in range(3):
+            self.program_version.execute(test_model=self.test_model)
+
+        summary = metrics_collector.get_metrics(self.program_version.id).get_summary()
+        self.assertEqual(3, summary['executions'])
+        self.assertEqual({}, summary['errors'])
+        self.assertIsNotNone(summary['p50'])
+        self.assertLessEqual(summary['p50'], summary['p99'])
+
+    def test_errors(self):
+        self.program_version.entry_point = symmetric_tree(operator='/', value=0, count=2)
+        self.program_version.save()
+        self.program_version.execute(test_model=self.test_model)
+
+        with self.assertRaises(KeyError):
+            self.program_version.execute()
+
+        summary = metrics_collector.get_metrics(self.program_version.id).get_summary()
+        self.assertEqual(2, summary['executions'])
+        self.assertEqual(dict(ZeroDivisionError=1, KeyError=1), summary['errors'])
+
+    def test_measure_should_not_connect_receivers(self):
+        context = Context()
+        receivers = len(signals.interpret_exception.receivers)
+
+        with metrics_collector.measure(self.program_version.id, context):
+            self.assertEqual(receivers, len(signals.interpret_exception.receivers))
+            signals.interpret_exception.send(sender=context, node=None, exception=ValueError(), traceback=None)
+            signals.interpret_exception.send(sender=Context(), node=None, exception=KeyError(), traceback=None)
+
+        summary = metrics_collector.get_metrics(self.program_version.id).get_summary()
+        self.assertEqual(dict(ValueError=1), summary['errors'])
+
+    def test_worker_should_not_inherit_counters(self):
+        self.program_version.execute(test_model=self.test_model)
+        initialize_worker()
+        self.assertIsNone(metrics_collector.get_metrics(self.program_version.id))
+
+    def test_disabled(self):
+        self.program_version.execute(context=Context(metrics=False), test_model=self.test_model)
+        self.assertIsNone(metrics_collector.get_metrics(self.program_version.id))
+
+    def test_flush(self):
+        for i in range(2):
+            self.program_version.execute(test_model=self.test_model)
+        metrics_collector.flush()
+
+        self.assertIsNone(metrics_collector.get_metrics(self.program_version.id))
+        stats = ProgramVersionStats.objects.get()
+        self.assertEqual(self.program_version, stats.program_version)
+        self.assertEqual(2, stats.executions)
+        self.assertEqual(2, sum(stats.histogram.values()))
+
+        self.program_version.execute(test_model=self.test_model)
+        self.assertEqual(3, get_program_version_metrics(self.program_version).executions)
+        since = timezone.now() + datetime.timedelta(seconds=1)
+        self.assertEqual(1, get_program_version_metrics(self.program_version, since=since).executions)
+
+    def test_periodic_flush(self):
+        collector = MetricsCollector(flush_interval=0)
+        collector.add(self.program_version.id, 0.001, ['ValueError'])
+        self.assertEqual(dict(ValueError=1), ProgramVersionStats.objects.get().errors)
+
+    def test_flush_deleted_program_version(self):
+        collector = MetricsCollector()
+        collector.add(0, 0.001)
+        collector.flush()
+        self.assertFalse(ProgramVersionStats.objects.exists())
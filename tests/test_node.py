@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 #
 
+import timeit
+
 from datetime import datetime
 
 from django.conf import settings
 from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from .common import *
 
@@ -130,6 +133,51 @@ class NodeTest(TestCase):
         self.assertFalse(Node.objects.filter(pk=node1.pk).count())
         self.assertFalse(Node.objects.filter(pk=node2.pk).count())
 
+    def test_delete_queries_should_not_depend_on_tree_size(self):
+        queries = []
+
+        for count in (4, 256):
+            root = symmetric_tree(count=count)
+            operator_type_id = get_content_type_id(BinaryOperator)
+            operator_ids = [root.object_id] + [
+                node.object_id for node in root.get_descendants() if node.content_type_id == operator_type_id]
+
+            with CaptureQueriesContext(connection) as captured:
+                root.delete()
+
+            queries.append(len(captured))
+            self.assertFalse(Node.objects.filter(tree_id=root.tree_id))
+            self.assertFalse(BinaryOperator.objects.filter(id__in=operator_ids))
+            self.assertFalse(NumberConstant.objects.all())
+
+        self.assertEqual(queries[0], queries[1])
+
+    def test_delete_subtree(self):
+        root = get_test_tree()
+        assignment = root.get_children()[1]
+        variable_definition = root.get_children()[0]
+
+        assignment.delete()
+
+        root = Node.objects.get(id=root.id)
+        self.assertEqual([variable_definition.id], [node.id for node in root.get_descendants()])
+        self.assertEqual((1, 4), (root.lft, root.rgt))
+        self.assertFalse(Assignment.objects.all())
+        self.assertTrue(VariableDefinition.objects.filter(id=variable_definition.object_id))
+
+    def test_delete_should_cascade(self):
+        root = get_test_tree()
+        program_interface = ProgramInterface.objects.create(code='test')
+        program = Program.objects.create(program_interface=program_interface, title='test', code='test')
+        program_version = ProgramVersion.objects.create(program=program, entry_point=root)
+        execution = Execution.objects.create(program_version=program_version)
+        NodeProfile.objects.create(execution=execution, node=root.get_children()[1], parent=root, calls=1, time=0)
+
+        root.delete()
+
+        self.assertFalse(ProgramVersion.objects.filter(id=program_version.id))
+        self.assertFalse(NodeProfile.objects.all())
+
     def test_delete_with_lost_content_object(self):
         root = Node.add_root()
         statement1 = NumberConstant(value=1)
@@ -384,3 +432,40 @@ class NodeCacheTest(TestCase):
         content_object = root.content_object
         self.assertEqual(content_object.node, root)
         self.assertEqual(max_num_queries, len(queries))
+
+    def test_get_parent(self):
+        cache_holder = NodeCacheHolder()
+        root = symmetric_tree(count=4)
+        lft_node, rgh_node = cache_holder.get_children(root)
+        self.assertIsNone(cache_holder._node_cache.get_parent(root))
+        self.assertIs(root, cache_holder._node_cache.get_parent(lft_node))
+        for child in cache_holder.get_children(rgh_node):
+            self.assertIs(rgh_node, cache_holder._node_cache.get_parent(child))
+
+    def test_build_index(self):
+        nodes = nested_set_nodes(200, branching=3)
+        node_cache = NodeCache()
+        node_cache._build_index(nodes)
+
+        for parent in nodes:
+            children = [
+                node for node in nodes
+                if node.lft >= parent.lft and node.lft <= parent.rgt - 1 and node.depth == parent.depth + 1
+            ]
+            self.assertEqual(children, node_cache._child_by_parent_id[parent.id])
+            for child in children:
+                self.assertIs(parent, node_cache._parent_by_id[child.id])
+
+
+@benchmark
+class NodeCacheBenchmarkTest(TestCase):
+
+    def measure(self, count):
+        nodes = nested_set_nodes(count)
+        return min(timeit.repeat(lambda: NodeCache()._build_index(nodes), number=5, repeat=5))
+
+    def test_build_index_scales_linearly(self):
+        # 4x nodes should take about 4x time, quadratic algorithm takes 16x
+        small = self.measure(3000)
+        large = self.measure(12000)
+        self.assertLess(large / small, 10)
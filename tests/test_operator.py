@@ -150,3 +150,73 @@ class BinaryOperatorDecimalOperandTest(ProgramTestBase):
         self.program_version.execute(test_model=self.test_model, context=context)
         self.assertEqual(self.test_model.decimal_value / Decimal(2.0),
                          context.get_variable(self.result_variable_definition))
+
+
+class BinaryOperatorShortCircuitTest(TestCase):
+
+    def setUp(self):
+        self.condition_variable_definition = VariableDefinition.objects.create(name='Condition')
+        self.exceptions = []
+        signals.interpret_exception.connect(self.on_interpret_exception)
+
+    def tearDown(self):
+        signals.interpret_exception.disconnect(self.on_interpret_exception)
+
+    def on_interpret_exception(self, **kwargs):
+        self.exceptions.append(kwargs['exception'])
+
+    def create_tree(self, operator):
+        # right operand raises ZeroDivisionError
+        root = Node.add_root(content_object=BinaryOperator(operator=operator))
+        root.add_child(content_object=Variable(definition=self.condition_variable_definition))
+        symmetric_tree(operator='/', value=0, count=2, parent=root)
+        return Node.objects.get(id=root.id)
+
+    def interpret(self, root, condition, **kwargs):
+        context = Context(**kwargs)
+        context.set_variable(self.condition_variable_definition, condition)
+        if kwargs.get('compile'):
+            return NodeCompiler().compile(root)(context)
+        return root.interpret(context)
+
+    def test_is_short_circuit(self):
+        self.assertTrue(BinaryOperator(operator='&').is_short_circuit(False))
+        self.assertFalse(BinaryOperator(operator='&').is_short_circuit(True))
+        self.assertFalse(BinaryOperator(operator='&').is_short_circuit(0))
+        self.assertTrue(BinaryOperator(operator='|').is_short_circuit(True))
+        self.assertFalse(BinaryOperator(operator='|').is_short_circuit(False))
+        self.assertFalse(BinaryOperator(operator='+').is_short_circuit(True))
+
+    def test_and(self):
+        root = self.create_tree('&')
+
+        for compile in (False, True):
+            self.assertFalse(self.interpret(root, False, compile=compile))
+            self.assertFalse(self.exceptions)
+
+            self.assertIsNone(self.interpret(root, True, compile=compile))
+            self.assertIsInstance(self.exceptions.pop(), ZeroDivisionError)
+
+    def test_or(self):
+        root = self.create_tree('|')
+
+        for compile in (False, True):
+            self.assertTrue(self.interpret(root, True, compile=compile))
+            self.assertFalse(self.exceptions)
+
+            self.assertIsNone(self.interpret(root, False, compile=compile))
+            self.assertIsInstance(self.exceptions.pop(), ZeroDivisionError)
+
+    def test_fast_interpret(self):
+        root = self.create_tree('&')
+        self.assertFalse(self.interpret(root, False, fast_interpret=True))
+        self.assertFalse(self.exceptions)
+
+    def test_fold_constant_left_operand(self):
+        root = Node.add_root(content_object=BinaryOperator(operator='&'))
+        root.add_child(content_object=BooleanConstant(value=False))
+        Node.objects.get(id=root.id).add_child(content_object=Variable(definition=self.condition_variable_definition))
+        compiler = NodeCompiler()
+        compiled = compiler.compile_node(Node.objects.get(id=root.id))
+        self.assertTrue(compiler.is_constant(compiled))
+        self.assertIs(False, compiled(Context()))
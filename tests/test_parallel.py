@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+
+import os
+import time
+
+from django.db import transaction
+from django.db.transaction import TransactionManagementError
+
+from .common import *
+
+
+class ProgramExecuteParallelTest(ProgramTestMixin, TransactionTestCase):
+
+    def setUp(self):
+        super(ProgramExecuteParallelTest, self).setUp()
+        self.program_version.entry_point = variable_assign_value(
+            variable_name='B', value=Variable(definition=self.fields['int_value'].variable_definition))
+        self.program_version.save()
+        self.test_models = [self.test_model] + [Model.objects.create(int_value=i) for i in range(2, 8)]
+
+    def test_execute_parallel(self):
+        results = list(self.program_version.execute_parallel(Model.objects.order_by('-id'), workers=2, chunk_size=3))
+        self.assertEqual([test_model.id for test_model in reversed(self.test_models)],
+                         [result.pk for result in results])
+        for test_model, result in zip(reversed(self.test_models), results):
+            self.assertIsInstance(result, ExecutionResult)
+            self.assertEqual(dict(B=test_model.int_value), result.variables)
+            self.assertIsNone(result.error)
+
+    def test_execute_parallel_instances_and_pks(self):
+        results = list(self.program_version.execute_parallel([self.test_models[1], self.test_models[2].id]))
+        self.assertEqual([2, 3], [result.variables['B'] for result in results])
+
+    def test_execute_parallel_errors(self):
+        self.program_version.entry_point = symmetric_tree(operator='/', value=0, count=2)
+        self.program_version.save()
+        results = list(self.program_version.execute_parallel([self.test_model.id, 0], workers=2, chunk_size=1))
+        self.assertTrue(results[0].error.startswith('ZeroDivisionError: '))
+        self.assertEqual('DoesNotExist: Model matching pk=0 does not exist', results[1].error)
+
+    def test_execute_parallel_save(self):
+        self.program_version.entry_point = variable_assign_value(
+            value=NumberConstant(value=5), variable_definition=self.fields['int_value'].variable_definition)
+        self.program_version.save()
+
+        results = list(self.program_version.execute_parallel(Model.objects.all(), workers=2, chunk_size=3, save=True))
+
+        self.assertEqual(len(self.test_models), len(results))
+        self.assertEqual({5}, set(Model.objects.values_list('int_value', flat=True)))
+
+    def test_execute_parallel_should_not_save_by_default(self):
+        list(self.program_version.execute_parallel(Model.objects.all(), workers=2, chunk_size=3))
+        int_values = Model.objects.order_by('id').values_list('int_value', flat=True)
+        self.assertEqual([test_model.int_value for test_model in self.test_models], list(int_values))
+
+    def test_execute_parallel_inside_atomic_block(self):
+        with transaction.atomic():
+            with self.assertRaises(TransactionManagementError):
+                list(self.program_version.execute_parallel([self.test_model]))
+
+    def test_execute_parallel_should_check_arguments(self):
+        ProgramArgument.objects.create(
+            program_interface=self.program_interface,
+            content_type=ContentType.objects.get_for_model(RelatedModel),
+            name='related')
+
+        with self.assertRaises(TypeError):
+            self.program_version.execute_parallel([self.test_model])
+
+
+@benchmark
+@unittest.skipIf((os.cpu_count() or 1) < 2, 'requires multiple processors')
+class ProgramExecuteParallelBenchmarkTest(ProgramTestMixin, TransactionTestCase):
+
+    def setUp(self):
+        super(ProgramExecuteParallelBenchmarkTest, self).setUp()
+        self.program_version.entry_point = symmetric_tree(count=256)
+        self.program_version.save()
+        for i in range(400):
+            Model.objects.create()
+
+    def measure(self, workers):
+        start = time.perf_counter()
+        list(self.program_version.execute_parallel(Model.objects.all(), workers=workers, chunk_size=50))
+        return time.perf_counter() - start
+
+    def test_scaling(self):
+        workers = min(os.cpu_count(), 4)
+        self.measure(workers)
+        speedup = self.measure(1) / self.measure(workers)
+        self.assertGreater(speedup, workers * 0.5)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+#
+
+from .common import *
+
+
+class ProfilerTest(TestCase):
+
+    def test_profile_disabled(self):
+        with Context() as context:
+            tree_1plus2mul3().interpret(context)
+
+        self.assertEqual([], context.profiler.get_report())
+
+    def test_report(self):
+        root = tree_1plus2mul3()
+        with Context(profile=True) as context:
+            root.interpret(context)
+            root.interpret(context)
+
+        report = context.profiler.get_report()
+        nodes = list(Node.get_tree(root))
+        self.assertEqual([node.id for node in nodes], [row['node'] for row in report])
+        self.assertEqual([None, root.id], [row['parent'] for row in report[:2]])
+        self.assertEqual({2}, set(row['calls'] for row in report))
+        self.assertGreaterEqual(report[0]['time'], sum(row['time'] for row in report if row['parent'] == root.id))
+
+    def test_flame_graph(self):
+        root = tree_1plus2mul3()
+        with Context(profile=True) as context:
+            root.interpret(context)
+
+        flame_graph = context.profiler.get_flame_graph()
+        self.assertEqual(str(root.id), flame_graph['name'])
+        self.assertEqual(1, flame_graph['calls'])
+        self.assertEqual(2, len(flame_graph['children']))
+        self.assertEqual(2, len(flame_graph['children'][1]['children']))
+
+    def test_flame_graph_several_roots(self):
+        report = [
+            dict(node=1, parent=None, calls=1, time=1.0),
+            dict(node=2, parent=None, calls=2, time=2.0),
+        ]
+        flame_graph = get_flame_graph(report)
+        self.assertEqual('all', flame_graph['name'])
+        self.assertEqual(3.0, flame_graph['value'])
+        self.assertIsNone(get_flame_graph([]))
+
+
+class ProgramProfileTest(ProgramTestBase):
+
+    def test_execute_profile(self):
+        context = Context(profile=True, debug=True)
+        self.program_version.execute(context=context, test_model=self.test_model)
+        profile = list(context.execution.profile.all())
+        self.assertEqual(len(context.profiler.get_report()), len(profile))
+        self.assertEqual(self.program_version.entry_point_id, profile[0].node_id)
+
+    def test_execute_profile_without_debug(self):
+        context = self.program_version.execute(context=Context(profile=True), test_model=self.test_model)
+        self.assertTrue(context.profiler.get_report())
+        self.assertFalse(NodeProfile.objects.exists())
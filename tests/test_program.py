@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from .common import *
 
 
@@ -145,6 +148,183 @@ class ProgramTest(ProgramTestBase):
         self.assertIsNone(self.test_model.int_value)
 
 
+class ProgramArgumentRelatedTest(ProgramTestBase):
+
+    def setUp(self):
+        super(ProgramArgumentRelatedTest, self).setUp()
+        self.int_value_field = self.fields['foreign_value.int_value']
+        self.program_version.entry_point = variable_assign_value(
+            value=Variable(definition=self.int_value_field.variable_definition),
+            variable_definition=self.fields['int_value'].variable_definition)
+        self.program_version.save()
+
+    def create_test_models(self, count):
+        return [
+            Model.objects.create(foreign_value=RelatedModel.objects.create(int_value=i)) for i in range(count)
+        ]
+
+    def test_get_relation_paths(self):
+        self.assertEqual((['foreign_value'], []), self.argument.get_relation_paths())
+        self.assertEqual(([], []), get_relation_paths(Model, ['int_value', 'foreign_value_id', 'unknown.field']))
+        self.assertEqual(([], ['model__foreign_value']), get_relation_paths(RelatedModel, ['model.foreign_value']))
+
+    def test_execute_should_load_relations(self):
+        test_model, = self.create_test_models(1)
+        test_model = Model.objects.get(id=test_model.id)
+        foreign_value_field = Model._meta.get_field('foreign_value')
+        program_argument, = self.program_version.get_program_arguments()
+
+        with self.assertNumQueries(1):
+            program_argument.load_related([test_model])
+
+        self.assertTrue(foreign_value_field.is_cached(test_model))
+
+        with self.assertNumQueries(0):
+            program_argument.load_related([test_model])
+
+    def test_execute_should_not_replace_argument(self):
+        test_model, = self.create_test_models(1)
+        test_model = Model.objects.get(id=test_model.id)
+        context = self.program_version.execute(test_model=test_model)
+        self.assertIs(test_model, context.get_variable(self.argument.variable_definition))
+        self.assertEqual(test_model.foreign_value.int_value, test_model.int_value)
+
+    def test_execute_should_not_override_changed_foreign_key(self):
+        test_model, = self.create_test_models(1)
+        test_model = Model.objects.get(id=test_model.id)
+        test_model.foreign_value_id = RelatedModel.objects.create(int_value=7).id
+        self.program_version.execute(test_model=test_model)
+        self.assertEqual(7, test_model.int_value)
+
+    def test_execute_many_queries_count_should_not_depend_on_arguments_count(self):
+        def execute_many(count):
+            Model.objects.all().delete()
+            self.create_test_models(count)
+            with CaptureQueriesContext(connection) as queries:
+                contexts = list(self.program_version.execute_many(Model.objects.all(), chunk_size=3))
+            self.assertEqual([i for i in range(count)], [context.get_variable(
+                self.fields['int_value'].variable_definition) for context in contexts])
+            return len(queries)
+
+        execute_many(1)
+        self.assertEqual(execute_many(2), execute_many(8))
+
+
+class ProgramExecuteManyTest(ProgramTestBase):
+
+    def setUp(self):
+        super(ProgramExecuteManyTest, self).setUp()
+        self.variable_definition = self.fields['int_value'].variable_definition
+        self.program_version.entry_point = variable_assign_value(
+            value=NumberConstant(value=5), variable_definition=self.variable_definition)
+        self.program_version.save()
+
+    def execute_many(self, count):
+        for i in range(count):
+            Model.objects.create(int_value=i)
+        with CaptureQueriesContext(connection) as queries:
+            contexts = list(self.program_version.execute_many(Model.objects.all(), chunk_size=3))
+        return contexts, len(queries)
+
+    def test_execute_many(self):
+        contexts, queries_count = self.execute_many(5)
+        self.assertEqual(Model.objects.count(), len(contexts))
+        for context, test_model in zip(contexts, Model.objects.all()):
+            self.assertIsInstance(context, Context)
+            self.assertEqual(test_model, context.get_variable(self.argument.variable_definition))
+            self.assertEqual(5, context.get_variable(self.variable_definition))
+
+    def test_execute_many_queries_count_should_not_depend_on_arguments_count(self):
+        list(self.program_version.execute_many([self.test_model]))
+        contexts, queries_count = self.execute_many(4)
+        Model.objects.all().delete()
+        contexts, more_queries_count = self.execute_many(12)
+        self.assertEqual(queries_count, more_queries_count)
+
+    def test_execute_many_dict_arguments(self):
+        contexts = list(self.program_version.execute_many([dict(test_model=self.test_model)]))
+        self.assertEqual(5, self.test_model.int_value)
+        self.assertEqual(1, len(contexts))
+
+    def test_execute_many_is_lazy(self):
+        contexts = self.program_version.execute_many([dict(test_model=self.test_model)])
+        self.assertEqual(1, self.test_model.int_value)
+        next(contexts)
+        self.assertEqual(5, self.test_model.int_value)
+
+    def test_execute_many_context_kwargs(self):
+        context, = self.program_version.execute_many([self.test_model], debug=True)
+        self.assertIsInstance(context.execution, Execution)
+
+    def test_execute_many_should_check_arguments(self):
+        ProgramArgument.objects.create(
+            program_interface=self.program_interface,
+            content_type=ContentType.objects.get_for_model(RelatedModel),
+            name='related')
+
+        with self.assertRaises(TypeError):
+            list(self.program_version.execute_many([self.test_model]))
+
+
+class ProgramSaveChangesTest(ProgramTestBase):
+
+    def setUp(self):
+        super(ProgramSaveChangesTest, self).setUp()
+        self.program_version.entry_point = variable_assign_value(
+            value=NumberConstant(value=5), variable_definition=self.fields['int_value'].variable_definition)
+        self.program_version.save()
+
+    def test_argument_fields_binding_should_not_change_objects(self):
+        self.program_version.entry_point = variable_assign_value()
+        self.program_version.save()
+        context = self.program_version.execute(test_model=self.test_model)
+        self.assertEqual([], context.get_changed_objects())
+
+    def test_get_changed_objects(self):
+        context = self.program_version.execute(test_model=self.test_model)
+        self.assertEqual([(self.test_model, {'int_value'})], context.get_changed_objects())
+
+    def test_save_changes(self):
+        context = self.program_version.execute(test_model=self.test_model)
+        context.save_changes()
+        self.assertEqual(5, Model.objects.get(id=self.test_model.id).int_value)
+        self.assertEqual([], context.get_changed_objects())
+
+    def test_execute_many_save(self):
+        for i in range(6):
+            Model.objects.create(int_value=i)
+        list(self.program_version.execute_many([self.test_model]))
+
+        with CaptureQueriesContext(connection) as queries:
+            list(self.program_version.execute_many(Model.objects.all(), chunk_size=4, save=True))
+
+        self.assertEqual({5}, set(Model.objects.values_list('int_value', flat=True)))
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(2, len(updates))
+
+    def test_execute_many_should_not_save_by_default(self):
+        list(self.program_version.execute_many([self.test_model]))
+        self.assertEqual(1, Model.objects.get(id=self.test_model.id).int_value)
+
+    def test_bulk_save_changes_should_group_by_fields(self):
+        contexts = []
+        for field_name, value in (('int_value', 7), ('string_value', 'x'), ('int_value', 8)):
+            test_model = Model.objects.create()
+            context = Context()
+            context.set_variable(self.argument.variable_definition, test_model)
+            context.set_variable(self.fields[field_name].variable_definition, value)
+            contexts.append(context)
+
+        with CaptureQueriesContext(connection) as queries:
+            bulk_save_changes(contexts)
+
+        self.assertEqual(2, len([query for query in queries if query['sql'].startswith('UPDATE')]))
+        self.assertEqual([(7, ''), (1, 'x'), (8, '')],
+                         [tuple(values) for values in Model.objects.exclude(id=self.test_model.id)
+                         .order_by('id').values_list('int_value', 'string_value')])
+        self.assertEqual([], contexts[0].get_changed_objects())
+
+
 class ProgramAdminTest(ProgramTestBase):
 
     def setUp(self):
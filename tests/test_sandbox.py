@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#
+
+import sys
+
+from unittest import mock
+
+from business_logic.exceptions import SandboxException, SandboxTimeoutException
+from business_logic.sandbox import SandboxPool
+
+from .common import *
+
+FUNCTION_CODE = '''
+def function(a, b):
+    return a - b
+'''
+
+SLEEP_CODE = '''
+def function(seconds):
+    import time
+    time.sleep(seconds)
+    return seconds
+'''
+
+
+class SandboxPoolTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = SandboxPool(workers=2, timeout=2, memory_limit=512 * 1024 * 1024)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_call(self):
+        self.assertEqual(2, self.pool.call(FUNCTION_CODE, ['a', 'b'], (5, 3)))
+
+    def test_call_many(self):
+        self.assertEqual([2, -2, 0], self.pool.call_many(FUNCTION_CODE, ['a', 'b'], [(5, 3), (3, 5), (1, 1)]))
+
+    def test_exception(self):
+        with self.assertLogs('business_logic.sandbox', 'ERROR') as logs:
+            self.assertEqual([None, 2], self.pool.call_many(FUNCTION_CODE, ['a', 'b'], [('a', 1), (5, 3)]))
+            self.assertIsNone(self.pool.call('def function(:', [], ()))
+        self.assertIn('TypeError', logs.output[0])
+        self.assertIn('SyntaxError', logs.output[1])
+
+    def test_timeout(self):
+        pool = SandboxPool(workers=1, timeout=0.5)
+        try:
+            self.assertEqual(0.01, pool.call(SLEEP_CODE, ['seconds'], (0.01, )))
+            with self.assertRaises(SandboxTimeoutException):
+                pool.call(SLEEP_CODE, ['seconds'], (10, ))
+            # worker is replaced
+            self.assertEqual(0.01, pool.call(SLEEP_CODE, ['seconds'], (0.01, )))
+        finally:
+            pool.close()
+
+    def test_worker_crash(self):
+        with self.assertRaises(SandboxException):
+            self.pool.call('def function():\n    import os\n    os._exit(1)', [], ())
+        self.assertEqual(2, self.pool.call(FUNCTION_CODE, ['a', 'b'], (5, 3)))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'memory limit is checked on Linux only')
+    def test_memory_limit(self):
+        code = 'def function(size):\n    return len(bytearray(size))'
+        self.assertEqual(1024, self.pool.call(code, ['size'], (1024, )))
+        self.assertIsNone(self.pool.call(code, ['size'], (2 * 1024 * 1024 * 1024, )))
+
+
+class PythonCodeFunctionSandboxTest(TestCase):
+
+    def setUp(self):
+        function_table.clear()
+        self.pool = SandboxPool(workers=1)
+        self.function_definition = PythonCodeFunctionDefinition.objects.create(code=FUNCTION_CODE)
+        for i, argument_name in enumerate(('a', 'b')):
+            FunctionArgument.objects.create(name=argument_name, order=i, function=self.function_definition)
+
+    def tearDown(self):
+        self.pool.close()
+        function_table.clear()
+
+    def test_sandbox(self):
+        with mock.patch('business_logic.models.function.PYTHON_CODE_SANDBOX', True), \
+                mock.patch('business_logic.models.function.sandbox_pool', self.pool), \
+                mock.patch.object(self.pool, 'call', wraps=self.pool.call) as call:
+            self.assertEqual(2, self.function_definition.call(Context(), 5, 3))
+            self.assertTrue(call.called)
+
+    def test_call_many(self):
+        with mock.patch('business_logic.models.function.PYTHON_CODE_SANDBOX', True), \
+                mock.patch('business_logic.models.function.sandbox_pool', self.pool), \
+                mock.patch.object(self.pool, 'call_many', wraps=self.pool.call_many) as call_many:
+            self.assertEqual([2, -2], self.function_definition.call_many(Context(), [(5, 3), (3, 5)]))
+            call_many.assert_called_once_with(FUNCTION_CODE, ['a', 'b'], [(5, 3), (3, 5)])
+
+    def test_call_many_without_sandbox(self):
+        self.assertEqual([2, -2], self.function_definition.call_many(Context(), [(5, 3), (3, 5)]))
+
+    def test_context_required_function_should_not_use_sandbox(self):
+        self.function_definition.is_context_required = True
+        self.function_definition.code = 'def function(context, a, b):\n    return a - b'
+        self.function_definition.save()
+
+        with mock.patch('business_logic.models.function.PYTHON_CODE_SANDBOX', True), \
+                mock.patch.object(self.pool, 'call') as call:
+            self.assertEqual(2, self.function_definition.call(Context(), 5, 3))
+            self.assertFalse(call.called)
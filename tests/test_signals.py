@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 #
 
+import timeit
+
+from unittest import mock
+
 from .common import *
 
 
@@ -47,3 +51,79 @@ class SignalsTest(TestCase):
 
         signals.block_interpret_leave.connect(raise_on_enter)
         self.assertRaises(SignalCatchException, node.interpret, context)
+
+    def test_fast_interpret_interpret_enter(self):
+        node = Node.add_root()
+        context = Context(fast_interpret=True)
+
+        signals.interpret_enter.connect(raise_on_enter)
+        self.assertRaises(SignalCatchException, node.interpret, context)
+
+    def test_fast_interpret_block_interpret_leave(self):
+        node = Node.add_root()
+        context = Context(fast_interpret=True)
+
+        signals.block_interpret_leave.connect(raise_on_enter)
+        self.assertRaises(SignalCatchException, node.interpret, context)
+
+    def test_fast_interpret_should_ignore_receivers_of_other_contexts(self):
+        count = 16
+        root = symmetric_tree(count=count)
+
+        with Context() as other_context, Context(fast_interpret=True) as context:
+            self.assertTrue(signals.interpret_enter.has_listeners(other_context))
+            with mock.patch.object(signals.interpret_enter, 'send') as send, \
+                    mock.patch.object(signals.block_interpret_enter, 'send') as block_send:
+                self.assertEqual(count, root.interpret(context))
+
+        send.assert_not_called()
+        block_send.assert_not_called()
+        self.assertEqual([], context.frames)
+
+    def test_any_sender_receivers(self):
+        context = Context()
+        signals.interpret_enter.connect(raise_on_enter, sender=context)
+        self.assertFalse(signals.interpret_enter.has_any_sender_receivers)
+        signals.interpret_enter.disconnect(raise_on_enter, sender=context)
+
+        signals.interpret_enter.connect(raise_on_enter)
+        self.assertTrue(signals.interpret_enter.has_any_sender_receivers)
+        signals.interpret_enter.disconnect(raise_on_enter)
+        self.assertFalse(signals.interpret_enter.has_any_sender_receivers)
+
+    def test_listened_signals(self):
+        context = Context(fast_interpret=True, log=True)
+        self.assertIn(signals.interpret_enter, context.listened_signals)
+        self.assertNotIn(signals.block_interpret_enter, context.listened_signals)
+        context.close()
+        self.assertEqual(set(), context.listened_signals)
+
+
+@benchmark
+class SignalsBenchmarkTest(TestCase):
+
+    def measure(self, root, **kwargs):
+        with Context(**kwargs) as context:
+            root.interpret(context)
+            return min(timeit.repeat(lambda: root.interpret(context), number=3, repeat=3))
+
+    def test_per_node_signal_overhead(self):
+        count = 256
+        root = symmetric_tree(count=count)
+        nodes = count * 2 - 1
+        per_node = self.measure(root) / nodes
+        fast_per_node = self.measure(root, fast_interpret=True) / nodes
+        self.assertLess(fast_per_node, per_node)
+
+    def test_fast_interpret_should_not_depend_on_other_contexts(self):
+        root = symmetric_tree(count=64)
+        alone = self.measure(root, fast_interpret=True)
+
+        other_contexts = [Context(log=True, profile=True) for _ in range(200)]
+        try:
+            crowded = self.measure(root, fast_interpret=True)
+        finally:
+            for context in other_contexts:
+                context.close()
+
+        self.assertLess(crowded, alone * 1.5)
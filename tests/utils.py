@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import atexit
 import math
+import os
+import unittest
 
 from django.contrib.contenttypes.models import ContentType
 
@@ -9,6 +12,12 @@ from itertools import zip_longest
 from business_logic.models import *  # noqa E402
 from business_logic.utils import *  # noqa E402
 
+# timing assertions depend on machine load, so benchmarks are skipped by default
+benchmark = unittest.skipUnless(os.environ.get('BENCHMARK'), 'set BENCHMARK environment variable to run benchmarks')
+
+# test database is destroyed before exit handlers are run, so counters of tests shouldn't be flushed
+atexit.register(metrics_collector.clear)
+
 
 def tree_1plus2mul3(parent=None):
     # http://upload.wikimedia.org/wikipedia/ru/d/db/Parsing-example.png
@@ -121,6 +130,27 @@ def variable_assign_value(variable_name='A', variable_definition=None, value=Non
     return parent
 
 
+def nested_set_nodes(count, branching=4):
+    # returns list of unsaved nodes of the tree with given size ordered by lft
+    nodes = []
+
+    def create(node_id, depth, lft):
+        node = Node(id=node_id, depth=depth, lft=lft, tree_id=1)
+        nodes.append(node)
+        right = lft + 1
+        for i in range(branching):
+            child_id = branching * (node_id - 1) + i + 2
+            if child_id > count:
+                break
+            right = create(child_id, depth + 1, right) + 1
+        node.rgt = right
+        return right
+
+    create(1, 1, 1)
+    nodes.sort(key=lambda node: node.lft)
+    return nodes
+
+
 def print_tree_details(nodes):
     # mptt/tests/doctests.py
     opts = nodes[0]._meta
@@ -189,4 +219,4 @@ def create_if_statement(branches_count, use_binary_operator=False, root=None):
 
 
 def cleanup_xml_ids(xml):
-    return re.sub(r' id="\d+"', '', xml, re.MULTILINE | re.DOTALL)
+    return re.sub(r' id="\d+"', '', xml)